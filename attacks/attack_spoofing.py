@@ -2,11 +2,15 @@ import time
 import os
 import csv
 import random
+import sys
 
-DATA_FILE = "data/live/can_stream.csv"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.stream_config import CSV_STREAM_FILE
+
+DATA_FILE = CSV_STREAM_FILE
 
 def ensure_file():
-    os.makedirs("data/live", exist_ok=True)
+    os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
     if not os.path.exists(DATA_FILE):
         with open(DATA_FILE, "w", newline="") as f:
             writer = csv.writer(f)
@@ -17,25 +21,23 @@ def main():
     ensure_file()
 
     try:
-        with open(DATA_FILE, "a", newline="") as f:
-            writer = csv.writer(f)
-
-            while True:
-                spoof_speed = random.uniform(200, 260)     # extreme speed
-                spoof_brake = random.choice([0, 1])
-                spoof_steering = random.uniform(80, 140)   # extreme steering
-
-                writer.writerow([
+        while True:
+            spoof_speed = random.uniform(200, 260)     # extreme speed
+            spoof_brake = random.choice([0, 1])
+            spoof_steering = random.uniform(80, 140)   # extreme steering
+
+            # Reopened per row: the receiver rotates the active segment
+            with open(DATA_FILE, "a", newline="") as f:
+                csv.writer(f).writerow([
                     time.time(),
                     spoof_speed,
                     spoof_brake,
                     spoof_steering
                 ])
-                f.flush()
 
-                print("🔥 Injected EXTREME spoofed data")
+            print("🔥 Injected EXTREME spoofed data")
 
-                time.sleep(0.15)
+            time.sleep(0.15)
 
     except KeyboardInterrupt:
         print("\n[ATTACK] Spoofing stopped safely")
@@ -1,3 +1,25 @@
-CAN_INTERFACE = "socketcan"
-CAN_CHANNEL = "vcan0"   # Raspberry Pi: "can0"
+import os
+
+# Override without editing this file, e.g. CPS_CAN_INTERFACE=virtual on
+# machines without vcan0 (python-can's virtual bus is in-process only)
+CAN_INTERFACE = os.environ.get("CPS_CAN_INTERFACE", "socketcan")
+CAN_CHANNEL = os.environ.get("CPS_CAN_CHANNEL", "vcan0")   # Raspberry Pi: "can0"
 CAN_ID = 0x123
+
+# =====================================================
+# SIGNAL DEFINITIONS
+# =====================================================
+# arbitration id -> signals carried in its payload.
+#   start/length: byte offset and size (1, 2, 4 or 8 bytes)
+#   value = raw * scale + offset
+# Only ids listed here pass the bus filters and get decoded.
+CAN_BYTE_ORDER = "little"
+
+CAN_SIGNALS = {
+    CAN_ID: [
+        {"name": "speed",    "start": 0, "length": 1, "scale": 1.0, "offset": 0.0, "signed": False},
+        {"name": "brake",    "start": 1, "length": 1, "scale": 1.0, "offset": 0.0, "signed": False},
+        # CANTransmitter sends int(steering) & 0xFF, i.e. two's complement
+        {"name": "steering", "start": 2, "length": 1, "scale": 1.0, "offset": 0.0, "signed": True},
+    ],
+}
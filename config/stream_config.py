@@ -0,0 +1,10 @@
+import os
+
+# Live telemetry log written by the receiver and read by the detector/dashboard
+LOG_FORMAT = "csv"   # "csv" or "binary" (fixed-width records, see receiver/data_logger.py)
+
+# CSV telemetry is a segmented store (see receiver/segment_store.py):
+# rows are appended to current.csv, sealed segments are compacted and expired
+CSV_STREAM_DIR = "data/live/can_stream"
+CSV_STREAM_FILE = os.path.join(CSV_STREAM_DIR, "current.csv")
+BINARY_STREAM_FILE = "data/live/can_stream.bin"
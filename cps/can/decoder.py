@@ -0,0 +1,185 @@
+import struct
+
+import numpy as np
+
+from config.can_config import CAN_BYTE_ORDER, CAN_SIGNALS
+
+_STRUCT_CODES = {1: "b", 2: "h", 4: "i", 8: "q"}
+_NUMPY_CODES = {1: "i1", 2: "i2", 4: "i4", 8: "i8"}
+
+STANDARD_MASK = 0x7FF
+EXTENDED_MASK = 0x1FFFFFFF
+
+
+class MessageDecoder:
+    """
+    Precompiled decoder for one arbitration id.
+    A single struct.Struct unpacks all signals of a frame at once, and a
+    structured NumPy dtype decodes whole batches of payloads as a view.
+    """
+
+    def __init__(self, arbitration_id, signals, byte_order=CAN_BYTE_ORDER):
+        self.arbitration_id = arbitration_id
+        self.signals = sorted(signals, key=lambda sig: sig["start"])
+        self.names = [sig["name"] for sig in self.signals]
+
+        endian = "<" if byte_order == "little" else ">"
+        fmt = endian
+        cursor = 0
+        for sig in self.signals:
+            if sig["length"] not in _STRUCT_CODES:
+                raise ValueError(f"{sig['name']}: unsupported signal length {sig['length']}")
+            if sig["start"] < cursor:
+                raise ValueError(f"{sig['name']}: overlaps the previous signal")
+
+            code = _STRUCT_CODES[sig["length"]]
+            fmt += "x" * (sig["start"] - cursor) + (code if sig["signed"] else code.upper())
+            cursor = sig["start"] + sig["length"]
+
+        if cursor > 8:
+            raise ValueError(f"0x{arbitration_id:X}: signals exceed 8 data bytes")
+
+        self._struct = struct.Struct(fmt)
+        self.min_length = cursor
+
+        self._dtype = np.dtype({
+            "names": self.names,
+            "formats": [
+                endian + (_NUMPY_CODES[sig["length"]] if sig["signed"]
+                          else _NUMPY_CODES[sig["length"]].replace("i", "u"))
+                for sig in self.signals
+            ],
+            "offsets": [sig["start"] for sig in self.signals],
+            "itemsize": 8,
+        })
+
+        self._scaling = [
+            (sig["scale"], sig["offset"])
+            if (sig["scale"], sig["offset"]) != (1.0, 0.0) else None
+            for sig in self.signals
+        ]
+        self._identity = all(s is None for s in self._scaling)
+
+    def decode(self, data):
+        """Signal values for one payload, or None if it is too short."""
+        if len(data) < self.min_length:
+            return None
+
+        raw = self._struct.unpack_from(data)
+        if self._identity:
+            return raw
+        return tuple(
+            value if scaling is None else value * scaling[0] + scaling[1]
+            for value, scaling in zip(raw, self._scaling)
+        )
+
+    def decode_batch(self, payloads, dlcs=None):
+        """
+        Column arrays for an (n, 8) uint8 array of payloads. With `dlcs`,
+        rows too short for the signals are dropped, as decode() rejects them.
+        """
+        if dlcs is not None:
+            payloads = payloads[np.asarray(dlcs) >= self.min_length]
+        payloads = np.ascontiguousarray(payloads, dtype=np.uint8)
+        view = payloads.view(self._dtype).reshape(-1)
+
+        columns = {}
+        for name, scaling in zip(self.names, self._scaling):
+            if scaling is None:
+                columns[name] = view[name]
+            else:
+                columns[name] = view[name] * scaling[0] + scaling[1]
+        return columns
+
+
+class CANDecoder:
+    """Table-driven decoding for every arbitration id in CAN_SIGNALS."""
+
+    def __init__(self, table=CAN_SIGNALS, byte_order=CAN_BYTE_ORDER):
+        self.messages = {
+            arbitration_id: MessageDecoder(arbitration_id, signals, byte_order)
+            for arbitration_id, signals in table.items()
+        }
+
+        # All signal names, in table order, as telemetry columns
+        self.signal_names = []
+        for decoder in self.messages.values():
+            for name in decoder.names:
+                if name not in self.signal_names:
+                    self.signal_names.append(name)
+
+        self._slots = {
+            arbitration_id: [self.signal_names.index(name) for name in decoder.names]
+            for arbitration_id, decoder in self.messages.items()
+        }
+        # Last value of every signal (sample-and-hold across ids)
+        self._snapshot = [None] * len(self.signal_names)
+        # Same for decode_records(), carried from one call to the next
+        self._held = {name: np.nan for name in self.signal_names}
+
+    def can_filters(self):
+        """python-can filters so the kernel drops every other id."""
+        return [
+            {
+                "can_id": arbitration_id,
+                "can_mask": EXTENDED_MASK if arbitration_id > STANDARD_MASK else STANDARD_MASK,
+                "extended": arbitration_id > STANDARD_MASK,
+            }
+            for arbitration_id in self.messages
+        ]
+
+    def decode(self, arbitration_id, data):
+        """
+        Update the snapshot with one frame. Returns the full signal row, or
+        None for ids not in the table or malformed payloads.
+        """
+        decoder = self.messages.get(arbitration_id)
+        if decoder is None:
+            return None
+
+        values = decoder.decode(data)
+        if values is None:
+            return None
+
+        snapshot = self._snapshot
+        for slot, value in zip(self._slots[arbitration_id], values):
+            snapshot[slot] = value
+        return list(snapshot)
+
+    def decode_records(self, timestamps, arbitration_ids, payloads, dlcs=None):
+        """
+        Vectorized decode of logged frames into per-frame telemetry columns.
+        Signals not carried by a frame hold their last known value, also
+        across calls (a tailer decodes one poll per call). Frames decode()
+        would reject (unknown id, or a dlc shorter than the signals) are
+        dropped, and so are frames before every signal has been seen.
+        """
+        n = len(timestamps)
+        columns = {name: np.full(n, np.nan) for name in self.signal_names}
+        known = np.zeros(n, dtype=bool)
+
+        for arbitration_id, decoder in self.messages.items():
+            mask = arbitration_ids == arbitration_id
+            if dlcs is not None:
+                mask &= dlcs >= decoder.min_length
+            if not mask.any():
+                continue
+            known |= mask
+            for name, values in decoder.decode_batch(payloads[mask]).items():
+                columns[name][mask] = values
+
+        if len(self.messages) > 1:
+            for name in self.signal_names:
+                col = columns[name]
+                idx = np.where(np.isnan(col), 0, np.arange(n))
+                np.maximum.accumulate(idx, out=idx)
+                # Rows before the first value in this call take the held one
+                col = np.where(np.isnan(col[idx]), self._held[name], col[idx])
+                if n:
+                    self._held[name] = col[-1]
+                columns[name] = col
+                known &= ~np.isnan(col)
+
+        columns["timestamp"] = np.asarray(timestamps, dtype=np.float64)
+        columns["arbitration_id"] = np.asarray(arbitration_ids)
+        return {name: values[known] for name, values in columns.items()}
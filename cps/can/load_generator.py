@@ -0,0 +1,261 @@
+import argparse
+import os
+import threading
+import time
+
+import can
+import numpy as np
+
+from config.can_config import CAN_INTERFACE, CAN_CHANNEL, CAN_ID
+from cps.can.decoder import CANDecoder
+from cps.metrics import FRAMES_DROPPED, FRAMES_IN, METRICS_DIR, METRICS_INTERVAL, read_textfile
+
+# =====================================================
+# PARAMETERS
+# =====================================================
+DEFAULT_RATE = 1000         # frames per second
+DEFAULT_DURATION = 10       # seconds
+BATCH_PERIOD = 0.001        # frames due within one period are sent back to back
+SPIN_THRESHOLD = 0.0005     # busy-wait the last part of a wait instead of sleeping
+REPORT_INTERVAL = 1.0
+DRAIN_TIME = 0.5            # receiver grace period after the last send
+
+# Written by the receiver under test (cps.metrics), not by this process
+RECEIVER_METRICS = os.path.join(METRICS_DIR, "receiver.prom")
+
+
+def parse_id_mix(spec):
+    """'123:0.8,200:0.2' -> (ids, probabilities). Ids are hex."""
+    ids, weights = [], []
+    for part in spec.split(","):
+        arbitration_id, _, weight = part.strip().partition(":")
+        ids.append(int(arbitration_id, 16))
+        weights.append(float(weight) if weight else 1.0)
+
+    weights = np.asarray(weights)
+    return np.asarray(ids, dtype=np.uint32), weights / weights.sum()
+
+
+def sample_payloads(ids, rng):
+    """Plausible telemetry for CAN_ID (as CANTransmitter sends it), noise for other ids."""
+    payloads = rng.integers(0, 256, size=(len(ids), 8), dtype=np.uint8)
+
+    telemetry = ids == CAN_ID
+    n = int(telemetry.sum())
+    payloads[telemetry, 0] = rng.integers(0, 120, n)
+    payloads[telemetry, 1] = rng.integers(0, 2, n)
+    payloads[telemetry, 2] = rng.integers(-30, 31, n).astype(np.int8).view(np.uint8)
+    payloads[telemetry, 3] = 0
+
+    return payloads
+
+
+# =====================================================
+# SENDER
+# =====================================================
+class LoadGenerator:
+    def __init__(self, bus, rate=DEFAULT_RATE, ids=(CAN_ID,), probabilities=None, seed=None):
+        self.bus = bus
+        self.rate = rate
+        self.ids = np.asarray(ids, dtype=np.uint32)
+        self.probabilities = probabilities
+        self.rng = np.random.default_rng(seed)
+
+        self.sent_by_id = {int(i): 0 for i in self.ids}
+        self.sent = 0
+        self.tx_errors = 0
+        self.max_lag = 0.0
+
+    def _batch(self, n):
+        ids = self.rng.choice(self.ids, size=n, p=self.probabilities)
+        payloads = sample_payloads(ids, self.rng)
+
+        messages = []
+        for arbitration_id, payload in zip(ids.tolist(), payloads):
+            messages.append(can.Message(
+                arbitration_id=arbitration_id,
+                data=payload.tobytes(),
+                is_extended_id=arbitration_id > 0x7FF
+            ))
+        return messages
+
+    @staticmethod
+    def _wait_until(deadline):
+        remaining = deadline - time.perf_counter()
+        if remaining > SPIN_THRESHOLD:
+            time.sleep(remaining - SPIN_THRESHOLD)
+        while time.perf_counter() < deadline:
+            pass
+
+    def run(self, duration, stop=None, on_report=None):
+        """
+        Send at `rate` frames/s for `duration` seconds. Deadlines are
+        absolute, so a late batch is caught up instead of shifting the
+        whole schedule.
+        """
+        per_batch = self.rate * BATCH_PERIOD
+        total = int(self.rate * duration)
+
+        started = time.perf_counter()
+        next_report = started + REPORT_INTERVAL
+        deadline = started
+
+        while self.sent + self.tx_errors < total:
+            if stop is not None and stop.is_set():
+                break
+
+            self._wait_until(deadline)
+            now = time.perf_counter()
+            self.max_lag = max(self.max_lag, now - deadline)
+
+            # Frames due by now according to the schedule
+            owed = min(total, self.rate * (now - started) + per_batch) - self.sent - self.tx_errors
+            n = int(owed)
+            if n > 0:
+                for msg in self._batch(n):
+                    try:
+                        self.bus.send(msg)
+                        self.sent += 1
+                        self.sent_by_id[msg.arbitration_id] += 1
+                    except can.CanError:
+                        # e.g. ENOBUFS when the interface tx queue is full
+                        self.tx_errors += 1
+
+            deadline += BATCH_PERIOD
+
+            if on_report is not None and now >= next_report:
+                on_report(self.sent, now - started)
+                next_report += REPORT_INTERVAL
+
+        return time.perf_counter() - started
+
+
+# =====================================================
+# RECEIVER SIDE
+# =====================================================
+class ReceiverCounters:
+    """
+    The receiver's own frame counters, read from the textfile it exports
+    (started with start_metrics("receiver")). Counts are relative to the
+    snapshot taken when this object is created.
+    """
+
+    def __init__(self, path=RECEIVER_METRICS):
+        self.path = path
+        self._base = self._read()
+
+    def _read(self):
+        counts = {"received": 0.0, "dropped": {}}
+        for (name, labels), value in read_textfile(self.path).items():
+            if name == FRAMES_IN[0]:
+                counts["received"] += value
+            elif name == FRAMES_DROPPED[0]:
+                reason = dict(labels).get("reason", "unknown")
+                counts["dropped"][reason] = counts["dropped"].get(reason, 0.0) + value
+        return counts
+
+    def updated_since(self, timestamp):
+        try:
+            return os.path.getmtime(self.path) >= timestamp
+        except OSError:
+            return False
+
+    def read(self):
+        """Frames received and dropped (by reason) since the snapshot."""
+        current = self._read()
+        dropped = {
+            reason: int(value - self._base["dropped"].get(reason, 0.0))
+            for reason, value in current["dropped"].items()
+        }
+        return int(current["received"] - self._base["received"]), dropped
+
+    def wait_for_update(self, timestamp, timeout=METRICS_INTERVAL + 1.0):
+        """Block until the receiver writes its textfile after `timestamp`."""
+        deadline = time.time() + timeout
+        while not self.updated_since(timestamp):
+            if time.time() >= deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+
+def receiver_ids(ids):
+    """Generated ids that pass the receiver's kernel filters (the ones it decodes)."""
+    accepted = CANDecoder().messages
+    return [int(i) for i in ids if int(i) in accepted]
+
+
+# =====================================================
+# MAIN
+# =====================================================
+def main():
+    parser = argparse.ArgumentParser(description="Drive the CAN bus at a target frame rate")
+    parser.add_argument("--interface", default=CAN_INTERFACE,
+                        help="python-can interface, e.g. socketcan or virtual")
+    parser.add_argument("--channel", default=CAN_CHANNEL)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="frames per second")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds")
+    parser.add_argument("--ids", default=f"{CAN_ID:X}",
+                        help="hex id mix with weights, e.g. 123:0.8,200:0.2")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--metrics", default=RECEIVER_METRICS,
+                        help="metrics textfile of the receiver under test")
+    args = parser.parse_args()
+
+    ids, probabilities = parse_id_mix(args.ids)
+    bus = can.interface.Bus(channel=args.channel, interface=args.interface)
+
+    receiver = ReceiverCounters(args.metrics)
+    watched = receiver_ids(ids)
+
+    generator = LoadGenerator(bus, args.rate, ids, probabilities, args.seed)
+    stop = threading.Event()
+
+    def report(sent, elapsed):
+        # The receiver exports every METRICS_INTERVAL seconds, so this lags
+        received, dropped = receiver.read()
+        print(
+            f"[LOADGEN] Sent: {sent} | Rate: {sent / elapsed:.0f}/{args.rate:.0f} fps | "
+            f"Receiver in: {received} | Dropped: {sum(dropped.values())}"
+        )
+
+    print(
+        f"[LOADGEN] {args.rate:.0f} fps for {args.duration:g}s on "
+        f"{args.interface}:{args.channel} (ids {args.ids})"
+    )
+    if not os.path.exists(args.metrics):
+        print(f"[LOADGEN] No receiver metrics at {args.metrics} yet; is the receiver running?")
+
+    try:
+        elapsed = generator.run(args.duration, stop, report)
+    except KeyboardInterrupt:
+        stop.set()
+        elapsed = None
+        print("\n[LOADGEN] Stopped by user")
+
+    finally:
+        bus.shutdown()
+
+    if elapsed:
+        print(
+            f"[LOADGEN] Target: {args.rate:.0f} fps | Achieved: {generator.sent / elapsed:.0f} fps | "
+            f"Sent: {generator.sent} | TX errors: {generator.tx_errors} | "
+            f"Max pacing lag: {generator.max_lag * 1000:.2f} ms"
+        )
+
+    # Let the receiver drain, then wait for its next textfile write
+    time.sleep(DRAIN_TIME)
+    if not receiver.wait_for_update(time.time()):
+        print(f"[LOADGEN] Receiver metrics in {args.metrics} not updated; counts below may be stale")
+
+    received, dropped = receiver.read()
+    expected = sum(generator.sent_by_id[i] for i in watched)
+    reasons = ", ".join(f"{reason}: {n}" for reason, n in sorted(dropped.items())) or "none"
+    print(
+        f"[LOADGEN] Receiver: {received}/{expected} frames in | "
+        f"{max(0, expected - received)} never read | dropped after read: {reasons}"
+    )
+
+
+if __name__ == "__main__":
+    main()
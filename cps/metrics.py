@@ -0,0 +1,205 @@
+import bisect
+import os
+import threading
+
+# =====================================================
+# PARAMETERS
+# =====================================================
+METRICS_DIR = "data/metrics"    # <component>.prom, node_exporter textfile format
+METRICS_INTERVAL = 5.0          # seconds between textfile writes
+
+# Histogram upper bounds (s): 10 us .. 1 s
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+STAGE_METRIC = "cps_stage_duration_seconds"
+STAGE_HELP = "Duration of one pipeline stage call (one frame or one batch)"
+
+# (name, help) of the frame counters every component keeps
+FRAMES_IN = ("cps_frames_in_total", "Frames entering this component")
+FRAMES_SCORED = ("cps_frames_scored_total", "Frames scored by the detector")
+FRAMES_DROPPED = ("cps_frames_dropped_total", "Frames lost or not processed, by reason")
+
+
+# =====================================================
+# METRICS
+# =====================================================
+# Updates take no lock: each series is written from one thread (the
+# component's hot loop) and an export may at worst see an update half done.
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+
+class Histogram:
+    """Cumulative-bucket histogram; observe() is a bisect and three additions."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)     # last slot: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """
+    The metrics of one process. Series are created on first use and looked
+    up by (name, labels); `labels` given here are added to every series.
+    """
+
+    def __init__(self, **labels):
+        self.labels = tuple(sorted(labels.items()))
+        self._metrics = {}      # name -> (type, help, {labels: metric})
+        self._lock = threading.Lock()
+
+    def _get(self, kind, factory, name, help, labels):
+        key = tuple(sorted(labels.items()))
+        entry = self._metrics.get(name)
+        if entry is None or key not in entry[2]:
+            with self._lock:
+                entry = self._metrics.setdefault(name, (kind, help, {}))
+                entry[2].setdefault(key, factory())
+        return entry[2][key]
+
+    def counter(self, name, help="", **labels):
+        return self._get("counter", Counter, name, help, labels)
+
+    def histogram(self, name, help="", buckets=LATENCY_BUCKETS, **labels):
+        return self._get("histogram", lambda: Histogram(buckets), name, help, labels)
+
+    def stage(self, stage):
+        """Latency histogram of one pipeline stage."""
+        return self.histogram(STAGE_METRIC, STAGE_HELP, stage=stage)
+
+    def render(self):
+        """Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            metrics = [(name, kind, help, list(series.items())) for name, (kind, help, series) in self._metrics.items()]
+
+        for name, kind, help, series in sorted(metrics):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+
+            for key, metric in series:
+                labels = self.labels + key
+                if kind == "counter":
+                    lines.append(f"{name}{_labels(labels)} {_number(metric.value)}")
+                    continue
+
+                counts, total, count = list(metric.counts), metric.sum, metric.count
+                cumulative = 0
+                for bound, n in zip(metric.bounds + ("+Inf",), counts):
+                    cumulative += n
+                    le = bound if bound == "+Inf" else repr(bound)
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry, like a logger: modules record into it, the
+# entry point picks the component label and starts the exporter
+REGISTRY = Registry()
+
+
+# =====================================================
+# EXPORT
+# =====================================================
+class MetricsWriter:
+    """
+    Writes the registry to <directory>/<component>.prom every `interval`
+    seconds (write + rename, so a scraper never reads half a file), and
+    once more on stop().
+    """
+
+    def __init__(self, component, registry=REGISTRY, directory=METRICS_DIR, interval=METRICS_INTERVAL):
+        self.registry = registry
+        self.path = os.path.join(directory, f"{component}.prom")
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.registry.labels = tuple(sorted(dict(self.registry.labels, component=component).items()))
+
+    def write(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.registry.render())
+        os.replace(tmp_path, self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                print(f"[METRICS] Cannot write {self.path}: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        try:
+            self.write()
+        except OSError:
+            pass
+
+
+def read_textfile(path):
+    """
+    Samples of a .prom file as {(name, labels): value}, labels a sorted
+    tuple of (key, value) pairs. Empty if the file does not exist yet.
+    """
+    samples = {}
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return samples
+
+    for line in lines:
+        if not line or line.startswith("#"):
+            continue
+        series, _, value = line.rpartition(" ")
+        name, _, labels = series.partition("{")
+        pairs = (pair.split("=", 1) for pair in labels.rstrip("}").split(",") if pair)
+        samples[(name, tuple(sorted((key, raw.strip('"')) for key, raw in pairs)))] = float(value)
+    return samples
+
+
+def start_metrics(component, registry=REGISTRY):
+    """Label the registry with `component` and start writing its textfile."""
+    writer = MetricsWriter(component, registry).start()
+    print(f"[METRICS] {component} metrics in {writer.path}")
+    return writer
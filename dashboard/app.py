@@ -1,68 +1,145 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
+import json
 import os
+import sys
 import time
-from datetime import datetime
-import plotly.graph_objects as go
-from streamlit_autorefresh import st_autorefresh
+from plotly.offline import get_plotlyjs
 
 # ===============================
-# AUTO REFRESH EVERY 2 SECONDS
+# PROJECT ROOT PATH
 # ===============================
-st_autorefresh(interval=2000, key="soc_refresh")
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from config.stream_config import LOG_FORMAT, CSV_STREAM_DIR, BINARY_STREAM_FILE
+from ml.baseline import read_binary_history, read_segment_history
+from ml.event_store import EventStore, EVENT_DB
+from ml.live_feed import FEED_PORT, FEED_PATH
+from ml.rollups import ROLLUP_RESOLUTIONS, Rollups
+from ml.status_block import StatusReader, STATUS_FILE
+from ml.stream_reader import decode_records
+from receiver.data_logger import FrameLogReader
+
+# ===============================
+# NO AUTO REFRESH
+# ===============================
+# The script renders once per session. Live values arrive in the browser
+# over the detector's push feed (ml/live_feed.py) and are appended by the
+# panel in live_panel.html, so an update costs only the new data.
 
 st.set_page_config(
     page_title="CPS-SHIELD SOC",
     layout="wide"
 )
 
-# ===============================
-# PROJECT ROOT PATH
-# ===============================
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, CSV_STREAM_DIR)
+BINARY_DATA_FILE = os.path.join(BASE_DIR, BINARY_STREAM_FILE)
+RAW_POINTS = 5000          # raw frames buffered in the browser
+CHART_POINTS = 1000        # max points drawn per series (LTTB)
+ROLLUP_HISTORY = 3600      # seconds of disk history rolled up for the first render
+STATUS_PATH = os.path.join(BASE_DIR, STATUS_FILE)
+EVENT_DB_PATH = os.path.join(BASE_DIR, EVENT_DB)
+TIMELINE_EVENTS = 15
 
-DATA_FILE = os.path.join(BASE_DIR, "data/live/can_stream.csv")
-STATE_FILE = os.path.join(BASE_DIR, "ml/state.txt")
-SEVERITY_FILE = os.path.join(BASE_DIR, "ml/severity.txt")
-SCORE_FILE = os.path.join(BASE_DIR, "ml/anomaly_score.txt")
-EVENT_LOG = os.path.join(BASE_DIR, "ml/events.log")
+PANEL_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "live_panel.html")
+PANEL_HEIGHT = 1500
+# Empty: the panel connects to FEED_PORT on the host the dashboard was
+# loaded from. Set CPS_FEED_URL when the feed is proxied or elsewhere
+FEED_URL = os.environ.get("CPS_FEED_URL", "")
 
 # ===============================
-# SAFE FILE READ
+# INITIAL STATE (shown until the feed connects)
 # ===============================
-def read_file(path, default="N/A"):
-    try:
-        with open(path, "r") as f:
-            return f.read().strip()
-    except:
-        return default
+@st.cache_resource
+def status_reader():
+    # Mapped once per server process, reads are plain memory accesses
+    return StatusReader(STATUS_PATH)
+
+@st.cache_resource
+def event_store():
+    # Read-only WAL reader: an indexed top-N query instead of re-parsing a log
+    return EventStore(EVENT_DB_PATH, readonly=True)
+
+@st.cache_resource
+def frame_log_reader():
+    return FrameLogReader(BINARY_DATA_FILE)
 
-def file_active(path, timeout=5):
-    if not os.path.exists(path):
-        return False
-    last_mod = os.path.getmtime(path)
-    return (time.time() - last_mod) < timeout
+@st.cache_resource
+def panel_template():
+    with open(PANEL_TEMPLATE) as f:
+        return f.read().replace("__PLOTLY_JS__", get_plotlyjs())
 
 def load_data():
+    if LOG_FORMAT == "binary":
+        # Memory-mapped, only the records that get plotted are touched
+        return decode_records(frame_log_reader().recent(RAW_POINTS))
+
     try:
-        df = pd.read_csv(DATA_FILE, on_bad_lines="skip")
-        return df
+        # Tail of the active segment (earlier segments only if it is short)
+        return read_segment_history(DATA_DIR, n=RAW_POINTS)
     except:
         return pd.DataFrame()
 
-# ===============================
-# LOAD LIVE STATE
-# ===============================
-state = read_file(STATE_FILE, "NORMAL")
-severity = read_file(SEVERITY_FILE, "NONE")
-score = read_file(SCORE_FILE, "0.0")
-df = load_data()
-
-simulator_active = file_active(DATA_FILE)
-HEARTBEAT_PATH = os.path.join(BASE_DIR, "ml/heartbeat.txt")
-ml_active = file_active(HEARTBEAT_PATH)
+def initial_rollups():
+    # Recorded history has no scores; the feed's snapshot brings those
+    since = time.time() - ROLLUP_HISTORY
+    try:
+        if LOG_FORMAT == "binary":
+            df = read_binary_history(BINARY_DATA_FILE, since=since)
+        else:
+            df = read_segment_history(DATA_DIR, since=since)
+    except:
+        return {}
 
+    rollups = Rollups()
+    rollups.update(df)
+    return rollups.snapshot()
 
+def load_events():
+    if not os.path.exists(EVENT_DB_PATH):
+        return []
+    try:
+        events = event_store().recent(TIMELINE_EVENTS)
+    except:
+        return []
+    events = events.astype(object).where(events.notna(), None)
+    return events.to_dict("records")
+
+def initial_frames():
+    df = load_data()
+    if df.empty or "timestamp" not in df.columns:
+        return {"timestamp": [], "speed": [], "steering": []}
+    return {name: df[name].tolist() for name in ["timestamp", "speed", "steering"]}
+
+def script_json(value):
+    # Embedded in a <script> block: never let data close it
+    return json.dumps(value).replace("</", "<\\/")
+
+def render_panel():
+    status = status_reader().read()
+    if status is not None:
+        status = {key: status[key] for key in ["state", "severity", "score", "counter", "frames"]}
+        status["score"] = round(status["score"], 4)
+
+    html = panel_template()
+    for name, value in [
+        ("__FEED_URL__", FEED_URL),
+        ("__FEED_PORT__", str(FEED_PORT)),
+        ("__FEED_PATH__", FEED_PATH),
+        ("__RAW_POINTS__", str(RAW_POINTS)),
+        ("__CHART_POINTS__", str(CHART_POINTS)),
+        ("__ROLLUP_KEEP__", json.dumps(ROLLUP_RESOLUTIONS)),
+        ("__TIMELINE_EVENTS__", str(TIMELINE_EVENTS)),
+        ("__INITIAL_FRAMES__", script_json(initial_frames())),
+        ("__INITIAL_ROLLUPS__", script_json(initial_rollups())),
+        ("__INITIAL_EVENTS__", script_json(load_events())),
+        ("__INITIAL_STATUS__", script_json(status)),
+    ]:
+        html = html.replace(name, value)
+    return html
 
 # ===============================
 # HEADER
@@ -78,115 +155,8 @@ Cyber-Physical System Security Operations Center
 """, unsafe_allow_html=True)
 
 # ===============================
-# ALERT SECTION
-# ===============================
-if state == "ATTACK":
-    st.error(f"🚨 SYSTEM UNDER ATTACK | Severity: {severity}")
-elif state == "RECOVERY":
-    st.warning("⚠ System Recovering")
-else:
-    st.success("✅ System Operating Normally")
-
-# ===============================
-# KPI ROW
+# LIVE PANEL
 # ===============================
-col1, col2, col3, col4 = st.columns(4)
-
-col1.metric("CPS State", state)
-col2.metric("Severity Level", severity)
-col3.metric("Anomaly Score", score)
-col4.metric("Last Update", datetime.now().strftime("%H:%M:%S"))
-
-st.divider()
-
-# ===============================
-# DONUT THREAT VISUAL
-# ===============================
-st.subheader("Threat Severity Visualization")
-
-color_map = {
-    "NONE": "#00ff9c",
-    "LOW": "#facc15",
-    "MEDIUM": "#fb923c",
-    "HIGH": "#ef4444"
-}
-
-level_map = {
-    "NONE": 0,
-    "LOW": 1,
-    "MEDIUM": 2,
-    "HIGH": 3
-}
-
-value = level_map.get(severity, 0)
-
-fig = go.Figure(go.Pie(
-    values=[value, 3-value],
-    hole=0.7,
-    marker_colors=[color_map.get(severity, "#00ff9c"), "#1f2937"],
-    textinfo="none"
-))
-
-fig.update_layout(
-    showlegend=False,
-    height=300,
-    margin=dict(t=0, b=0, l=0, r=0)
-)
-
-st.plotly_chart(fig, width="stretch")
-
-st.divider()
-
-# ===============================
-# TELEMETRY
-# ===============================
-st.subheader("Live Vehicle Telemetry")
-
-if not df.empty and "timestamp" in df.columns:
-    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")
-    df = df.tail(100)
-    st.line_chart(df.set_index("timestamp")[["speed", "steering"]])
-else:
-    st.info("Waiting for simulator data...")
-
-st.divider()
-
-# ===============================
-# EVENT TIMELINE
-# ===============================
-st.subheader("Security Event Timeline")
-
-if os.path.exists(EVENT_LOG):
-    try:
-        events = pd.read_csv(EVENT_LOG, header=None,
-                             names=["time", "event", "description"])
-        events["time"] = pd.to_datetime(events["time"], unit="s")
-
-        if "clear_ui" not in st.session_state:
-            st.session_state.clear_ui = False
-
-        if not st.session_state.clear_ui:
-            st.dataframe(events.tail(15), width="stretch")
-
-        if st.button("Clear Timeline View"):
-            st.session_state.clear_ui = True
-
-    except:
-        st.info("Event log not readable.")
-else:
-    st.info("No security events recorded yet.")
-
-st.divider()
-
-# ===============================
-# SYSTEM HEALTH
-# ===============================
-st.subheader("System Health Monitoring")
-
-colA, colB = st.columns(2)
-
-colA.metric("Simulator Status", 
-            "ACTIVE" if simulator_active else "INACTIVE")
-
-colB.metric("ML Engine Status", 
-            "ACTIVE" if ml_active else "INACTIVE")
+# Alert banner, KPIs, severity donut, telemetry, event timeline and
+# system health, all driven by the feed
+components.html(render_panel(), height=PANEL_HEIGHT, scrolling=True)
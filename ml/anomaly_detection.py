@@ -1,19 +1,15 @@
-import pandas as pd
 from sklearn.ensemble import IsolationForest
 from sklearn.metrics import classification_report, confusion_matrix
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
 
-# Load feature dataset
-df = pd.read_csv("data/processed/features.csv")
+from ml.feature_store import window_feature_set
 
-# Separate features and labels
-X = df.drop(columns=["label"])
-y = df["label"]
+# Load feature dataset (feature store: built once per raw input, memory-mapped)
+features = window_feature_set()
+y = features.labels
 
-# Feature scaling (VERY IMPORTANT)
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
+# Feature scaling (VERY IMPORTANT), fitted once and stored with the features
+X_scaled = features.scaled
 
 # Split data (train mostly on normal data)
 X_train, X_test, y_train, y_test = train_test_split(
@@ -1,41 +1,40 @@
-import pandas as pd
-import numpy as np
-from sklearn.neural_network import MLPRegressor
-from sklearn.preprocessing import StandardScaler
+import os
+
 from sklearn.metrics import classification_report
 
-# Load data
-df = pd.read_csv("data/processed/features.csv")
+from ml.fast_autoencoder import compile_autoencoder, fit_autoencoder, save_autoencoder
+from ml.feature_store import window_feature_set
+from ml.model_artifact import MODEL_DIR
+
+# Windowed-feature model (ml/feature_store.py window features), not the live one
+OFFLINE_AUTOENCODER_FILE = os.path.join(MODEL_DIR, "autoencoder_windows.npz")
 
-X = df.drop(columns=["label"])
-y = df["label"]
+# Load data (feature store: built once per raw input, memory-mapped)
+features = window_feature_set()
 
-# Scale features
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
+X = features.X
+y = features.labels
+
+# Scaled features and the scaler they were scaled with
+scaler = features.scaler()
+X_scaled = features.scaled
 
 # Train only on NORMAL data
 X_train = X_scaled[y == 0]
 
 # Autoencoder using MLP
-autoencoder = MLPRegressor(
-    hidden_layer_sizes=(8, 4, 8),
-    activation="relu",
-    max_iter=500,
-    random_state=42
-)
-
-autoencoder.fit(X_train, X_train)
+autoencoder = fit_autoencoder(X_train)
 
-# Reconstruction
-reconstructed = autoencoder.predict(X_scaled)
-mse = np.mean((X_scaled - reconstructed) ** 2, axis=1)
+# Reconstruction + threshold via the exported float32 forward pass
+compiled = compile_autoencoder(autoencoder, scaler, X[y == 0], features.columns)
+mse = compiled.reconstruction_error(X)
+threshold = compiled.threshold
 
-# Threshold
-threshold = np.percentile(mse[y == 0], 95)
+save_autoencoder(compiled, OFFLINE_AUTOENCODER_FILE)
 
 # Predictions
 y_pred = (mse > threshold).astype(int)
 
 print("\n[Autoencoder (MLP) Results]")
 print(classification_report(y, y_pred))
+print(f"Exported weights -> {OFFLINE_AUTOENCODER_FILE}")
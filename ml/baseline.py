@@ -0,0 +1,197 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from receiver.data_logger import FrameLogReader
+from receiver.segment_store import ACTIVE_SEGMENT, list_segments, load_segment, read_segments, segment_directory
+from ml.event_store import EventStore
+from ml.stream_reader import STREAM_COLUMNS, decode_records, stream_frame
+
+# Events that move the detector between states in the event store
+STATE_EVENTS = ("ATTACK", "RECOVERY", "NORMAL")
+
+READ_BLOCK = 256 * 1024
+
+
+# =====================================================
+# HISTORY READERS
+# =====================================================
+def _first_timestamp(chunk):
+    try:
+        return float(chunk.split(b"\n", 1)[0].split(b",", 1)[0])
+    except ValueError:
+        return None
+
+
+def read_csv_history(path, n=None, since=None):
+    """
+    Rows from the end of a telemetry CSV: at least the last `n` rows, or
+    everything from `since` on. Reads backwards from EOF in growing blocks
+    and parses the collected bytes once.
+    """
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=STREAM_COLUMNS)
+
+    with open(path, "rb") as f:
+        header = f.readline().decode("utf-8", "replace").strip().split(",")
+        data_start = f.tell()
+        pos = f.seek(0, os.SEEK_END)
+
+        chunk = b""
+        block = READ_BLOCK
+        while pos > data_start:
+            size = min(block, pos - data_start)
+            pos -= size
+            f.seek(pos)
+            chunk = f.read(size) + chunk
+            block *= 2
+
+            # Ignore the partial first line of a mid-file block
+            body = chunk if pos == data_start else chunk.split(b"\n", 1)[-1]
+
+            enough_rows = n is None or body.count(b"\n") >= n
+            first = _first_timestamp(body) if since is not None else None
+            reached_since = since is None or (first is not None and first <= since)
+
+            if (n is not None or since is not None) and enough_rows and reached_since:
+                break
+
+    if pos > data_start:
+        chunk = chunk.split(b"\n", 1)[-1]
+
+    try:
+        df = pd.read_csv(
+            io.BytesIO(chunk),
+            header=None,
+            names=header,
+            index_col=False,
+            on_bad_lines="skip"
+        )
+        df = stream_frame(df)
+    except Exception:
+        return pd.DataFrame(columns=STREAM_COLUMNS)
+
+    if since is not None:
+        df = df[df["timestamp"] >= since]
+    return df.reset_index(drop=True)
+
+
+def read_segment_history(directory, n=None, since=None):
+    """
+    read_csv_history() for a segmented store: everything from `since` on
+    (only overlapping segments are opened), or the active segment plus as
+    many sealed segments, newest first, as it takes to reach `n` rows.
+    """
+    if since is not None:
+        df = read_segments(directory, start=since)
+        return stream_frame(df) if not df.empty else pd.DataFrame(columns=STREAM_COLUMNS)
+
+    frames = [read_csv_history(os.path.join(directory, ACTIVE_SEGMENT), n)]
+    rows = len(frames[0])
+    for segment in reversed(list_segments(directory)):
+        if n is not None and rows >= n:
+            break
+        df = load_segment(segment)
+        if df.empty:
+            continue
+        frames.insert(0, stream_frame(df))
+        rows += len(frames[0])
+
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return pd.DataFrame(columns=STREAM_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_binary_history(path, n=None, since=None):
+    reader = FrameLogReader(path)
+
+    if since is not None:
+        records = reader.recent(len(reader))
+        start = np.searchsorted(records["timestamp"], since)
+        records = records[start:]
+    else:
+        records = reader.recent(n if n is not None else len(reader))
+
+    return decode_records(records)
+
+
+# =====================================================
+# NORMAL-PERIOD FILTER
+# =====================================================
+def _load_log_state_changes(event_log):
+    """State transitions from a legacy events.log CSV."""
+    try:
+        events = pd.read_csv(
+            event_log,
+            header=None,
+            names=["time", "event", "description"],
+            on_bad_lines="skip"
+        )
+    except Exception:
+        return np.array([]), np.array([], dtype=object)
+
+    events = events[events["event"].isin(STATE_EVENTS)]
+    events = events.sort_values("time")
+    return events["time"].to_numpy(dtype=float), events["event"].to_numpy()
+
+
+def load_state_changes(event_db, vehicle=None):
+    """(times, states) of the state transitions recorded in the event store."""
+    if not os.path.exists(event_db):
+        return np.array([]), np.array([], dtype=object)
+
+    if event_db.endswith(".log"):
+        return _load_log_state_changes(event_db)
+
+    store = EventStore(event_db, readonly=True)
+    try:
+        return store.state_changes(STATE_EVENTS, vehicle=vehicle)
+    finally:
+        store.close()
+
+
+def normal_mask(timestamps, event_db, vehicle=None):
+    """
+    True for timestamps that fall in a NORMAL period according to the event
+    store. Time before the first recorded transition counts as NORMAL.
+    """
+    times, states = load_state_changes(event_db, vehicle)
+    timestamps = np.asarray(timestamps, dtype=float)
+
+    if len(times) == 0:
+        return np.ones(len(timestamps), dtype=bool)
+
+    idx = np.searchsorted(times, timestamps, side="right") - 1
+    state_at = np.where(idx >= 0, states[np.maximum(idx, 0)], "NORMAL")
+    return state_at == "NORMAL"
+
+
+# =====================================================
+# BASELINE
+# =====================================================
+def load_baseline(path, n, event_db=None, since=None, binary=False, vehicle=None):
+    """
+    Baseline rows from recorded history in one read: the last `n` distinct
+    frames (or all frames since `since`), optionally restricted to periods
+    the event store marks NORMAL.
+    """
+    if binary:
+        read = read_binary_history
+    elif segment_directory(path) is not None:
+        read, path = read_segment_history, segment_directory(path)
+    else:
+        read = read_csv_history
+
+    # Over-read so duplicates and filtered-out rows still leave n behind
+    df = read(path, n=None if since is not None else n * 2, since=since)
+    df = df.drop_duplicates()
+
+    if event_db is not None and not df.empty:
+        df = df[normal_mask(df["timestamp"], event_db, vehicle)]
+
+    if since is None:
+        df = df.tail(n)
+    return df.reset_index(drop=True)
@@ -1,18 +1,18 @@
-import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import IsolationForest
-from sklearn.neural_network import MLPRegressor
 from sklearn.metrics import classification_report
 
-# Load data
-df = pd.read_csv("data/processed/features.csv")
-X = df.drop(columns=["label"])
-y = df["label"]
+from ml.fast_autoencoder import compile_autoencoder, fit_autoencoder
+from ml.feature_store import window_feature_set
 
-# Scale
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
+# Load data (feature store: built once per raw input, memory-mapped)
+features = window_feature_set()
+X = features.X
+y = features.labels
+
+# Scale (stored with the features)
+scaler = features.scaler()
+X_scaled = features.scaled
 
 # ---------- Isolation Forest ----------
 iso = IsolationForest(contamination=0.3, random_state=42)
@@ -20,18 +20,11 @@ iso.fit(X_scaled)
 iso_pred = np.where(iso.predict(X_scaled) == -1, 1, 0)
 
 # ---------- Autoencoder (MLP) ----------
-X_train = X_scaled[y == 0]
-autoencoder = MLPRegressor(
-    hidden_layer_sizes=(8, 4, 8),
-    max_iter=500,
-    random_state=42
-)
-autoencoder.fit(X_train, X_train)
-
-recon = autoencoder.predict(X_scaled)
-mse = np.mean((X_scaled - recon) ** 2, axis=1)
-threshold = np.percentile(mse[y == 0], 95)
-ae_pred = (mse > threshold).astype(int)
+autoencoder = fit_autoencoder(X_scaled[y == 0])
+
+# Reconstruction error via the exported float32 forward pass
+compiled = compile_autoencoder(autoencoder, scaler, X[y == 0], features.columns)
+ae_pred = compiled.predict(X)
 
 # ---------- Ensemble ----------
 ensemble_pred = np.logical_or(iso_pred, ae_pred).astype(int)
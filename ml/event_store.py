@@ -0,0 +1,195 @@
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+# =====================================================
+# EVENT STORE
+# =====================================================
+# SQLite in WAL mode: one writer per process at a time, readers (dashboard,
+# baseline filter) never block it and never see a half-written event.
+EVENT_DB = "ml/events.db"
+
+COLUMNS = ["time", "vehicle", "event", "severity", "description"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id          INTEGER PRIMARY KEY,
+    time        REAL NOT NULL,
+    vehicle     TEXT NOT NULL DEFAULT '',
+    event       TEXT NOT NULL,
+    severity    TEXT,
+    description TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS events_key ON events (time, vehicle, event);
+CREATE INDEX IF NOT EXISTS events_vehicle_time ON events (vehicle, time);
+CREATE INDEX IF NOT EXISTS events_event_time ON events (event, time);
+"""
+
+SEVERITY_PATTERN = re.compile(r"Severity:\s*(\w+)")
+
+
+class EventStore:
+    def __init__(self, path=EVENT_DB, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self._lock = threading.Lock()
+
+        if readonly:
+            self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+
+        # Wait for another process's write instead of failing
+        self._db.execute("PRAGMA busy_timeout=5000")
+
+    # -------------------------------------------------
+    # WRITES
+    # -------------------------------------------------
+    def append(self, event, description="", severity=None, vehicle="", timestamp=None):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR IGNORE INTO events (time, vehicle, event, severity, description) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (time.time() if timestamp is None else timestamp, vehicle, event, severity, description)
+            )
+
+    def append_many(self, rows):
+        """(time, vehicle, event, severity, description) rows in one transaction."""
+        with self._lock, self._db:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO events (time, vehicle, event, severity, description) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            return self._db.total_changes - before
+
+    # -------------------------------------------------
+    # QUERIES (all served by an index)
+    # -------------------------------------------------
+    def _where(self, vehicle=None, events=None, start=None, end=None):
+        clauses, params = [], []
+        if vehicle is not None:
+            clauses.append("vehicle = ?")
+            params.append(vehicle)
+        if events is not None:
+            events = list(events)
+            clauses.append(f"event IN ({','.join('?' * len(events))})")
+            params.extend(events)
+        if start is not None:
+            clauses.append("time >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("time < ?")
+            params.append(end)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _query(self, sql, params):
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return pd.DataFrame(rows, columns=COLUMNS)
+
+    def recent(self, n=15, vehicle=None, events=None):
+        """Last n events, oldest first."""
+        where, params = self._where(vehicle, events)
+        df = self._query(
+            f"SELECT {', '.join(COLUMNS)} FROM events{where} ORDER BY time DESC LIMIT ?",
+            params + [n]
+        )
+        return df.iloc[::-1].reset_index(drop=True)
+
+    def range(self, start=None, end=None, vehicle=None, events=None, limit=None):
+        """Events with start <= time < end, oldest first."""
+        where, params = self._where(vehicle, events, start, end)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM events{where} ORDER BY time"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._query(sql, params)
+
+    def state_changes(self, states, vehicle=None):
+        """(times, states) of the given state events, in time order."""
+        df = self.range(vehicle=vehicle, events=states)
+        return df["time"].to_numpy(dtype=float), df["event"].to_numpy(dtype=object)
+
+    def count(self, vehicle=None, events=None):
+        where, params = self._where(vehicle, events)
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM events{where}", params).fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+
+# =====================================================
+# IMPORT FROM events.log
+# =====================================================
+def parse_event_log(path):
+    """Rows of a legacy events.log: time,event,description (description may hold commas)."""
+    with open(path) as f:
+        for line in f:
+            parts = line.rstrip("\n").split(",", 2)
+            if len(parts) < 2:
+                continue
+            try:
+                timestamp = float(parts[0])
+            except ValueError:
+                continue
+
+            description = parts[2] if len(parts) > 2 else ""
+            severity = SEVERITY_PATTERN.search(description)
+            yield timestamp, parts[1], severity.group(1) if severity else None, description
+
+
+def import_event_log(path, store, vehicle="", batch_size=10000):
+    """Copy an events.log into the store. Re-importing the same file adds nothing."""
+    imported = 0
+    batch = []
+    for timestamp, event, severity, description in parse_event_log(path):
+        batch.append((timestamp, vehicle, event, severity, description))
+        if len(batch) >= batch_size:
+            imported += store.append_many(batch)
+            batch = []
+    if batch:
+        imported += store.append_many(batch)
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPS security event store")
+    parser.add_argument("--db", default=EVENT_DB)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    imp = sub.add_parser("import", help="import legacy events.log files")
+    imp.add_argument("logs", nargs="+")
+    imp.add_argument("--vehicle", default="")
+
+    tail = sub.add_parser("tail", help="show the most recent events")
+    tail.add_argument("-n", type=int, default=15)
+    tail.add_argument("--vehicle")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        store = EventStore(args.db)
+        for path in args.logs:
+            print(f"[EVENTS] {path}: {import_event_log(path, store, args.vehicle)} new events")
+        print(f"[EVENTS] {store.count()} events in {args.db}")
+    else:
+        store = EventStore(args.db, readonly=True)
+        events = store.recent(args.n, vehicle=args.vehicle)
+        events["time"] = pd.to_datetime(events["time"], unit="s")
+        print(events.to_string(index=False))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import json
+import os
+
+import numpy as np
+
+from ml.model_artifact import ARTIFACT_VERSION, MODEL_DIR
+
+AUTOENCODER_FILE = os.path.join(MODEL_DIR, "autoencoder.npz")
+
+HIDDEN_LAYERS = (8, 4, 8)
+THRESHOLD_PERCENTILE = 95
+
+
+# =====================================================
+# TRAINING / EXPORT (needs sklearn only here)
+# =====================================================
+def fit_autoencoder(X_scaled):
+    """MLP autoencoder as in ml/autoencoder_sklearn.py, trained on normal rows."""
+    from sklearn.neural_network import MLPRegressor
+
+    autoencoder = MLPRegressor(
+        hidden_layer_sizes=HIDDEN_LAYERS,
+        activation="relu",
+        max_iter=500,
+        random_state=42
+    )
+    autoencoder.fit(X_scaled, X_scaled)
+    return autoencoder
+
+
+def export_autoencoder(model):
+    """Weight matrices and biases of a fitted MLPRegressor, as float32."""
+    if model.activation != "relu" or model.out_activation_ != "identity":
+        raise ValueError(f"Unsupported activations: {model.activation} / {model.out_activation_}")
+
+    arrays = {}
+    for i, (W, b) in enumerate(zip(model.coefs_, model.intercepts_)):
+        arrays[f"W{i}"] = np.ascontiguousarray(W, dtype=np.float32)
+        arrays[f"b{i}"] = np.ascontiguousarray(b, dtype=np.float32)
+    return arrays
+
+
+# =====================================================
+# SCORER (NumPy only)
+# =====================================================
+class CompiledAutoencoder:
+    """
+    Batched float32 forward pass of the exported autoencoder. Inputs are raw
+    feature rows; scaling, reconstruction and MSE happen here.
+    decision_function follows the IsolationForest convention: negative
+    means anomalous (error above the stored threshold).
+    """
+
+    def __init__(self, arrays, mean, scale, threshold, features, metadata=None):
+        n_layers = len([key for key in arrays if key.startswith("W")])
+        self.weights = [np.asarray(arrays[f"W{i}"], dtype=np.float32) for i in range(n_layers)]
+        self.biases = [np.asarray(arrays[f"b{i}"], dtype=np.float32) for i in range(n_layers)]
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+        self.threshold = float(threshold)
+        self.features = list(features)
+        self.metadata = metadata or {}
+
+    def scale_rows(self, X):
+        return (np.asarray(X, dtype=np.float32) - self.mean) / self.scale
+
+    def reconstruct(self, X_scaled):
+        h = np.asarray(X_scaled, dtype=np.float32)
+        last = len(self.weights) - 1
+        for i, (W, b) in enumerate(zip(self.weights, self.biases)):
+            h = h @ W
+            h += b
+            if i < last:
+                np.maximum(h, 0, out=h)
+        return h
+
+    def scaled_error(self, X_scaled):
+        """Reconstruction MSE of rows that are already scaled."""
+        X_scaled = np.asarray(X_scaled, dtype=np.float32)
+        diff = self.reconstruct(X_scaled)
+        diff -= X_scaled
+        return np.einsum("ij,ij->i", diff, diff) / diff.shape[1]
+
+    def reconstruction_error(self, X):
+        return self.scaled_error(self.scale_rows(X))
+
+    def decision_function(self, X):
+        return self.threshold - self.reconstruction_error(X)
+
+    def predict(self, X):
+        """1 for anomalous rows, 0 otherwise."""
+        return (self.reconstruction_error(X) > self.threshold).astype(int)
+
+
+def compile_autoencoder(model, scaler, X_normal, features, metadata=None):
+    """
+    Fitted MLPRegressor + StandardScaler -> CompiledAutoencoder, with the
+    threshold set at THRESHOLD_PERCENTILE of the normal rows' error.
+    """
+    autoencoder = CompiledAutoencoder(
+        export_autoencoder(model), scaler.mean_, scaler.scale_, 0.0, features, metadata
+    )
+    errors = autoencoder.reconstruction_error(X_normal)
+    autoencoder.threshold = float(np.percentile(errors, THRESHOLD_PERCENTILE))
+    return autoencoder
+
+
+# =====================================================
+# PERSISTENCE
+# =====================================================
+def save_autoencoder(autoencoder, path=AUTOENCODER_FILE):
+    header = {
+        "version": ARTIFACT_VERSION,
+        "features": autoencoder.features,
+        "threshold": autoencoder.threshold,
+        "metadata": autoencoder.metadata,
+    }
+    arrays = {}
+    for i, (W, b) in enumerate(zip(autoencoder.weights, autoencoder.biases)):
+        arrays[f"W{i}"] = W
+        arrays[f"b{i}"] = b
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        header=np.array(json.dumps(header)),
+        scaler_mean=autoencoder.mean,
+        scaler_scale=autoencoder.scale,
+        **arrays
+    )
+    os.replace(tmp_path, path)
+
+
+def load_autoencoder(path=AUTOENCODER_FILE, features=None):
+    """CompiledAutoencoder from disk, or None if missing or incompatible."""
+    if not os.path.exists(path):
+        print(f"[ML] No autoencoder at {path}")
+        return None
+
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+        header = json.loads(str(arrays.pop("header")))
+    except Exception as e:
+        print(f"[ML] Autoencoder unreadable: {e}")
+        return None
+
+    if header.get("version") != ARTIFACT_VERSION:
+        print(f"[ML] Autoencoder version mismatch (expected {ARTIFACT_VERSION})")
+        return None
+
+    if features is not None and header["features"] != list(features):
+        print(f"[ML] Autoencoder features {header['features']} != {list(features)}")
+        return None
+
+    return CompiledAutoencoder(
+        arrays,
+        arrays["scaler_mean"],
+        arrays["scaler_scale"],
+        header["threshold"],
+        header["features"],
+        header["metadata"]
+    )
@@ -0,0 +1,233 @@
+import json
+import os
+
+import numpy as np
+
+from ml.model_artifact import ARTIFACT_VERSION, MODEL_DIR
+
+COMPILED_FILE = os.path.join(MODEL_DIR, "detector_forest.npz")
+
+
+# =====================================================
+# EXPORT (needs sklearn only here)
+# =====================================================
+def _average_path_length(n):
+    """Expected path length of an unsuccessful BST search over n samples."""
+    n = np.asarray(n, dtype=np.float64)
+    out = np.zeros_like(n)
+    out[n == 2] = 1.0
+    big = n > 2
+    out[big] = 2.0 * (np.log(n[big] - 1.0) + np.euler_gamma) - 2.0 * (n[big] - 1.0) / n[big]
+    return out
+
+
+def _node_depths(left, right):
+    depth = np.zeros(len(left), dtype=np.float64)
+    # sklearn numbers children after their parent, so one forward pass works
+    for node in range(len(left)):
+        if left[node] >= 0:
+            depth[left[node]] = depth[node] + 1
+            depth[right[node]] = depth[node] + 1
+    return depth
+
+
+def export_forest(model, columns=None):
+    """
+    Flatten a fitted IsolationForest into contiguous node arrays.
+
+    Leaves point to themselves with an +inf threshold, so every sample can
+    take exactly `max_depth` steps without branching on leaf checks. Leaf
+    `value` is the finished path length contribution of that leaf.
+    A forest fitted on `columns` of the rows indexes those columns directly.
+    """
+    columns = np.arange(model.n_features_in_) if columns is None else np.asarray(columns)
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+
+    for est, est_features in zip(model.estimators_, model.estimators_features_):
+        tree = est.tree_
+        left = tree.children_left
+        right = tree.children_right
+        is_leaf = left < 0
+        idx = np.arange(tree.node_count)
+
+        depth = _node_depths(left, right)
+        max_depth = max(max_depth, int(depth.max()))
+
+        features.append(np.where(is_leaf, 0, columns[np.asarray(est_features)[np.maximum(tree.feature, 0)]]))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        lefts.append(np.where(is_leaf, idx, left) + offset)
+        rights.append(np.where(is_leaf, idx, right) + offset)
+        values.append(np.where(is_leaf, depth + _average_path_length(tree.n_node_samples), 0.0))
+        roots.append(offset)
+
+        offset += tree.node_count
+
+    return {
+        "feature": np.concatenate(features).astype(np.int32),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "left": np.concatenate(lefts).astype(np.int32),
+        "right": np.concatenate(rights).astype(np.int32),
+        "value": np.concatenate(values),
+        "roots": np.asarray(roots, dtype=np.int32),
+        "max_depth": np.int32(max_depth),
+        "path_norm": np.float64(_average_path_length([model.max_samples_])[0]),
+        "offset": np.float64(model.offset_),
+        "n_features": np.int32(model.n_features_in_),
+    }
+
+
+# =====================================================
+# SCORER (NumPy only)
+# =====================================================
+class CompiledForest:
+    """IsolationForest.decision_function over exported node arrays."""
+
+    def __init__(self, arrays):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        # Interleaved children: child[2 * node + went_right]
+        self.child = np.stack([self.left, self.right], axis=1).ravel()
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.max_depth = int(arrays["max_depth"])
+        self.path_norm = float(arrays["path_norm"])
+        self.offset = float(arrays["offset"])
+        self.n_features = int(arrays["n_features"])
+
+    def _leaves(self, X):
+        n = X.shape[0]
+        nodes = np.broadcast_to(self.roots, (n, len(self.roots))).copy()
+        flat = X.ravel()
+        row_start = (np.arange(n) * X.shape[1])[:, None]
+
+        for _ in range(self.max_depth):
+            values = flat.take(row_start + self.feature.take(nodes))
+            went_right = values > self.threshold.take(nodes)
+            nodes = self.child.take(2 * nodes + went_right)
+
+        return nodes
+
+    def score_samples(self, X):
+        # sklearn compares float32 inputs against float64 split thresholds
+        X = np.ascontiguousarray(np.asarray(X, dtype=np.float32), dtype=np.float64)
+
+        depths = self.value[self._leaves(X)].sum(axis=1)
+        denominator = len(self.roots) * self.path_norm
+        if denominator == 0:
+            return -np.ones(X.shape[0])
+        return -(2.0 ** (-depths / denominator))
+
+    def decision_function(self, X):
+        return self.score_samples(X) - self.offset
+
+
+class CompiledForestGroup:
+    """model_artifact.GroupedForest over CompiledForests: lowest decision value wins."""
+
+    def __init__(self, forests):
+        self.forests = list(forests)
+
+    def decision_function(self, X):
+        return np.min([forest.decision_function(X) for forest in self.forests], axis=0)
+
+
+def export_groups(model):
+    """Node arrays of every forest of a GroupedForest, indexing the full rows."""
+    return [export_forest(forest, group) for forest, group in zip(model.forests, model.groups)]
+
+
+class CompiledDetector:
+    """Drop-in for model_artifact.Detector that never imports sklearn."""
+
+    def __init__(self, forest, mean, scale, thresholds, features, metadata=None):
+        self.forest = forest
+        self.mean = mean
+        self.scale = scale
+        self.thresholds = thresholds
+        self.features = list(features)
+        self.metadata = metadata or {}
+
+    def decision_function(self, X):
+        return self.forest.decision_function((np.asarray(X, dtype=np.float64) - self.mean) / self.scale)
+
+
+def compile_detector(detector):
+    """Detector (sklearn scaler + forest) -> CompiledDetector."""
+    return CompiledDetector(
+        CompiledForestGroup(CompiledForest(arrays) for arrays in export_groups(detector.model)),
+        detector.scaler.mean_,
+        detector.scaler.scale_,
+        detector.thresholds,
+        detector.features,
+        detector.metadata
+    )
+
+
+# =====================================================
+# PERSISTENCE
+# =====================================================
+def save_compiled(detector, path=COMPILED_FILE):
+    """Write a Detector in compiled form (plain .npz, no pickles)."""
+    groups = export_groups(detector.model)
+    arrays = {f"g{i}_{name}": value for i, group in enumerate(groups) for name, value in group.items()}
+    header = {
+        "version": ARTIFACT_VERSION,
+        "groups": len(groups),
+        "features": detector.features,
+        "thresholds": detector.thresholds,
+        "metadata": detector.metadata,
+    }
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        header=np.array(json.dumps(header)),
+        scaler_mean=detector.scaler.mean_,
+        scaler_scale=detector.scaler.scale_,
+        **arrays
+    )
+    os.replace(tmp_path, path)
+
+
+def load_compiled(path=COMPILED_FILE, features=None):
+    """CompiledDetector from disk, or None if missing or incompatible."""
+    if not os.path.exists(path):
+        print(f"[ML] No compiled detector at {path}")
+        return None
+
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+        header = json.loads(str(arrays.pop("header")))
+    except Exception as e:
+        print(f"[ML] Compiled detector unreadable: {e}")
+        return None
+
+    if header.get("version") != ARTIFACT_VERSION:
+        print(f"[ML] Compiled detector version mismatch (expected {ARTIFACT_VERSION})")
+        return None
+
+    if features is not None and header["features"] != list(features):
+        print(f"[ML] Compiled detector features {header['features']} != {list(features)}")
+        return None
+
+    forests = []
+    for i in range(header["groups"]):
+        prefix = f"g{i}_"
+        forests.append(CompiledForest({
+            name[len(prefix):]: value for name, value in arrays.items() if name.startswith(prefix)
+        }))
+
+    return CompiledDetector(
+        CompiledForestGroup(forests),
+        arrays["scaler_mean"],
+        arrays["scaler_scale"],
+        header["thresholds"],
+        header["features"],
+        header["metadata"]
+    )
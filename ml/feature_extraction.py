@@ -1,10 +1,88 @@
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 WINDOW_SIZE = 10  # number of CAN messages per window
-
-
-def load_and_prepare(csv_file, label):
+STRIDE = WINDOW_SIZE  # step between window starts (< WINDOW_SIZE overlaps)
+
+# Recordings and their labels
+RAW_INPUTS = [
+    ("data/raw/normal.csv", 0),
+    ("data/raw/attack.csv", 1),
+]
+FEATURES_CSV = "data/processed/features.csv"
+
+FEATURE_COLUMNS = [
+    "mean_speed",
+    "std_speed",
+    "max_speed",
+    "brake_rate",
+    "steering_variance",
+    "mean_inter_arrival",
+    "std_inter_arrival",
+]
+
+
+def _window_starts(n, window_size, stride):
+    # Same windows as range(0, n - window_size, stride)
+    return np.arange(0, max(n - window_size, 0), stride)
+
+
+def _window_mean_var(values, starts, window_size):
+    """
+    Mean and sample variance (ddof=1) of every window via cumulative sums.
+    O(n) regardless of how much the windows overlap.
+    """
+    # Centre first so the sum-of-squares form does not lose precision
+    centred = values - values.mean()
+    csum = np.concatenate(([0.0], np.cumsum(centred)))
+    csq = np.concatenate(([0.0], np.cumsum(centred * centred)))
+
+    total = csum[starts + window_size] - csum[starts]
+    total_sq = csq[starts + window_size] - csq[starts]
+
+    mean = total / window_size
+    var = (total_sq - total * mean) / (window_size - 1)
+    return mean + values.mean(), np.maximum(var, 0.0)
+
+
+def window_features(df, window_size=WINDOW_SIZE, stride=STRIDE):
+    """
+    Window statistics for a frame-level DataFrame with speed, brake,
+    steering and inter_arrival columns. One row per window.
+    """
+    n = len(df)
+    starts = _window_starts(n, window_size, stride)
+
+    if len(starts) == 0:
+        return pd.DataFrame(columns=FEATURE_COLUMNS)
+
+    speed = df["speed"].to_numpy(dtype=float)
+    brake = df["brake"].to_numpy(dtype=float)
+    steering = df["steering"].to_numpy(dtype=float)
+    inter_arrival = df["inter_arrival"].to_numpy(dtype=float)
+
+    mean_speed, var_speed = _window_mean_var(speed, starts, window_size)
+    brake_rate, _ = _window_mean_var(brake, starts, window_size)
+    _, steering_variance = _window_mean_var(steering, starts, window_size)
+    mean_ia, var_ia = _window_mean_var(inter_arrival, starts, window_size)
+
+    # Strided view over the same window starts, no copy of the windows
+    windows = sliding_window_view(speed, window_size)[:n - window_size:stride]
+    max_speed = windows.max(axis=1)
+
+    return pd.DataFrame({
+        "mean_speed": mean_speed,
+        "std_speed": np.sqrt(var_speed),
+        "max_speed": max_speed,
+        "brake_rate": brake_rate,
+        "steering_variance": steering_variance,
+        "mean_inter_arrival": mean_ia,
+        "std_inter_arrival": np.sqrt(var_ia),
+    })
+
+
+def load_and_prepare(csv_file, label, window_size=WINDOW_SIZE, stride=STRIDE):
     df = pd.read_csv(csv_file)
 
     # Convert timestamp to datetime
@@ -12,38 +90,25 @@ def load_and_prepare(csv_file, label):
 
     # Compute inter-arrival time (in seconds)
     df["inter_arrival"] = df["timestamp"].diff().dt.total_seconds()
-    df["inter_arrival"].fillna(0, inplace=True)
-
-    features = []
-
-    for i in range(0, len(df) - WINDOW_SIZE, WINDOW_SIZE):
-        window = df.iloc[i:i + WINDOW_SIZE]
+    df["inter_arrival"] = df["inter_arrival"].fillna(0)
 
-        feature_row = {
-            "mean_speed": window["speed"].mean(),
-            "std_speed": window["speed"].std(),
-            "max_speed": window["speed"].max(),
-            "brake_rate": window["brake"].mean(),
-            "steering_variance": window["steering"].var(),
-            "mean_inter_arrival": window["inter_arrival"].mean(),
-            "std_inter_arrival": window["inter_arrival"].std(),
-            "label": label
-        }
+    features = window_features(df, window_size, stride)
+    features["label"] = label
 
-        features.append(feature_row)
-
-    return pd.DataFrame(features)
+    return features
 
 
 if __name__ == "__main__":
-    print("[PHASE 4] Feature extraction started")
+    # Features live in the store (ml/feature_store.py), keyed by the raw
+    # files' contents; they are only rebuilt when those change
+    from ml.feature_store import window_feature_set
 
-    normal_df = load_and_prepare("data/raw/normal.csv", label=0)
-    attack_df = load_and_prepare("data/raw/attack.csv", label=1)
+    print("[PHASE 4] Feature extraction started")
 
-    dataset = pd.concat([normal_df, attack_df], ignore_index=True)
+    dataset = window_feature_set(RAW_INPUTS).frame()
 
-    dataset.to_csv("data/processed/features.csv", index=False)
+    # CSV copy for tools outside ml/
+    dataset.to_csv(FEATURES_CSV, index=False)
 
     print("[PHASE 4] Feature extraction completed")
     print(f"Total samples: {len(dataset)}")
@@ -0,0 +1,255 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from ml.feature_extraction import FEATURE_COLUMNS, RAW_INPUTS, STRIDE, WINDOW_SIZE, load_and_prepare
+from ml.train_model import load_training_data
+
+# =====================================================
+# PARAMETERS
+# =====================================================
+FEATURE_STORE_DIR = "data/processed/feature_store"
+
+# Bump when a builder's output changes for the same inputs and parameters;
+# entries written by older code are then simply never looked up again
+FEATURE_STORE_VERSION = 1
+
+INPUT_INDEX = "inputs.json"     # (size, mtime) -> content hash, so unchanged files are not re-read
+HASH_BLOCK = 1024 * 1024
+
+
+# =====================================================
+# KEYS
+# =====================================================
+def _input_files(path):
+    """A file, or every file under a directory (segmented stores), sorted."""
+    if not os.path.isdir(path):
+        return [path]
+    return sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+class InputHashes:
+    """Content hashes of input files, remembered by (size, mtime) in the store."""
+
+    def __init__(self, store):
+        self.path = os.path.join(store, INPUT_INDEX)
+        try:
+            with open(self.path) as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+        self.changed = False
+
+    def digest(self, path):
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        known = self.index.get(key)
+        if known is not None and known[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return known[2]
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b""):
+                h.update(block)
+
+        self.index[key] = [stat.st_size, stat.st_mtime_ns, h.hexdigest()]
+        self.changed = True
+        return h.hexdigest()
+
+    def save(self):
+        if not self.changed:
+            return
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.path)
+
+
+def feature_key(kind, inputs, params, store=FEATURE_STORE_DIR):
+    """
+    Hash of the input files' contents and the extraction parameters. Inputs
+    are (path, label) pairs or plain paths; missing files raise.
+    """
+    os.makedirs(store, exist_ok=True)
+    hashes = InputHashes(store)
+
+    h = hashlib.sha256()
+    h.update(json.dumps([kind, FEATURE_STORE_VERSION, params], sort_keys=True).encode())
+    for item in inputs:
+        path, label = item if isinstance(item, (tuple, list)) else (item, None)
+        h.update(json.dumps(label).encode())
+        for name in _input_files(path):
+            h.update(hashes.digest(name).encode())
+
+    hashes.save()
+    return f"{kind}-{h.hexdigest()[:24]}"
+
+
+# =====================================================
+# ENTRIES
+# =====================================================
+class FeatureSet:
+    """
+    One stored entry. Arrays are memory-mapped on first access, so a script
+    only touches what it uses.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.columns = self.meta["columns"]
+        self._arrays = {}
+
+    def array(self, name):
+        if name not in self._arrays:
+            self._arrays[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+        return self._arrays[name]
+
+    @property
+    def X(self):
+        return self.array("X")
+
+    @property
+    def labels(self):
+        return self.array("labels")
+
+    @property
+    def scaled(self):
+        """X scaled with the stored scaler."""
+        return self.array("scaled")
+
+    def scaler(self):
+        """StandardScaler rebuilt from the stored statistics (no refit)."""
+        stats = np.load(os.path.join(self.path, "scaler.npz"))
+        scaler = StandardScaler()
+        scaler.mean_ = stats["mean"]
+        scaler.var_ = stats["var"]
+        scaler.scale_ = stats["scale"]
+        scaler.n_samples_seen_ = int(stats["n_samples_seen"])
+        scaler.n_features_in_ = len(scaler.mean_)
+        return scaler
+
+    def frame(self):
+        """Features as a DataFrame (a copy), labels in a "label" column when stored."""
+        df = pd.DataFrame(np.asarray(self.X), columns=self.columns)
+        if os.path.exists(os.path.join(self.path, "labels.npy")):
+            df["label"] = np.asarray(self.labels)
+        return df
+
+
+def _write_entry(path, X, columns, labels=None, meta=None, scale=True):
+    """Write an entry into a scratch directory, then rename it into place."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    np.save(os.path.join(tmp_path, "X.npy"), X)
+    if labels is not None:
+        np.save(os.path.join(tmp_path, "labels.npy"), np.asarray(labels))
+
+    if scale:
+        scaler = StandardScaler().fit(X)
+        np.save(os.path.join(tmp_path, "scaled.npy"), scaler.transform(X))
+        np.savez(
+            os.path.join(tmp_path, "scaler.npz"),
+            mean=scaler.mean_, var=scaler.var_, scale=scaler.scale_,
+            n_samples_seen=scaler.n_samples_seen_,
+        )
+
+    meta = dict(meta or {}, columns=list(columns), rows=len(X), created=time.time())
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # Built concurrently by another process; keep theirs
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def cached(kind, inputs, params, build, store=FEATURE_STORE_DIR, scale=True):
+    """
+    FeatureSet for (inputs, params), calling build() -> (X, columns, labels)
+    only when no entry with that key exists yet.
+    """
+    key = feature_key(kind, inputs, params, store)
+    path = os.path.join(store, key)
+
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        X, columns, labels = build()
+        meta = {"kind": kind, "inputs": [list(i) if isinstance(i, tuple) else i for i in inputs], "params": params}
+        _write_entry(path, X, columns, labels, meta, scale)
+        print(f"[FEATURES] Built {key} ({len(X)} rows) in {time.perf_counter() - start:.2f}s")
+
+    return FeatureSet(path)
+
+
+# =====================================================
+# FEATURE SETS
+# =====================================================
+def window_feature_set(inputs=RAW_INPUTS, window_size=WINDOW_SIZE, stride=STRIDE, store=FEATURE_STORE_DIR):
+    """Labeled window features of (csv, label) recordings (ml/feature_extraction.py)."""
+    def build():
+        dataset = pd.concat(
+            [load_and_prepare(path, label, window_size, stride) for path, label in inputs],
+            ignore_index=True
+        )
+        return dataset[FEATURE_COLUMNS].values, FEATURE_COLUMNS, dataset["label"].to_numpy()
+
+    params = {"window_size": window_size, "stride": stride, "columns": FEATURE_COLUMNS}
+    return cached("windows", [tuple(i) for i in inputs], params, build, store)
+
+
+def stream_feature_set(path, store=FEATURE_STORE_DIR):
+    """
+    Frame-level signals plus per-id timing features of one recording
+    (ml/train_model.py load_training_data), unscaled.
+    """
+    def build():
+        df = load_training_data([path])
+        return df.values, list(df.columns), None
+
+    return cached("stream", [path], {}, build, store, scale=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the feature store")
+    parser.add_argument("command", choices=["ls", "clear"])
+    parser.add_argument("--store", default=FEATURE_STORE_DIR)
+    args = parser.parse_args()
+
+    entries = sorted(
+        name for name in os.listdir(args.store)
+        if os.path.isdir(os.path.join(args.store, name)) and not name.endswith(".tmp")
+    ) if os.path.isdir(args.store) else []
+
+    if args.command == "clear":
+        for name in entries:
+            shutil.rmtree(os.path.join(args.store, name))
+        print(f"[FEATURES] Removed {len(entries)} entries")
+        return
+
+    for name in entries:
+        entry = FeatureSet(os.path.join(args.store, name))
+        size = sum(
+            os.path.getsize(os.path.join(entry.path, f)) for f in os.listdir(entry.path)
+        )
+        print(f"{name}  {entry.meta['rows']:>9} rows  {size / 1e6:8.2f} MB  {entry.meta.get('params')}")
+
+
+if __name__ == "__main__":
+    main()
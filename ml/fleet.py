@@ -0,0 +1,184 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+
+from cps.metrics import start_metrics
+from ml.fast_autoencoder import AUTOENCODER_FILE
+from ml.fast_forest import COMPILED_FILE
+from ml.live_detection import CHECK_INTERVAL, LiveDetector
+from ml.model_artifact import ARTIFACT_FILE
+from ml.status_block import StatusReader
+
+# =====================================================
+# FLEET LAYOUT
+# =====================================================
+# data/fleet/<vehicle_id>/can_stream.csv (or .bin)   telemetry per vehicle
+# ml/fleet/<vehicle_id>/status.bin                   detector status block
+# ml/fleet/events.db                                 shared event store (vehicle column)
+# ml/fleet/<vehicle_id>/models/                      optional per-vehicle model
+FLEET_DATA_DIR = "data/fleet"
+FLEET_STATE_DIR = "ml/fleet"
+FLEET_STATUS_FILE = os.path.join(FLEET_STATE_DIR, "fleet_status.json")
+
+REPORT_INTERVAL = 2
+
+
+def vehicle_spec(vehicle_id, data_dir=FLEET_DATA_DIR, state_dir=FLEET_STATE_DIR):
+    """LiveDetector arguments for one vehicle."""
+    stream_dir = os.path.join(data_dir, vehicle_id)
+    out_dir = os.path.join(state_dir, vehicle_id)
+    model_dir = os.path.join(out_dir, "models")
+
+    binary_file = os.path.join(stream_dir, "can_stream.bin")
+    artifact_file = os.path.join(model_dir, os.path.basename(ARTIFACT_FILE))
+    compiled_file = os.path.join(model_dir, os.path.basename(COMPILED_FILE))
+    autoencoder_file = os.path.join(model_dir, os.path.basename(AUTOENCODER_FILE))
+
+    # Without a model of its own a vehicle starts from the shared one; its
+    # refits still go to model_dir, never over the shared files
+    if not os.path.exists(artifact_file) and not os.path.exists(compiled_file):
+        artifact_file, compiled_file = ARTIFACT_FILE, COMPILED_FILE
+        autoencoder_file = AUTOENCODER_FILE
+
+    return {
+        "name": vehicle_id,
+        "data_file": os.path.join(stream_dir, "can_stream.csv"),
+        "binary_file": binary_file,
+        "log_format": "binary" if os.path.exists(binary_file) else "csv",
+        "event_db": os.path.join(state_dir, "events.db"),
+        "status_file": os.path.join(out_dir, "status.bin"),
+        "artifact_file": artifact_file,
+        "compiled_file": compiled_file,
+        "autoencoder_file": autoencoder_file,
+        "model_dir": model_dir,
+        # One dashboard feed port per host; fleet vehicles report via status blocks
+        "feed_port": None,
+    }
+
+
+def discover_vehicles(data_dir=FLEET_DATA_DIR):
+    if not os.path.isdir(data_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(data_dir)
+        if os.path.isdir(os.path.join(data_dir, name))
+    )
+
+
+def shard(items, n_shards):
+    """Round-robin assignment of vehicles to workers."""
+    return [items[i::n_shards] for i in range(n_shards) if items[i::n_shards]]
+
+
+# =====================================================
+# WORKER
+# =====================================================
+def run_shard(specs, stop):
+    """Worker process: runs the detectors of its vehicles in one loop."""
+    # One metrics file per worker, summed over its vehicles
+    metrics = start_metrics(mp.current_process().name)
+    engines = [LiveDetector(verbose=False, **spec) for spec in specs]
+    for engine in engines:
+        engine.start()
+
+    try:
+        while not stop.is_set():
+            started = time.monotonic()
+            for engine in engines:
+                engine.tick()
+
+            interval = min(engine.poll_interval for engine in engines)
+            stop.wait(max(0.0, interval - (time.monotonic() - started)))
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        for engine in engines:
+            engine.stop()
+        metrics.stop()
+
+
+# =====================================================
+# AGGREGATION
+# =====================================================
+def collect_status(readers):
+    now = time.time()
+    fleet = {}
+    for vehicle_id, reader in readers.items():
+        status = reader.read()
+        if status is None:
+            fleet[vehicle_id] = {"state": "UNKNOWN", "active": False}
+            continue
+        fleet[vehicle_id] = dict(status, active=(now - status["heartbeat"]) < 5)
+    return fleet
+
+
+def write_fleet_status(fleet, path=FLEET_STATUS_FILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"updated": time.time(), "vehicles": fleet}, f)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run live detection for a fleet of vehicles")
+    parser.add_argument("--data-dir", default=FLEET_DATA_DIR)
+    parser.add_argument("--state-dir", default=FLEET_STATE_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    vehicles = discover_vehicles(args.data_dir)
+    if not vehicles:
+        print(f"[FLEET] No vehicle streams under {args.data_dir}/<vehicle_id>/")
+        return
+
+    specs = [vehicle_spec(v, args.data_dir, args.state_dir) for v in vehicles]
+    shards = shard(specs, max(1, min(args.workers, len(specs))))
+
+    print(f"[FLEET] {len(vehicles)} vehicle(s) across {len(shards)} worker process(es)")
+
+    stop = mp.Event()
+    workers = [
+        mp.Process(target=run_shard, args=(shard_specs, stop), name=f"fleet-worker-{i}")
+        for i, shard_specs in enumerate(shards)
+    ]
+    for worker in workers:
+        worker.start()
+
+    readers = {spec["name"]: StatusReader(spec["status_file"]) for spec in specs}
+    status_path = os.path.join(args.state_dir, os.path.basename(FLEET_STATUS_FILE))
+    last_frames = {}
+
+    try:
+        while any(worker.is_alive() for worker in workers):
+            time.sleep(REPORT_INTERVAL)
+
+            fleet = collect_status(readers)
+            write_fleet_status(fleet, status_path)
+
+            frames = sum(v.get("frames", 0) for v in fleet.values())
+            rate = (frames - sum(last_frames.values())) / REPORT_INTERVAL if last_frames else 0.0
+            last_frames = {k: v.get("frames", 0) for k, v in fleet.items()}
+
+            attacks = [k for k, v in fleet.items() if v["state"] == "ATTACK"]
+            active = sum(v["active"] for v in fleet.values())
+            print(
+                f"[FLEET] Active: {active}/{len(fleet)} | Frames/s: {rate:.0f} | "
+                f"Under attack: {', '.join(attacks) if attacks else 'none'}"
+            )
+
+    except KeyboardInterrupt:
+        print("\n[FLEET] Stopping workers")
+
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join(timeout=CHECK_INTERVAL * 5)
+
+
+if __name__ == "__main__":
+    main()
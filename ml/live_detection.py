@@ -1,177 +1,638 @@
 import os
 import time
+
+import numpy as np
 import pandas as pd
-from sklearn.ensemble import IsolationForest
+
+from config.stream_config import LOG_FORMAT, CSV_STREAM_FILE, BINARY_STREAM_FILE
+from cps.metrics import FRAMES_DROPPED, FRAMES_IN, FRAMES_SCORED, REGISTRY, start_metrics
+from ml.baseline import load_baseline
+from ml.event_store import EVENT_DB, EventStore
+from ml.fast_autoencoder import AUTOENCODER_FILE, load_autoencoder
+from ml.fast_forest import COMPILED_FILE, compile_detector, load_compiled
+from ml.live_feed import FEED_PORT, LiveFeed
+from ml.model_artifact import ARTIFACT_FILE, load_artifact
+from ml.retraining import Retrainer, calibrate_threshold
+from ml.rollups import Rollups
+from ml.status_block import StatusWriter, STATUS_FILE
+from ml.stream_features import StreamFeatures, TIMING_FEATURES
+from ml.stream_reader import BinaryTailer, CSVTailer, STREAM_COLUMNS
 
 # =====================================================
 # PATHS
 # =====================================================
-DATA_FILE = "data/live/can_stream.csv"
-STATE_FILE = "ml/state.txt"
-SCORE_FILE = "ml/anomaly_score.txt"
-SEVERITY_FILE = "ml/severity.txt"
-EVENT_LOG = "ml/events.log"
-HEARTBEAT_FILE = "ml/heartbeat.txt"
+DATA_FILE = CSV_STREAM_FILE
 
 # =====================================================
 # PARAMETERS (TUNED FOR STRONGER DETECTION)
 # =====================================================
 BASELINE_SAMPLES = 200
-CHECK_INTERVAL = 1
+CHECK_INTERVAL = 0.2    # batch scoring keeps short ticks cheap; bounds alert latency
+
+# Baseline bootstrap from recorded history
+BASELINE_NORMAL_ONLY = True     # skip frames logged during ATTACK/RECOVERY
+BASELINE_SECONDS = None         # e.g. 600 to use the last 10 minutes instead of the last N frames
 
+# Decoded signals plus per-id timing features (see ml/stream_features.py),
+# so delay and flooding attacks with plausible values are still visible
+SIGNAL_FEATURES = ["speed", "brake", "steering"]
+FEATURES = SIGNAL_FEATURES + TIMING_FEATURES
+
+# Each group gets its own forest (ml/model_artifact.py GroupedForest): in
+# one forest over all nine columns the timing features took most splits
+# and extreme signal values (attacks/attack_spoofing.py) scored as normal
+FEATURE_GROUPS = [SIGNAL_FEATURES, TIMING_FEATURES]
+FEATURE_GROUP_COLUMNS = [[FEATURES.index(name) for name in group] for group in FEATURE_GROUPS]
+
+N_ESTIMATORS = 100
 CONTAMINATION = 0.1
 ANOMALY_THRESHOLD = -0.05
-PERSISTENCE_LIMIT = 3
 WARMUP_SECONDS = 5
 
-# =====================================================
-# INIT FILES
-# =====================================================
-os.makedirs("ml", exist_ok=True)
+# Existing history the tailer looks at on startup
+TAIL_BYTES = 64 * 1024
+TAIL_RECORDS = 2048
 
-def safe_write(path, value):
-    with open(path, "w") as f:
-        f.write(str(value))
-def update_heartbeat():
-    with open(HEARTBEAT_FILE, "w") as f:
-        f.write(str(time.time()))
+# Score with the NumPy export of the forest instead of sklearn
+USE_COMPILED_SCORER = True
 
-safe_write(STATE_FILE, "NORMAL")
-safe_write(SEVERITY_FILE, "NONE")
-safe_write(SCORE_FILE, "0.0")
-open(EVENT_LOG, "a").close()
+# Live ensemble: None scores with the forest only, otherwise the forest and
+# the autoencoder (ml/fast_autoencoder.py) are combined with
+#   "or"       anomalous if either model says so
+#   "and"      anomalous only if both agree
+#   "weighted" weighted mean of both models' normalized margins
+ENSEMBLE_RULE = None
+ENSEMBLE_WEIGHTS = {"forest": 0.5, "autoencoder": 0.5}
+FOREST_MARGIN_SCALE = 0.1       # forest score distance treated as a full-confidence margin
 
-# =====================================================
-# HELPERS
-# =====================================================
-def load_data():
-    if not os.path.exists(DATA_FILE):
-        return pd.DataFrame(columns=["timestamp","speed","brake","steering"])
+# Background refit on drift (ml/retraining.py); with RETRAIN_PERSIST the
+# refit is saved over the loaded artifacts, or into model_dir when given
+RETRAINING_ENABLED = True
+RETRAIN_PERSIST = True
 
-    try:
-        df = pd.read_csv(
-            DATA_FILE,
-            on_bad_lines="skip"
-        )
-
-        expected = ["timestamp","speed","brake","steering"]
-        if not all(col in df.columns for col in expected):
-            return pd.DataFrame(columns=expected)
-
-        return df[expected]
-
-    except Exception:
-        return pd.DataFrame(columns=["timestamp","speed","brake","steering"])
+# "batch": score every frame received since the last tick in one call
+# "latest": score only the most recent frame once per tick
+SCORING_MODE = "batch"
 
+# Alert timing in seconds of anomaly, measured on frame timestamps (see
+# AnomalyStateMachine), so it does not depend on the frame or tick rate
+PERSISTENCE_SECONDS = 3.0       # sustained anomaly before ATTACK
+SEVERITY_SECONDS = {"HIGH": 6.0, "MEDIUM": 4.0, "LOW": 2.0}
 
+# =====================================================
+# HELPERS
+# =====================================================
 def extract_features(df):
-    return df[["speed","brake","steering"]].values
-
-
-def log_event(event, description):
-    with open(EVENT_LOG, "a") as f:
-        f.write(f"{time.time()},{event},{description}\n")
+    return df[FEATURES].values
 
 
 def get_severity(counter):
-    if counter >= 6:
-        return "HIGH"
-    elif counter >= 4:
-        return "MEDIUM"
-    elif counter >= 2:
-        return "LOW"
+    for level, seconds in SEVERITY_SECONDS.items():
+        if counter >= seconds:
+            return level
     return "NONE"
 
 
 # =====================================================
-# MAIN ENGINE
+# STATE MACHINE
 # =====================================================
-def main():
-    print("[ML] CPS Anomaly Detection Engine Starting")
-    print("[ML] Learning baseline behavior...")
+class AnomalyStateMachine:
+    """
+    Persistence counter + NORMAL -> ATTACK -> RECOVERY -> NORMAL states.
+
+    The counter is seconds of anomaly on the frames' own timestamps: the
+    time between two scores is added when the earlier one was anomalous
+    and taken off when it was normal. A sustained anomaly raises ATTACK
+    `persistence` seconds after its first anomalous frame, at any frame
+    rate. Scores must be fed in arrival order.
+    """
+
+    def __init__(self, threshold=ANOMALY_THRESHOLD, persistence=PERSISTENCE_SECONDS):
+        self.threshold = threshold
+        self.persistence = persistence
+        self.counter = 0.0
+        self.state = "NORMAL"
+        self._last = None       # (timestamp, anomalous) of the previous score
+
+    def update(self, score, timestamp):
+        """Consume one score. Returns the new state on a transition, else None."""
+        if self._last is not None:
+            elapsed = max(0.0, timestamp - self._last[0])
+            if self._last[1]:
+                self.counter += elapsed
+            else:
+                self.counter = max(0.0, self.counter - elapsed)
+        self._last = (timestamp, score < self.threshold)
+
+        if self.counter >= self.persistence and self.state != "ATTACK":
+            self.state = "ATTACK"
+            return self.state
+
+        elif self.counter == 0 and self.state == "ATTACK":
+            self.state = "RECOVERY"
+            return self.state
+
+        elif self.state == "RECOVERY" and self.counter == 0:
+            self.state = "NORMAL"
+            return self.state
+
+        return None
+
+    @property
+    def severity(self):
+        return get_severity(self.counter)
+
+
+def score_frames(model, machine, frames, on_transition=None):
+    """
+    Score all frames in one vectorized call, then run each score through
+    the state machine in arrival order. on_transition(state, severity) is
+    called for every state change.
+    """
+    scores = model.decision_function(extract_features(frames))
+    run_state_machine(machine, scores, frames["timestamp"], on_transition)
+    return scores
+
+
+def run_state_machine(machine, scores, timestamps, on_transition=None):
+    """Feed scores in order; returns the number of state changes."""
+    transitions = 0
+    for score, timestamp in zip(scores, np.asarray(timestamps, dtype=np.float64).tolist()):
+        new_state = machine.update(score, timestamp)
+        if new_state is not None:
+            transitions += 1
+            if on_transition is not None:
+                on_transition(new_state, machine.severity)
+    return transitions
 
-    baseline_samples = []
 
-    while len(baseline_samples) < BASELINE_SAMPLES:
-        df = load_data()
-        if not df.empty:
-            baseline_samples.append(df.iloc[-1])
-            print(f"[ML] Baseline samples: {len(baseline_samples)}/{BASELINE_SAMPLES}")
-        time.sleep(0.1)
+# =====================================================
+# ENSEMBLE
+# =====================================================
+def _scaled_scorer(detector):
+    """(mean, scale, score function on scaled rows) of a forest detector."""
+    if hasattr(detector, "forest"):
+        return detector.mean, detector.scale, detector.forest.decision_function
+    return detector.scaler.mean_, detector.scaler.scale_, detector.model.decision_function
+
+
+class EnsembleDetector:
+    """
+    Forest + autoencoder evaluated on one scaled buffer.
+
+    Each model's margin to its own threshold is normalized to [-1, 1]
+    (negative = anomalous) and combined by `rule`. The result is mapped
+    back onto the forest's score scale, so the state machine, thresholds
+    and status block work unchanged.
+    """
+
+    def __init__(self, forest, autoencoder, rule="or", weights=ENSEMBLE_WEIGHTS):
+        self.forest = forest
+        self.autoencoder = autoencoder
+        self.rule = rule
+        self.weights = weights
+        self.thresholds = forest.thresholds
+        self.features = forest.features
+        self.metadata = forest.metadata
+
+        self.mean, self.scale, self._forest_scores = _scaled_scorer(forest)
+        # train_model fits both models on the same scaler; otherwise the
+        # autoencoder scales its own copy of the rows
+        self.shared_scaling = (
+            np.allclose(self.mean, autoencoder.mean, rtol=1e-5)
+            and np.allclose(self.scale, autoencoder.scale, rtol=1e-5)
+        )
 
-    baseline_df = pd.DataFrame(baseline_samples)
-    X_train = extract_features(baseline_df)
+    def _forest_margin(self, X_scaled):
+        margin = self._forest_scores(X_scaled) - self.thresholds["anomaly_threshold"]
+        return np.clip(margin / FOREST_MARGIN_SCALE, -1.0, 1.0)
 
-    model = IsolationForest(
-        n_estimators=100,
-        contamination=CONTAMINATION,
-        random_state=42
-    )
+    def _autoencoder_margin(self, X, X_scaled):
+        if self.shared_scaling:
+            errors = self.autoencoder.scaled_error(X_scaled)
+        else:
+            errors = self.autoencoder.reconstruction_error(X)
+        threshold = max(self.autoencoder.threshold, 1e-12)
+        return np.clip((threshold - errors) / threshold, -1.0, 1.0)
+
+    def margins(self, X):
+        """Normalized (forest, autoencoder) margins; rows are scaled once for both."""
+        X = np.asarray(X, dtype=np.float64)
+        X_scaled = (X - self.mean) / self.scale
+        return self._forest_margin(X_scaled), self._autoencoder_margin(X, X_scaled)
+
+    def decision_function(self, X):
+        forest, autoencoder = self.margins(X)
+
+        if self.rule == "and":
+            combined = np.maximum(forest, autoencoder)
+        elif self.rule == "weighted":
+            w_forest = self.weights["forest"]
+            w_autoencoder = self.weights["autoencoder"]
+            combined = (w_forest * forest + w_autoencoder * autoencoder) / (w_forest + w_autoencoder)
+        else:
+            combined = np.minimum(forest, autoencoder)
 
-    model.fit(X_train)
+        return self.thresholds["anomaly_threshold"] + combined * FOREST_MARGIN_SCALE
 
-    log_event("BASELINE", "Baseline learned")
-    print("[ML] Baseline learned successfully")
 
-    print(f"[ML] Warming up for {WARMUP_SECONDS} seconds...")
-    time.sleep(WARMUP_SECONDS)
+# =====================================================
+# DETECTOR
+# =====================================================
+class LiveDetector:
+    """
+    Detection engine for one telemetry stream. All inputs and outputs are
+    per instance, so several vehicles can run side by side (see ml/fleet.py).
+    """
+
+    def __init__(
+        self,
+        data_file=DATA_FILE,
+        binary_file=BINARY_STREAM_FILE,
+        log_format=LOG_FORMAT,
+        event_db=EVENT_DB,
+        status_file=STATUS_FILE,
+        artifact_file=ARTIFACT_FILE,
+        compiled_file=COMPILED_FILE,
+        autoencoder_file=AUTOENCODER_FILE,
+        model_dir=None,
+        feed_port=FEED_PORT,
+        name=None,
+        verbose=True
+    ):
+        self.data_file = data_file
+        self.binary_file = binary_file
+        self.log_format = log_format
+        self.event_db = event_db
+        self.status_file = status_file
+        self.artifact_file = artifact_file
+        self.compiled_file = compiled_file
+        self.autoencoder_file = autoencoder_file
+        # Refits are saved here when set (the files above may be shared)
+        self.model_dir = model_dir
+        self.feed_port = feed_port
+        self.name = name
+        self.verbose = verbose
+        self.tag = f"[ML {name}]" if name else "[ML]"
+        self.debug_tag = f"[ML DEBUG {name}]" if name else "[ML DEBUG]"
+
+        self.status = None
+        self.events = None
+        self.feed = None
+        self.rollups = Rollups()
+        self.stream = None
+        self.timing = StreamFeatures()
+        self.detector = None
+        self.machine = None
+        self.retrainer = None
+        self.latest = pd.DataFrame(columns=STREAM_COLUMNS)
+
+        self._baseline_df = None
+        self._active_at = 0.0
+
+        # Per-stage latency and frame counters (cps/metrics.py)
+        self._frames_in = REGISTRY.counter(*FRAMES_IN)
+        self._frames_scored = REGISTRY.counter(*FRAMES_SCORED)
+        self._score_errors = REGISTRY.counter(*FRAMES_DROPPED, reason="score_error")
+        self._skipped = REGISTRY.counter(*FRAMES_DROPPED, reason="not_latest")
+        self._load_time = REGISTRY.stage("load")
+        self._features_time = REGISTRY.stage("features")
+        self._score_time = REGISTRY.stage("score")
+        self._machine_time = REGISTRY.stage("state_machine")
+
+    # -------------------------------------------------
+    # OUTPUTS
+    # -------------------------------------------------
+    def log(self, message):
+        if self.verbose:
+            print(f"{self.tag} {message}")
+
+    def log_event(self, event, description, severity=None):
+        timestamp = time.time()
+        self.events.append(event, description, severity=severity, vehicle=self.name or "", timestamp=timestamp)
+        if self.feed is not None:
+            self.feed.publish_event(event, description, severity, timestamp)
+
+    def _publish_status(self):
+        if self.feed is not None:
+            self.feed.publish_status(self.status.values)
+
+    def _heartbeat(self):
+        self.status.heartbeat()
+        self._publish_status()
+
+    def _init_outputs(self):
+        self.events = EventStore(self.event_db)
+
+        # Push endpoint for the dashboard (ml/live_feed.py); None disables it
+        if self.feed_port is not None:
+            self.feed = LiveFeed(port=self.feed_port).start()
+
+        self.status = StatusWriter(self.status_file)
+        self.status.update(state="NORMAL", severity="NONE", score=0.0, counter=0.0, frames=0)
+
+    def _on_transition(self, state, severity):
+        self.status.update(state=state, severity=severity)
+        self._publish_status()
+
+        if state == "ATTACK":
+            self.log_event("ATTACK", f"Attack detected (Severity: {severity})", severity)
+            print(f"🚨 [ALERT] CPS UNDER ATTACK{f' ({self.name})' if self.name else ''}")
+
+        elif state == "RECOVERY":
+            self.log_event("RECOVERY", "System stabilizing")
+            self.log("Recovery mode")
+
+        elif state == "NORMAL":
+            self.log_event("NORMAL", "System back to normal")
+            self.log("CPS back to NORMAL")
+
+    # -------------------------------------------------
+    # STARTUP
+    # -------------------------------------------------
+    def _open_stream(self):
+        if self.log_format == "binary":
+            return BinaryTailer(self.binary_file, tail_records=TAIL_RECORDS)
+        return CSVTailer(self.data_file, STREAM_COLUMNS, tail_bytes=TAIL_BYTES)
+
+    def load_detector(self):
+        """Saved detector, preferring the compiled export (no sklearn import)."""
+        detector = None
+        if USE_COMPILED_SCORER:
+            detector = load_compiled(self.compiled_file, FEATURES)
+
+        if detector is None:
+            detector = load_artifact(self.artifact_file, FEATURES)
+            if detector is not None and USE_COMPILED_SCORER:
+                detector = compile_detector(detector)
+
+        return self._with_autoencoder(detector)
+
+    def _with_autoencoder(self, detector, autoencoder=None):
+        """Wrap a forest detector into the configured ensemble, if any."""
+        if ENSEMBLE_RULE is None or detector is None:
+            return detector
+
+        if autoencoder is None:
+            autoencoder = load_autoencoder(self.autoencoder_file, FEATURES)
+        if autoencoder is None:
+            self.log("Autoencoder unavailable, scoring with the forest only")
+            return detector
+
+        self.log(f"Ensemble detection: forest + autoencoder ({ENSEMBLE_RULE})")
+        return EnsembleDetector(detector, autoencoder, ENSEMBLE_RULE, ENSEMBLE_WEIGHTS)
+
+    def start(self):
+        self._init_outputs()
+        self.stream = self._open_stream()
+
+        detector = self.load_detector()
+
+        if detector is not None:
+            trained_at = time.strftime(
+                "%Y-%m-%d %H:%M:%S", time.localtime(detector.metadata.get("trained_at", 0))
+            )
+            self.log_event("MODEL", f"Loaded detector artifact (trained {trained_at})")
+            self.log(f"Loaded detector artifact trained {trained_at}")
+
+            # History already on disk was scored by the previous run; it
+            # only primes the timing features
+            backlog = self.timing.transform(self.stream.poll())
+            self.latest = backlog.iloc[-1:]
+            self._activate(detector)
+        else:
+            self.log("Falling back to online baseline learning")
+            self._begin_baseline()
+
+    def _fit_detector(self, X, calibrate=False, persist=False):
+        """Fit forest (+ autoencoder) on normal rows and build the scoring detector."""
+        # Deferred so an artifact-backed detector starts without fitting code
+        from ml.fast_autoencoder import save_autoencoder
+        from ml.fast_forest import save_compiled
+        from ml.model_artifact import save_artifact
+        from ml.train_model import fit_detector, fit_live_autoencoder
+
+        detector = fit_detector(X, sources=[self.data_file])
+        autoencoder = fit_live_autoencoder(detector, X) if ENSEMBLE_RULE else None
+
+        if calibrate:
+            detector.thresholds["anomaly_threshold"] = calibrate_threshold(
+                detector, X, ANOMALY_THRESHOLD
+            )
+
+        if persist:
+            artifact_file, compiled_file, autoencoder_file = self._refit_files()
+            save_artifact(detector, artifact_file)
+            save_compiled(detector, compiled_file)
+            if autoencoder is not None:
+                save_autoencoder(autoencoder, autoencoder_file)
+
+        if USE_COMPILED_SCORER:
+            detector = compile_detector(detector)
+        return self._with_autoencoder(detector, autoencoder)
+
+    def _refit_files(self):
+        """Where a persisted refit goes: model_dir if set, else the files loaded at start."""
+        if self.model_dir is None:
+            return self.artifact_file, self.compiled_file, self.autoencoder_file
+        return tuple(
+            os.path.join(self.model_dir, os.path.basename(path))
+            for path in (ARTIFACT_FILE, COMPILED_FILE, AUTOENCODER_FILE)
+        )
 
-    print("[ML] Live anomaly detection ACTIVE")
+    def _activate(self, detector, reference=None):
+        self.detector = detector
+        self.machine = AnomalyStateMachine(detector.thresholds["anomaly_threshold"])
 
-    anomaly_counter = 0
-    current_state = "NORMAL"
+        if RETRAINING_ENABLED:
+            self.retrainer = Retrainer(
+                lambda X: self._fit_detector(X, calibrate=True, persist=RETRAIN_PERSIST),
+                FEATURES,
+                reference=reference
+            ).start()
 
-    while True:
-        update_heartbeat()
-        df = load_data()
+        self.log("Live anomaly detection ACTIVE")
 
-        if df.empty:
-            time.sleep(1)
-            continue
+    def _swap_detector(self, detector, info):
+        """Replace the model between two batches; the state machine carries on."""
+        self.detector = detector
+        self.machine.threshold = detector.thresholds["anomaly_threshold"]
+
+        description = (
+            f"Retrained after drift in {info['feature']} (KS {info['statistic']:.3f}, "
+            f"{info['samples']} samples, {info['fit_seconds']:.1f}s, "
+            f"threshold {info['threshold']:.4f})"
+        )
+        self.log_event("MODEL", description)
+        self.log(description)
+
+    # -------------------------------------------------
+    # BASELINE
+    # -------------------------------------------------
+    def _begin_baseline(self):
+        """
+        Baseline frames come from recorded history in one read; only if it
+        is too short are new live frames collected on later ticks.
+        """
+        self.log("Learning baseline behavior...")
+
+        binary = self.log_format == "binary"
+        since = time.time() - BASELINE_SECONDS if BASELINE_SECONDS else None
+
+        self._baseline_df = load_baseline(
+            self.binary_file if binary else self.data_file,
+            BASELINE_SAMPLES,
+            event_db=self.event_db if BASELINE_NORMAL_ONLY else None,
+            since=since,
+            binary=binary,
+            vehicle=self.name or ""
+        )
+        self._baseline_df = self.timing.transform(self._baseline_df)
+        self.log(f"Baseline samples from history: {len(self._baseline_df)}")
+
+        # The tailer's first poll is the same history
+        self.stream.poll()
+        self._baseline_tick()
+
+    def _baseline_tick(self):
+        new_rows = self.timing.transform(self.stream.poll())
+        if not new_rows.empty:
+            self._baseline_df = pd.concat([self._baseline_df, new_rows], ignore_index=True)
+            self.log(f"Baseline samples: {len(self._baseline_df)}/{BASELINE_SAMPLES}")
+
+        if len(self._baseline_df) < BASELINE_SAMPLES:
+            return
+
+        X = extract_features(self._baseline_df)
+        detector = self._fit_detector(X)
+
+        self.log_event("BASELINE", f"Baseline learned ({len(self._baseline_df)} samples)")
+        self.log("Baseline learned successfully")
+        self.log(f"Warming up for {WARMUP_SECONDS} seconds...")
+
+        self.latest = self._baseline_df.iloc[-1:]
+        self._baseline_df = None
+        self._active_at = time.time() + WARMUP_SECONDS
+        self._activate(detector, reference=X)
+
+    # -------------------------------------------------
+    # DETECTION
+    # -------------------------------------------------
+    @property
+    def learning(self):
+        return self.detector is None
+
+    def tick(self):
+        """One detection step. Returns the number of frames scored."""
+        if self.learning:
+            self._baseline_tick()
+            return 0
+
+        if time.time() < self._active_at:
+            self._heartbeat()
+            return 0
+
+        if self.retrainer is not None:
+            swap = self.retrainer.take()
+            if swap is not None:
+                self._swap_detector(*swap)
+
+        start = time.perf_counter()
+        new_rows = self.stream.poll()
+        loaded = time.perf_counter()
+        new_rows = self.timing.transform(new_rows)
+        self._load_time.observe(loaded - start)
+        self._features_time.observe(time.perf_counter() - loaded)
+        self._frames_in.inc(len(new_rows))
+
+        # "latest" rescores the last frame every tick (the state machine
+        # counts ticks); only a frame that is new is counted and passed on
+        fresh = SCORING_MODE == "batch" or not new_rows.empty
+        if SCORING_MODE == "batch":
+            frames = new_rows
+        else:
+            if not new_rows.empty:
+                self.latest = new_rows.iloc[-1:]
+                self._skipped.inc(len(new_rows) - 1)
+            frames = self.latest
 
-        latest = df.iloc[-1:]
-        X = extract_features(latest)
+        if frames.empty:
+            self._heartbeat()
+            return 0
 
         try:
-            score = model.decision_function(X)[0]
+            start = time.perf_counter()
+            X = extract_features(frames)
+            scores = self.detector.decision_function(X)
+            scored = time.perf_counter()
+            was_normal = self.machine.state == "NORMAL"
+            transitions = run_state_machine(self.machine, scores, frames["timestamp"], self._on_transition)
+            self._score_time.observe(scored - start)
+            self._machine_time.observe(time.perf_counter() - scored)
         except Exception:
-            time.sleep(1)
-            continue
+            self._score_errors.inc(len(frames))
+            self._heartbeat()
+            return 0
+        scored_frames = len(scores) if fresh else 0
+        self._frames_scored.inc(scored_frames)
+
+        if self.retrainer is not None and fresh:
+            # Refit data only comes from batches that never left NORMAL
+            stayed_normal = was_normal and transitions == 0
+            self.retrainer.observe(X, scores, self.machine.threshold, stayed_normal)
+
+        score = scores[-1]
+        self.status.update(
+            score=float(score),
+            severity=self.machine.severity,
+            counter=self.machine.counter,
+            frames=self.status.values["frames"] + scored_frames
+        )
 
-        safe_write(SCORE_FILE, round(score, 4))
+        if self.feed is not None and fresh:
+            self.feed.publish_frames(frames, scores)
+            self.feed.publish_rollups(self.rollups.update(frames, scores))
+        self._publish_status()
 
-        if score < ANOMALY_THRESHOLD:
-            anomaly_counter += 1
-        else:
-            anomaly_counter = max(0, anomaly_counter - 1)
+        if self.verbose:
+            print(
+                f"{self.debug_tag} Frames: {len(scores)} | "
+                f"Score: {round(score,4)} | Min: {round(scores.min(),4)} | "
+                f"Counter: {self.machine.counter:.2f}s"
+            )
 
-        severity = get_severity(anomaly_counter)
-        safe_write(SEVERITY_FILE, severity)
+        return scored_frames
 
-        print(f"[ML DEBUG] Score: {round(score,4)} | Counter: {anomaly_counter}")
+    @property
+    def poll_interval(self):
+        return 0.1 if self.learning else CHECK_INTERVAL
 
-        # =========================
-        # STATE MACHINE
-        # =========================
-        if anomaly_counter >= PERSISTENCE_LIMIT and current_state != "ATTACK":
-            current_state = "ATTACK"
-            safe_write(STATE_FILE, "ATTACK")
-            log_event("ATTACK", f"Attack detected (Severity: {severity})")
-            print("🚨 [ALERT] CPS UNDER ATTACK")
+    def stop(self):
+        if self.retrainer is not None:
+            self.retrainer.stop()
+        if self.feed is not None:
+            self.feed.stop()
+        if self.status is not None:
+            self.status.update(state="NORMAL")
 
-        elif anomaly_counter == 0 and current_state == "ATTACK":
-            current_state = "RECOVERY"
-            safe_write(STATE_FILE, "RECOVERY")
-            log_event("RECOVERY", "System stabilizing")
-            print("[ML] Recovery mode")
 
-        elif current_state == "RECOVERY" and anomaly_counter == 0:
-            current_state = "NORMAL"
-            safe_write(STATE_FILE, "NORMAL")
-            log_event("NORMAL", "System back to normal")
-            print("[ML] CPS back to NORMAL")
+# =====================================================
+# MAIN ENGINE
+# =====================================================
+def main():
+    print("[ML] CPS Anomaly Detection Engine Starting")
 
-        time.sleep(CHECK_INTERVAL)
+    metrics = start_metrics("detector")
+    engine = LiveDetector()
+    engine.start()
+
+    try:
+        while True:
+            engine.tick()
+            time.sleep(engine.poll_interval)
+    finally:
+        engine.stop()
+        metrics.stop()
 
 
 # =====================================================
@@ -181,5 +642,4 @@ if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
-        safe_write(STATE_FILE, "NORMAL")
         print("\n[ML] Detection stopped safely")
@@ -0,0 +1,287 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from cps.metrics import REGISTRY
+from ml.rollups import ROLLUP_RESOLUTIONS, rollup_columns
+
+# =====================================================
+# PARAMETERS
+# =====================================================
+FEED_HOST = os.environ.get("CPS_FEED_HOST", "127.0.0.1")   # "0.0.0.0" to serve other machines
+FEED_PORT = 8765
+FEED_PATH = "/feed"
+METRICS_PATH = "/metrics"     # Prometheus text format, same server
+
+# Pages allowed to read the feed (CORS). The dashboard panel is a
+# components.html iframe, which shares the Streamlit page's origin;
+# set CPS_FEED_ORIGINS (comma-separated) when the dashboard is served elsewhere
+DASHBOARD_PORT = 8501
+FEED_ORIGINS = os.environ.get(
+    "CPS_FEED_ORIGINS", f"http://localhost:{DASHBOARD_PORT},http://127.0.0.1:{DASHBOARD_PORT}"
+).split(",")
+
+FEED_HISTORY = 512          # deltas kept for clients that reconnect (Last-Event-ID)
+FEED_FRAMES = 500           # frames in the snapshot a new client starts from
+FEED_EVENTS = 15            # security events in that snapshot
+STATUS_HEARTBEAT = 1.0      # resend an unchanged status at least this often
+KEEPALIVE = 15.0            # comment line on an idle connection
+
+# Columns of a "frames" delta; timestamps in epoch seconds
+FRAME_FIELDS = ["timestamp", "speed", "brake", "steering", "score"]
+
+
+# =====================================================
+# PUBLISHER
+# =====================================================
+class LiveFeed:
+    """
+    Detector-side Server-Sent Events endpoint on localhost.
+
+    The detector publishes only what is new (scored frames, security
+    events, status). Every delta gets a sequence number; a client that
+    reconnects with Last-Event-ID is sent what it missed, a new client
+    (or one too far behind) gets one snapshot of the recent frames and
+    events and then the deltas from there.
+    publish_*() never block on clients: each connection has its own thread.
+    """
+
+    def __init__(self, host=FEED_HOST, port=FEED_PORT):
+        self.host = host
+        self.port = port
+
+        # Sequence numbers continue from wall-clock ms, so a client still
+        # holding an id from a previous detector run always resyncs
+        self._seq = int(time.time() * 1000)
+        self._deltas = deque(maxlen=FEED_HISTORY)        # (seq, event, data)
+        self._frames = deque(maxlen=FEED_FRAMES)
+        self._events = deque(maxlen=FEED_EVENTS)
+        self._rollups = {width: deque(maxlen=keep) for width, keep in ROLLUP_RESOLUTIONS.items()}
+        self._status = None
+        self._status_version = 0
+        self._status_sent_at = 0.0
+
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._server = None
+        self._thread = None
+
+    # -------------------------------------------------
+    # SERVER
+    # -------------------------------------------------
+    def start(self):
+        """Bind and serve on a daemon thread. Returns self, or None if the port is taken."""
+        feed = self
+
+        class Handler(FeedHandler):
+            pass
+        Handler.feed = feed
+
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            print(f"[FEED] Live feed disabled, cannot bind {self.host}:{self.port}: {e}")
+            return None
+
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="live-feed", daemon=True)
+        self._thread.start()
+        print(f"[FEED] Live updates on http://{self.host}:{self.port}{FEED_PATH} (metrics on {METRICS_PATH})")
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    # -------------------------------------------------
+    # PUBLISHING (detector thread)
+    # -------------------------------------------------
+    def _publish(self, event, data, history, items):
+        payload = json.dumps(data, separators=(",", ":"))
+        with self._cond:
+            history.extend(items)
+            self._seq += 1
+            self._deltas.append((self._seq, event, payload))
+            self._cond.notify_all()
+
+    def publish_frames(self, frames, scores):
+        """Scored frames of one tick, as columns."""
+        if len(frames) == 0:
+            return
+
+        data = {
+            "timestamp": frames["timestamp"].round(3).tolist(),
+            "speed": frames["speed"].round(2).tolist(),
+            "brake": frames["brake"].astype(int).tolist(),
+            "steering": frames["steering"].round(2).tolist(),
+            "score": [round(float(s), 4) for s in scores],
+        }
+        self._publish("frames", data, self._frames, zip(*(data[field] for field in FRAME_FIELDS)))
+
+    def publish_event(self, event, description, severity=None, timestamp=None):
+        data = {
+            "time": time.time() if timestamp is None else timestamp,
+            "event": event,
+            "severity": severity,
+            "description": description,
+        }
+        self._publish("event", data, self._events, [data])
+
+    def publish_rollups(self, closed):
+        """Buckets closed by one tick, {width: rows} as returned by Rollups.update()."""
+        if not closed:
+            return
+
+        data = {str(width): rollup_columns(rows) for width, rows in closed.items()}
+        payload = json.dumps(data, separators=(",", ":"))
+        with self._cond:
+            for width, rows in closed.items():
+                self._rollups[width].extend(rows)
+            self._seq += 1
+            self._deltas.append((self._seq, "rollup", payload))
+            self._cond.notify_all()
+
+    def publish_status(self, values):
+        """Latest status; sent when it changes, or as a heartbeat."""
+        status = {
+            "state": values["state"],
+            "severity": values["severity"],
+            "score": round(float(values["score"]), 4),
+            "counter": round(float(values["counter"]), 2),
+            "frames": values["frames"],
+        }
+        now = time.time()
+        with self._cond:
+            if status == self._status and now - self._status_sent_at < STATUS_HEARTBEAT:
+                return
+            self._status = status
+            self._status_sent_at = now
+            self._status_version += 1
+            self._cond.notify_all()
+
+    # -------------------------------------------------
+    # READING (client threads)
+    # -------------------------------------------------
+    def _snapshot(self):
+        """Copies of the recent history; serialized by the caller outside the lock."""
+        return {
+            "frames": list(self._frames),
+            "events": list(self._events),
+            "status": self._status,
+            "rollups": {width: list(rows) for width, rows in self._rollups.items()},
+        }
+
+    @staticmethod
+    def _snapshot_payload(snapshot):
+        frames = snapshot["frames"]
+        columns = list(zip(*frames)) if frames else [[] for _ in FRAME_FIELDS]
+        snapshot["frames"] = {field: list(values) for field, values in zip(FRAME_FIELDS, columns)}
+        snapshot["rollups"] = {str(width): rollup_columns(rows) for width, rows in snapshot["rollups"].items()}
+        return json.dumps(snapshot, separators=(",", ":"))
+
+    def _pending(self, seq):
+        """
+        Messages a client that has seen up to `seq` needs: the deltas after
+        it, or a fresh snapshot if some were already dropped (or the
+        detector restarted). Caller holds the lock.
+        """
+        if seq is not None and seq <= self._seq:
+            if not self._deltas or seq >= self._deltas[0][0] - 1:
+                return [delta for delta in self._deltas if delta[0] > seq]
+
+        return [(self._seq, "snapshot", self._snapshot())]
+
+    def stream(self, last_id, write):
+        """Write SSE messages to `write` until the client goes away or the feed stops."""
+        seq = last_id
+        status_version = 0
+
+        with self._cond:
+            messages = self._pending(seq)
+
+        while True:
+            chunks = []
+            for delta_seq, event, payload in messages:
+                if event == "snapshot":
+                    payload = self._snapshot_payload(payload)
+                chunks.append(f"id: {delta_seq}\nevent: {event}\ndata: {payload}\n\n")
+                seq = delta_seq
+
+            with self._cond:
+                if self._status_version != status_version and self._status is not None:
+                    chunks.append(f"event: status\ndata: {json.dumps(self._status)}\n\n")
+                    status_version = self._status_version
+
+            write("".join(chunks) if chunks else ": keepalive\n\n")
+
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopped or self._seq != seq or self._status_version != status_version,
+                    timeout=KEEPALIVE
+                )
+                if self._stopped:
+                    return
+                messages = self._pending(seq)
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    feed = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == METRICS_PATH:
+            self.send_metrics()
+            return
+        if url.path != FEED_PATH:
+            self.send_error(404)
+            return
+
+        # EventSource resends the last id it saw; ?since= for other clients
+        last_id = self.headers.get("Last-Event-ID") or parse_qs(url.query).get("since", [None])[0]
+        try:
+            last_id = int(last_id) if last_id is not None else None
+        except ValueError:
+            last_id = None
+
+        # Browsers send Origin on cross-origin requests; any page but the
+        # dashboard is refused, clients without one (curl, scripts) are not
+        origin = self.headers.get("Origin")
+        if origin is not None and origin not in FEED_ORIGINS:
+            self.send_error(403)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        if origin is not None:
+            self.send_header("Access-Control-Allow-Origin", origin)
+            self.send_header("Vary", "Origin")
+        self.end_headers()
+
+        def write(text):
+            self.wfile.write(text.encode())
+            self.wfile.flush()
+
+        try:
+            self.feed.stream(last_id, write)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def send_metrics(self):
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
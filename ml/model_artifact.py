@@ -0,0 +1,97 @@
+import os
+
+import joblib
+import numpy as np
+
+# =====================================================
+# DETECTOR ARTIFACT
+# =====================================================
+# Bump when the artifact layout changes; older artifacts are then ignored
+ARTIFACT_VERSION = 2
+
+MODEL_DIR = "ml/models"
+ARTIFACT_FILE = os.path.join(MODEL_DIR, "detector.joblib")
+
+
+class GroupedForest:
+    """
+    One fitted IsolationForest per feature group (column indices of the
+    scaled rows). A row's decision value is the lowest of its groups', so
+    each group can flag a frame on its own and a wide group cannot hide
+    an outlier in a narrow one.
+    """
+
+    def __init__(self, forests, groups):
+        self.forests = list(forests)
+        self.groups = [list(group) for group in groups]
+
+    def decision_function(self, X):
+        X = np.asarray(X)
+        return np.min(
+            [forest.decision_function(X[:, group]) for forest, group in zip(self.forests, self.groups)],
+            axis=0
+        )
+
+
+class Detector:
+    """Scaler + GroupedForest + the thresholds they were tuned with."""
+
+    def __init__(self, scaler, model, thresholds, features, metadata=None):
+        self.scaler = scaler
+        self.model = model
+        self.thresholds = thresholds
+        self.features = list(features)
+        self.metadata = metadata or {}
+
+    def decision_function(self, X):
+        return self.model.decision_function(self.scaler.transform(X))
+
+
+def save_artifact(detector, path=ARTIFACT_FILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    artifact = {
+        "version": ARTIFACT_VERSION,
+        "features": detector.features,
+        "scaler": detector.scaler,
+        "model": detector.model,
+        "thresholds": detector.thresholds,
+        "metadata": detector.metadata,
+    }
+
+    # Write then rename so a running detector never loads a partial file
+    tmp_path = path + ".tmp"
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_artifact(path=ARTIFACT_FILE, features=None):
+    """
+    Load a saved Detector. Returns None (with the reason printed) when the
+    artifact is missing or incompatible with this code.
+    """
+    if not os.path.exists(path):
+        print(f"[ML] No model artifact at {path}")
+        return None
+
+    try:
+        artifact = joblib.load(path)
+    except Exception as e:
+        print(f"[ML] Model artifact unreadable: {e}")
+        return None
+
+    if not isinstance(artifact, dict) or artifact.get("version") != ARTIFACT_VERSION:
+        print(f"[ML] Model artifact version mismatch (expected {ARTIFACT_VERSION})")
+        return None
+
+    if features is not None and artifact["features"] != list(features):
+        print(f"[ML] Model artifact features {artifact['features']} != {list(features)}")
+        return None
+
+    return Detector(
+        artifact["scaler"],
+        artifact["model"],
+        artifact["thresholds"],
+        artifact["features"],
+        artifact["metadata"]
+    )
@@ -0,0 +1,212 @@
+import math
+import threading
+import time
+
+import numpy as np
+
+# =====================================================
+# PARAMETERS
+# =====================================================
+RESERVOIR_SIZE = 2000           # normal frames kept for the next refit
+DRIFT_CHECK_INTERVAL = 30       # seconds between drift tests
+DRIFT_ALPHA = 0.01              # KS significance (Bonferroni over features)
+DRIFT_MIN_STATISTIC = 0.1       # ignore significant but tiny shifts
+RETRAIN_MIN_INTERVAL = 300      # seconds between two refits
+RETRAIN_FP_QUANTILE = 0.005     # new threshold: this quantile of normal scores, unless the default is stricter
+
+
+# =====================================================
+# RESERVOIR
+# =====================================================
+class FrameReservoir:
+    """
+    Uniform sample (Algorithm R) of the feature rows added since the last
+    reset. Batches are inserted vectorized; safe to snapshot from another
+    thread.
+    """
+
+    def __init__(self, capacity=RESERVOIR_SIZE, n_features=1, seed=None):
+        self.rows = np.empty((capacity, n_features))
+        self.capacity = capacity
+        self.size = 0
+        self.seen = 0
+        self.rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def add(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) == 0:
+            return
+
+        with self._lock:
+            # Fill free slots first
+            free = min(self.capacity - self.size, len(X))
+            self.rows[self.size:self.size + free] = X[:free]
+            self.size += free
+            self.seen += free
+
+            rest = X[free:]
+            if len(rest):
+                # Row number k replaces a random slot with probability capacity / k
+                k = self.seen + 1 + np.arange(len(rest))
+                slots = self.rng.integers(0, k)
+                keep = slots < self.capacity
+                self.rows[slots[keep]] = rest[keep]
+                self.seen += len(rest)
+
+    def snapshot(self):
+        with self._lock:
+            return self.rows[:self.size].copy()
+
+    def reset(self):
+        with self._lock:
+            self.size = 0
+            self.seen = 0
+
+    @property
+    def full(self):
+        return self.size >= self.capacity
+
+
+# =====================================================
+# DRIFT TEST
+# =====================================================
+def ks_statistic(a, b):
+    """Two-sample Kolmogorov-Smirnov statistic of 1-D samples."""
+    a = np.sort(a)
+    b = np.sort(b)
+    values = np.concatenate([a, b])
+    cdf_a = np.searchsorted(a, values, side="right") / len(a)
+    cdf_b = np.searchsorted(b, values, side="right") / len(b)
+    return float(np.max(np.abs(cdf_a - cdf_b)))
+
+
+def detect_drift(reference, current, alpha=DRIFT_ALPHA, min_statistic=DRIFT_MIN_STATISTIC):
+    """
+    Per-feature KS test of current vs reference rows.
+    Returns (drifted, feature index, statistic) for the largest shift.
+    """
+    n, m = len(reference), len(current)
+    n_features = reference.shape[1]
+
+    # Asymptotic critical value, Bonferroni-corrected
+    c = math.sqrt(-0.5 * math.log(alpha / n_features / 2))
+    critical = max(c * math.sqrt((n + m) / (n * m)), min_statistic)
+
+    stats = [ks_statistic(reference[:, j], current[:, j]) for j in range(n_features)]
+    worst = int(np.argmax(stats))
+    return stats[worst] > critical, worst, stats[worst]
+
+
+def calibrate_threshold(detector, X, default):
+    """
+    The RETRAIN_FP_QUANTILE quantile of the scores of X, or `default` when
+    that is higher. Scores under the threshold count as anomalous, so a
+    refit can only make detection stricter, never looser; with `default`
+    more than that share of X may score below it.
+    """
+    scores = detector.decision_function(X)
+    return max(default, float(np.quantile(scores, RETRAIN_FP_QUANTILE)))
+
+
+# =====================================================
+# BACKGROUND RETRAINER
+# =====================================================
+class Retrainer:
+    """
+    Keeps a reservoir of frames judged normal since the last test, tests it
+    for drift against the data the current model was fit on, and refits on
+    a worker thread.
+    The detection loop only inserts into the reservoir and picks up a
+    finished model with take(); it never waits for a fit.
+
+    fit(X) -> detector builds a ready-to-score detector (same path as the
+    baseline fit, including any persistence).
+    """
+
+    def __init__(self, fit, features, reference=None, seed=None):
+        self.fit = fit
+        self.features = list(features)
+        self.reference = reference
+        self.reservoir = FrameReservoir(RESERVOIR_SIZE, len(self.features), seed)
+
+        self._pending = None
+        self._last_fit = time.time()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="retrainer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    # -------------------------------------------------
+    # HOT PATH
+    # -------------------------------------------------
+    def observe(self, X, scores, threshold, stayed_normal):
+        """
+        Add the frames of a batch that scored at or above `threshold`, if
+        the detector was in NORMAL state for the whole batch. Anomalous
+        frames below the persistence limit and batches that went through
+        ATTACK are left out, so a refit never learns an attack as normal.
+        """
+        if stayed_normal:
+            self.reservoir.add(X[np.asarray(scores) >= threshold])
+
+    def take(self):
+        """The refitted detector and swap info once, else None."""
+        pending = self._pending
+        if pending is None:
+            return None
+        self._pending = None
+        return pending
+
+    # -------------------------------------------------
+    # WORKER
+    # -------------------------------------------------
+    def _run(self):
+        while not self._stop.wait(DRIFT_CHECK_INTERVAL):
+            if not self.reservoir.full or self._pending is not None:
+                continue
+
+            current = self.reservoir.snapshot()
+
+            # A model loaded from disk has no training rows here: the first
+            # full reservoir becomes the reference it is compared against
+            if self.reference is None:
+                self.reference = current
+                self.reservoir.reset()
+                continue
+
+            drifted, feature, statistic = detect_drift(self.reference, current)
+            if not drifted:
+                # Next test looks at a fresh window of recent frames
+                self.reservoir.reset()
+                continue
+            if time.time() - self._last_fit < RETRAIN_MIN_INTERVAL:
+                continue
+
+            started = time.time()
+            try:
+                detector = self.fit(current)
+            except Exception as e:
+                print(f"[ML] Retraining failed: {e}")
+                self._last_fit = time.time()
+                continue
+
+            info = {
+                "feature": self.features[feature],
+                "statistic": statistic,
+                "samples": len(current),
+                "fit_seconds": time.time() - started,
+                "threshold": detector.thresholds["anomaly_threshold"],
+            }
+
+            self.reference = current
+            self.reservoir.reset()
+            self._last_fit = time.time()
+
+            # Single reference assignment: the loop sees the old or the new model
+            self._pending = (detector, info)
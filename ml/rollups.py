@@ -0,0 +1,141 @@
+from collections import deque
+
+import numpy as np
+
+# =====================================================
+# PARAMETERS
+# =====================================================
+ROLLUP_FIELDS = ["speed", "steering", "score"]
+
+# Bucket width (s) -> closed buckets kept
+ROLLUP_RESOLUTIONS = {
+    1: 3600,        # 1 hour of 1 s buckets
+    10: 8640,       # 1 day of 10 s buckets
+    60: 10080,      # 1 week of 1 min buckets
+}
+
+# Columns of a closed bucket: start time, frame count, then min/mean/max per field
+ROLLUP_COLUMNS = ["t", "n"] + [f"{field}_{stat}" for field in ROLLUP_FIELDS for stat in ("min", "mean", "max")]
+
+
+class RollupSeries:
+    """
+    min/mean/max per field over fixed time buckets of one width.
+
+    Frames are folded into the open bucket as they arrive; a bucket is
+    closed when the first frame of a later bucket shows up. Frames older
+    than the open bucket (late arrivals) are counted in the open bucket.
+    """
+
+    def __init__(self, width, keep, n_fields=len(ROLLUP_FIELDS)):
+        self.width = width
+        self.closed = deque(maxlen=keep)
+        self.n_fields = n_fields
+
+        self._start = None
+        self._count = 0
+        self._sum = np.zeros(n_fields)
+        self._seen = np.zeros(n_fields)
+        self._min = np.full(n_fields, np.inf)
+        self._max = np.full(n_fields, -np.inf)
+
+    def _close(self):
+        mean = np.divide(self._sum, self._seen, out=np.full(self.n_fields, np.nan), where=self._seen > 0)
+        low = np.where(self._seen > 0, self._min, np.nan)
+        high = np.where(self._seen > 0, self._max, np.nan)
+
+        row = (self._start, int(self._count)) + tuple(
+            round(float(v), 4) for triple in zip(low, mean, high) for v in triple
+        )
+        self.closed.append(row)
+        return row
+
+    def _fold(self, count, sums, seen, lows, highs):
+        self._count += count
+        self._sum += sums
+        self._seen += seen
+        np.minimum(self._min, lows, out=self._min)
+        np.maximum(self._max, highs, out=self._max)
+
+    def update(self, timestamps, values):
+        """
+        timestamps (n,), values (n, n_fields) with NaN for missing values.
+        Returns the buckets closed by these frames.
+        """
+        buckets = np.floor(timestamps / self.width) * self.width
+        if self._start is not None:
+            buckets = np.maximum(buckets, self._start)
+
+        # Frames arrive in time order, so equal buckets are contiguous
+        order = np.argsort(buckets, kind="stable")
+        buckets = buckets[order]
+        values = values[order]
+
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        present = ~np.isnan(values)
+        filled = np.where(present, values, 0.0)
+
+        counts = np.diff(np.r_[starts, len(buckets)])
+        sums = np.add.reduceat(filled, starts, axis=0)
+        seen = np.add.reduceat(present.astype(np.int64), starts, axis=0)
+        lows = np.minimum.reduceat(np.where(present, values, np.inf), starts, axis=0)
+        highs = np.maximum.reduceat(np.where(present, values, -np.inf), starts, axis=0)
+
+        closed = []
+        for i, bucket in enumerate(buckets[starts]):
+            if self._start is not None and bucket != self._start:
+                closed.append(self._close())
+                self._start = None
+
+            if self._start is None:
+                self._start = float(bucket)
+                self._count = 0
+                self._sum[:] = 0.0
+                self._seen[:] = 0
+                self._min[:] = np.inf
+                self._max[:] = -np.inf
+
+            self._fold(counts[i], sums[i], seen[i], lows[i], highs[i])
+
+        return closed
+
+
+class Rollups:
+    """All ROLLUP_RESOLUTIONS of one telemetry stream."""
+
+    def __init__(self, resolutions=ROLLUP_RESOLUTIONS):
+        self.series = {width: RollupSeries(width, keep) for width, keep in resolutions.items()}
+
+    def update(self, frames, scores=None):
+        """Fold a batch of frames in; returns {width: [closed bucket rows]} for widths that closed any."""
+        if len(frames) == 0:
+            return {}
+
+        timestamps = frames["timestamp"].to_numpy(dtype=float)
+        values = np.full((len(frames), len(ROLLUP_FIELDS)), np.nan)
+        for j, field in enumerate(ROLLUP_FIELDS):
+            if field == "score":
+                if scores is not None:
+                    values[:, j] = scores
+            elif field in frames.columns:
+                values[:, j] = frames[field].to_numpy(dtype=float)
+
+        closed = {}
+        for width, series in self.series.items():
+            rows = series.update(timestamps, values)
+            if rows:
+                closed[width] = rows
+        return closed
+
+    def snapshot(self):
+        """{width: {column: values}} of the closed buckets, oldest first."""
+        return {width: rollup_columns(series.closed) for width, series in self.series.items()}
+
+
+def rollup_columns(rows):
+    """Bucket rows -> {column: list}; NaN becomes None so the result is valid JSON."""
+    columns = list(zip(*rows)) if rows else [[] for _ in ROLLUP_COLUMNS]
+    return {
+        name: [None if v != v else v for v in values]
+        for name, values in zip(ROLLUP_COLUMNS, columns)
+    }
@@ -0,0 +1,175 @@
+import mmap
+import os
+import struct
+import sys
+import time
+
+# =====================================================
+# STATUS BLOCK LAYOUT
+# =====================================================
+# One small memory-mapped file shared by the detector (single writer) and
+# any number of readers. A sequence counter (seqlock) guards the body:
+# odd while the writer is mid-update, even once it is consistent.
+#
+#   0  magic      8s
+#   8  sequence   u8
+#   16 state      u1 | severity u1 | pad 2 | counter f4 (seconds of anomaly)
+#   24 score      f8
+#   32 frames     u8   (frames scored since start)
+#   40 heartbeat  f8   (time.time() of the last update)
+MAGIC = b"CPSSTAT2"
+SEQ = struct.Struct("<Q")
+BODY = struct.Struct("<BB2xfdQd")
+SEQ_OFFSET = len(MAGIC)
+BODY_OFFSET = SEQ_OFFSET + SEQ.size
+BLOCK_SIZE = BODY_OFFSET + BODY.size
+
+STATES = ["NORMAL", "ATTACK", "RECOVERY"]
+SEVERITIES = ["NONE", "LOW", "MEDIUM", "HIGH"]
+
+STATUS_FILE = "ml/status.bin"
+
+
+class StatusWriter:
+    """Detector side. Updates are published atomically through the seqlock."""
+
+    def __init__(self, path=STATUS_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        # Never replace an existing block: readers keep it mapped
+        mode = "r+b" if os.path.exists(path) else "w+b"
+        self._f = open(path, mode)
+        if os.fstat(self._f.fileno()).st_size != BLOCK_SIZE:
+            self._f.truncate(BLOCK_SIZE)
+        self._mm = mmap.mmap(self._f.fileno(), BLOCK_SIZE)
+
+        self.values = {
+            "state": "NORMAL",
+            "severity": "NONE",
+            "counter": 0.0,
+            "score": 0.0,
+            "frames": 0,
+            "heartbeat": 0.0,
+        }
+        if self._mm[:SEQ_OFFSET] == MAGIC:
+            self._seq = SEQ.unpack_from(self._mm, SEQ_OFFSET)[0] & ~1
+            current = read_block(self._mm)
+            if current is not None:
+                self.values.update(current)
+        else:
+            self._seq = 0
+            self._mm[:SEQ_OFFSET] = MAGIC
+
+    def update(self, **values):
+        """Publish new values; fields not given keep their last value."""
+        self.values.update(values)
+        self.values["heartbeat"] = time.time()
+        v = self.values
+
+        SEQ.pack_into(self._mm, SEQ_OFFSET, self._seq + 1)
+        BODY.pack_into(
+            self._mm,
+            BODY_OFFSET,
+            STATES.index(v["state"]),
+            SEVERITIES.index(v["severity"]),
+            v["counter"],
+            v["score"],
+            v["frames"],
+            v["heartbeat"]
+        )
+        self._seq += 2
+        SEQ.pack_into(self._mm, SEQ_OFFSET, self._seq)
+
+    def heartbeat(self):
+        self.update()
+
+    def close(self):
+        self._mm.close()
+        self._f.close()
+
+
+def read_block(buf, retries=100):
+    """Consistent snapshot of a status block, or None if not readable."""
+    if buf[:SEQ_OFFSET] != MAGIC:
+        return None
+
+    for _ in range(retries):
+        before = SEQ.unpack_from(buf, SEQ_OFFSET)[0]
+        if before & 1:
+            continue
+
+        state, severity, counter, score, frames, heartbeat = BODY.unpack_from(buf, BODY_OFFSET)
+
+        if SEQ.unpack_from(buf, SEQ_OFFSET)[0] == before:
+            return {
+                "state": STATES[state],
+                "severity": SEVERITIES[severity],
+                "counter": counter,
+                "score": score,
+                "frames": frames,
+                "heartbeat": heartbeat,
+            }
+
+    return None
+
+
+class StatusReader:
+    """
+    Lock-free reader. The block is mapped once, so each read() is a plain
+    memory access with no open/read/close.
+    """
+
+    def __init__(self, path=STATUS_FILE):
+        self.path = path
+        self._mm = None
+        self._last = None
+
+    def _map(self):
+        try:
+            with open(self.path, "rb") as f:
+                if os.fstat(f.fileno()).st_size < BLOCK_SIZE:
+                    return False
+                self._mm = mmap.mmap(f.fileno(), BLOCK_SIZE, access=mmap.ACCESS_READ)
+        except OSError:
+            return False
+        return True
+
+    def read(self):
+        """Latest consistent status, or None if the detector never ran."""
+        if self._mm is None and not self._map():
+            return None
+
+        snapshot = read_block(self._mm)
+        if snapshot is not None:
+            self._last = snapshot
+        return self._last
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._mm = None
+
+
+# =====================================================
+# CLI: python -m ml.status_block [path]
+# =====================================================
+if __name__ == "__main__":
+    reader = StatusReader(sys.argv[1] if len(sys.argv) > 1 else STATUS_FILE)
+
+    try:
+        while True:
+            status = reader.read()
+            if status is None:
+                print("[STATUS] No detector status yet")
+            else:
+                age = time.time() - status["heartbeat"]
+                print(
+                    f"[STATUS] {status['state']} | Severity: {status['severity']} | "
+                    f"Score: {round(status['score'], 4)} | Counter: {status['counter']:.1f}s | "
+                    f"Frames: {status['frames']} | Heartbeat: {age:.1f}s ago"
+                )
+            time.sleep(1)
+
+    except KeyboardInterrupt:
+        reader.close()
@@ -0,0 +1,104 @@
+import math
+
+import numpy as np
+
+from config.can_config import CAN_ID
+from ml.stream_reader import ID_COLUMN
+
+# =====================================================
+# PARAMETERS
+# =====================================================
+# Per-arbitration-id timing features, appended to every frame
+TIMING_FEATURES = ["inter_arrival", "ia_mean", "ia_std", "ia_min", "ia_max", "frame_rate"]
+
+# EWMA weight of the newest gap (~1/alpha frames of memory)
+TIMING_ALPHA = 0.1
+
+
+class TimingState:
+    """Running inter-arrival statistics of one arbitration id."""
+
+    __slots__ = ("last", "count", "mean", "var", "low", "high")
+
+    def __init__(self, timestamp):
+        self.last = timestamp
+        self.count = 1
+        self.mean = 0.0
+        self.var = 0.0
+        self.low = 0.0
+        self.high = 0.0
+
+
+class StreamFeatures:
+    """
+    O(1)-per-frame timing features for live streams.
+
+    Mean and variance are exponentially weighted (the incremental Welford
+    form with a fixed weight), so they follow the current rhythm of an id
+    instead of its whole history. Min/max hold new extremes and then decay
+    towards the mean at the same rate. Frames must arrive in timestamp order.
+    """
+
+    def __init__(self, alpha=TIMING_ALPHA, default_id=CAN_ID):
+        self.alpha = alpha
+        self.default_id = default_id
+        self._states = {}
+
+    def update(self, arbitration_id, timestamp):
+        """Consume one frame; returns its values for TIMING_FEATURES."""
+        state = self._states.get(arbitration_id)
+        if state is None:
+            self._states[arbitration_id] = TimingState(timestamp)
+            return 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
+
+        gap = max(0.0, timestamp - state.last)
+        state.last = timestamp
+        state.count += 1
+
+        if state.count == 2:
+            state.mean = state.low = state.high = gap
+        else:
+            alpha = self.alpha
+            diff = gap - state.mean
+            incr = alpha * diff
+            state.mean += incr
+            state.var = (1 - alpha) * (state.var + diff * incr)
+            state.low = gap if gap < state.low else state.low + alpha * (state.mean - state.low)
+            state.high = gap if gap > state.high else state.high + alpha * (state.mean - state.high)
+
+        rate = 1.0 / state.mean if state.mean > 0 else 0.0
+        return gap, state.mean, math.sqrt(state.var), state.low, state.high, rate
+
+    def transform(self, frames):
+        """Copy of `frames` with TIMING_FEATURES columns, updating state in order."""
+        frames = frames.copy()
+        n = len(frames)
+        out = np.zeros((n, len(TIMING_FEATURES)))
+
+        timestamps = frames["timestamp"].to_numpy(dtype=float).tolist()
+        if ID_COLUMN in frames.columns:
+            ids = frames[ID_COLUMN].to_numpy().astype(np.int64).tolist()
+        else:
+            ids = [self.default_id] * n
+
+        update = self.update
+        for i in range(n):
+            out[i] = update(ids[i], timestamps[i])
+
+        for j, name in enumerate(TIMING_FEATURES):
+            frames[name] = out[:, j]
+        return frames
+
+    def snapshot(self):
+        """Current statistics per arbitration id."""
+        return {
+            arbitration_id: {
+                "frames": state.count,
+                "ia_mean": state.mean,
+                "ia_std": math.sqrt(state.var),
+                "ia_min": state.low,
+                "ia_max": state.high,
+                "frame_rate": 1.0 / state.mean if state.mean > 0 else 0.0,
+            }
+            for arbitration_id, state in self._states.items()
+        }
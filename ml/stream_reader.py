@@ -0,0 +1,184 @@
+import io
+import os
+
+import pandas as pd
+
+from config.can_config import CAN_ID
+from cps.can.decoder import CANDecoder
+from cps.metrics import FRAMES_DROPPED, REGISTRY
+from receiver.data_logger import FrameLogReader
+
+STREAM_COLUMNS = ["timestamp", "speed", "brake", "steering"]
+ID_COLUMN = "arbitration_id"
+
+
+def stream_frame(raw, columns=STREAM_COLUMNS):
+    """Numeric stream columns of a parsed CSV chunk, plus arbitration ids when logged."""
+    df = raw[columns].apply(pd.to_numeric, errors="coerce")
+    if ID_COLUMN in raw.columns and ID_COLUMN not in columns:
+        # Rows appended without an id (attacks/attack_spoofing.py) count as CAN_ID
+        df[ID_COLUMN] = pd.to_numeric(raw[ID_COLUMN], errors="coerce").fillna(CAN_ID)
+    return df.dropna().reset_index(drop=True)
+
+
+class CSVTailer:
+    """
+    Incremental reader for an append-only CSV stream.
+
+    Remembers the byte offset of the last complete row so every poll only
+    parses what was appended since. Truncation and rotation (the path now
+    points at a different file) are detected and reading restarts from the
+    new file's header.
+    """
+
+    def __init__(self, path, columns=STREAM_COLUMNS, tail_bytes=None):
+        self.path = path
+        self.columns = list(columns)
+        # On first open, skip to the last `tail_bytes` of the file instead of
+        # parsing its whole history. None reads from the beginning.
+        self.tail_bytes = tail_bytes
+
+        self._f = None
+        self._inode = None
+        self._offset = 0
+        self._header = None
+        self._opened_once = False
+
+    # -------------------------------------------------
+    # FILE HANDLING
+    # -------------------------------------------------
+    def _open(self):
+        try:
+            f = open(self.path, "rb")
+        except OSError:
+            return False
+
+        header = f.readline()
+        if not header.endswith(b"\n"):
+            # Header not fully written yet
+            f.close()
+            return False
+
+        self._f = f
+        self._inode = os.fstat(f.fileno()).st_ino
+        self._header = header.decode("utf-8", "replace").strip().split(",")
+        self._offset = f.tell()
+
+        if self.tail_bytes is not None and not self._opened_once:
+            size = os.fstat(f.fileno()).st_size
+            start = size - self.tail_bytes
+            if start > self._offset:
+                # Align to the start of the next full line
+                f.seek(start - 1)
+                f.readline()
+                self._offset = f.tell()
+
+        self._opened_once = True
+        return True
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+        self._f = None
+        self._inode = None
+
+    def _rotated(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        return st.st_ino != self._inode
+
+    # -------------------------------------------------
+    # READING
+    # -------------------------------------------------
+    def _read_new(self):
+        self._f.seek(self._offset)
+        chunk = self._f.read()
+
+        # Keep a partially written last row for the next poll
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return b""
+        self._offset += end + 1
+        return chunk[:end + 1]
+
+    def poll_raw(self):
+        """Return the bytes of all complete rows appended since the last poll."""
+        if self._f is None and not self._open():
+            return b""
+
+        if os.fstat(self._f.fileno()).st_size < self._offset:
+            # Truncated in place: start over from the header
+            self.close()
+            if not self._open():
+                return b""
+
+        data = self._read_new()
+
+        if self._rotated():
+            # Drain what was left in the old file, then follow the new one
+            self.close()
+            if self._open():
+                data += self._read_new()
+
+        return data
+
+    def poll(self):
+        """Return a DataFrame with the rows appended since the last poll."""
+        data = self.poll_raw()
+        if not data:
+            return pd.DataFrame(columns=self.columns)
+
+        try:
+            df = pd.read_csv(
+                io.BytesIO(data),
+                header=None,
+                names=self._header,
+                index_col=False,
+                on_bad_lines="skip"
+            )
+        except Exception:
+            return pd.DataFrame(columns=self.columns)
+
+        if not all(col in df.columns for col in self.columns):
+            return pd.DataFrame(columns=self.columns)
+
+        return stream_frame(df, self.columns)
+
+
+_UNDECODABLE = REGISTRY.counter(*FRAMES_DROPPED, reason="undecodable")
+
+
+def decode_records(records, decoder=None):
+    """
+    Binary frame records -> telemetry DataFrame, decoded per CAN_SIGNALS.
+    Pass the same `decoder` for consecutive reads of one stream, so signals
+    hold their values across reads; without one, records are decoded alone.
+    """
+    decoder = decoder or CANDecoder()
+    columns = decoder.decode_records(
+        records["timestamp"], records["arbitration_id"], records["data"], records["dlc"]
+    )
+    _UNDECODABLE.inc(len(records) - len(columns["timestamp"]))
+    return pd.DataFrame(columns)
+
+
+class BinaryTailer:
+    """Same interface as CSVTailer, backed by the memory-mapped frame log."""
+
+    def __init__(self, path, tail_records=None, decoder=None):
+        self.reader = FrameLogReader(path)
+        self.tail_records = tail_records
+        self.decoder = decoder or CANDecoder()
+        self._index = None
+
+    def poll(self):
+        if self._index is None and self.tail_records is not None:
+            self._index = max(0, len(self.reader) - self.tail_records)
+
+        records, self._index = self.reader.since(self._index or 0)
+        return decode_records(records, self.decoder)
+
+    def close(self):
+        pass
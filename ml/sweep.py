@@ -0,0 +1,304 @@
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+from ml.feature_extraction import window_features
+from ml.feature_store import stream_feature_set
+from ml.live_detection import FEATURE_GROUP_COLUMNS, AnomalyStateMachine, extract_features
+
+# =====================================================
+# PARAMETERS
+# =====================================================
+NORMAL_FILES = ["data/raw/normal.csv"]
+ATTACK_FILES = ["data/raw/attack.csv"]
+RESULTS_FILE = "ml/sweep_results.csv"
+
+HOLDOUT = 0.3           # last share of the normal recordings kept for evaluation
+SHOW_TOP = 10
+
+# Default search space. window_size 1 scores single frames with the live
+# detector's features and feature groups; larger sizes use
+# ml/feature_extraction.py windows in one forest.
+SWEEP_GRID = {
+    "window_size": [1, 5, 10],
+    "n_estimators": [50, 100, 200],
+    "contamination": [0.05, 0.1, 0.2, 0.3],
+    "threshold": [-0.1, -0.05, 0.0, 0.05],
+    "persistence": [1.0, 3.0, 5.0],     # seconds of anomaly (PERSISTENCE_SECONDS)
+}
+PARAMETERS = list(SWEEP_GRID)
+
+RESULT_COLUMNS = PARAMETERS + [
+    "precision", "recall", "f1", "ttd_mean_s", "ttd_max_s", "detected", "false_alarms",
+]
+
+
+# =====================================================
+# SEARCH SPACE
+# =====================================================
+def configurations(grid, samples=None, seed=42):
+    """Every grid point, or `samples` of them drawn at random."""
+    points = [dict(zip(PARAMETERS, values)) for values in itertools.product(*(grid[p] for p in PARAMETERS))]
+    if samples is not None and samples < len(points):
+        points = random.Random(seed).sample(points, samples)
+    return points
+
+
+# =====================================================
+# FEATURES (one matrix per window size)
+# =====================================================
+def sample_features(frames, window_size):
+    """(X, timestamps) of one recording; windows are stamped with their last frame."""
+    if window_size == 1:
+        return extract_features(frames), frames["timestamp"].to_numpy(dtype=float)
+
+    X = window_features(frames, window_size, stride=window_size)
+    ends = np.arange(len(X)) * window_size + window_size - 1
+    return X.values, frames["timestamp"].to_numpy(dtype=float)[ends]
+
+
+def build_features(normal, attacks, window_size, workdir):
+    """
+    Scaled train/eval matrices of one window size, written as .npy so every
+    worker maps the same copy. The evaluation set is one scenario per attack
+    recording: the held-out normal tail followed by that recording.
+    """
+    train, holdout = [], []
+    for frames in normal:
+        X, t = sample_features(frames, window_size)
+        split = int(len(X) * (1 - HOLDOUT))
+        train.append(X[:split])
+        holdout.append((X[split:], t[split:]))
+
+    X_normal = np.concatenate([X for X, _ in holdout])
+    t_normal = np.concatenate([t for _, t in holdout])
+
+    X_eval, labels, times, scenario = [], [], [], []
+    for i, frames in enumerate(attacks):
+        X, t = sample_features(frames, window_size)
+        X_eval += [X_normal, X]
+        labels += [np.zeros(len(X_normal), dtype=bool), np.ones(len(X), dtype=bool)]
+        times += [t_normal, t]
+        scenario.append(np.full(len(X_normal) + len(X), i))
+
+    scaler = StandardScaler()
+    arrays = {
+        "train": scaler.fit_transform(np.concatenate(train)),
+        "eval": scaler.transform(np.concatenate(X_eval)),
+        "labels": np.concatenate(labels),
+        "times": np.concatenate(times),
+        "scenario": np.concatenate(scenario),
+    }
+
+    paths = {}
+    for name, array in arrays.items():
+        paths[name] = os.path.join(workdir, f"w{window_size}-{name}.npy")
+        np.save(paths[name], array)
+    return paths
+
+
+# =====================================================
+# MODELS (one fit per window size and forest size)
+# =====================================================
+def fit_scores(features, n_estimators, groups, workdir, tag):
+    """
+    Fit one IsolationForest per column group (None: all columns) and keep
+    their raw scores, one column per group. Contamination only sets the
+    offset subtracted from these scores, so one fit covers all of them.
+    """
+    train = np.load(features["train"], mmap_mode="r")
+    groups = groups or [list(range(train.shape[1]))]
+    models = [IsolationForest(n_estimators=n_estimators, random_state=42).fit(train[:, g]) for g in groups]
+
+    paths = {}
+    for name in ["train", "eval"]:
+        X = np.load(features[name], mmap_mode="r")
+        paths[name] = os.path.join(workdir, f"{tag}-scores-{name}.npy")
+        np.save(paths[name], np.column_stack([m.score_samples(X[:, g]) for m, g in zip(models, groups)]))
+    return paths
+
+
+# =====================================================
+# DETECTION (threshold x persistence on cached scores)
+# =====================================================
+def run_scenario(scores, times, labels, threshold, persistence):
+    """State machine over one scenario: (alarm per sample, time to detect, false alarms)."""
+    machine = AnomalyStateMachine(threshold, persistence)
+    alarm = np.zeros(len(scores), dtype=bool)
+    detected_at = None
+    false_alarms = 0
+
+    for i, score in enumerate(scores.tolist()):
+        if machine.update(score, times[i]) == "ATTACK" and not labels[i]:
+            false_alarms += 1
+        alarm[i] = machine.state == "ATTACK"
+        if alarm[i] and labels[i] and detected_at is None:
+            detected_at = times[i]
+
+    onset = times[np.argmax(labels)]
+    ttd = detected_at - onset if detected_at is not None else np.nan
+    return alarm, ttd, false_alarms
+
+
+def evaluate(features, scores, params, contamination, thresholds, persistences):
+    """Result rows for one fitted model and contamination."""
+    # Per-group offsets, then the lowest group decides (as GroupedForest)
+    train_scores = np.load(scores["train"], mmap_mode="r")
+    offset = np.percentile(train_scores, 100 * contamination, axis=0)
+    decision = (np.load(scores["eval"]) - offset).min(axis=1)
+
+    labels = np.load(features["labels"])
+    times = np.load(features["times"])
+    scenario = np.load(features["scenario"])
+    bounds = np.flatnonzero(np.r_[True, scenario[1:] != scenario[:-1], True])
+
+    rows = []
+    for threshold, persistence in itertools.product(thresholds, persistences):
+        alarm = np.zeros(len(decision), dtype=bool)
+        ttds, false_alarms = [], 0
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            alarm[start:end], ttd, fa = run_scenario(
+                decision[start:end], times[start:end], labels[start:end], threshold, persistence
+            )
+            ttds.append(ttd)
+            false_alarms += fa
+
+        hits = np.count_nonzero(alarm & labels)
+        precision = hits / max(np.count_nonzero(alarm), 1)
+        recall = hits / max(np.count_nonzero(labels), 1)
+        f1 = 2 * precision * recall / (precision + recall) if hits else 0.0
+        ttds = np.array(ttds)
+        found = ttds[~np.isnan(ttds)]
+
+        rows.append(dict(
+            params,
+            contamination=contamination,
+            threshold=threshold,
+            persistence=persistence,
+            precision=round(precision, 4),
+            recall=round(recall, 4),
+            f1=round(f1, 4),
+            ttd_mean_s=round(float(found.mean()), 3) if len(found) else np.nan,
+            ttd_max_s=round(float(found.max()), 3) if len(found) else np.nan,
+            detected=f"{len(found)}/{len(ttds)}",
+            false_alarms=false_alarms,
+        ))
+    return rows
+
+
+# =====================================================
+# SWEEP
+# =====================================================
+def sweep(normal_files, attack_files, points, jobs=None, workdir=None):
+    """
+    Evaluate `points` (dicts of PARAMETERS). Work is staged so each stage
+    only runs once per distinct value of the parameters it depends on:
+    features per window size, model fits per (window size, n_estimators),
+    state machines per full configuration.
+    """
+    start = time.perf_counter()
+    # Frame features come from the feature store, rebuilt only when a recording changes
+    normal = [stream_feature_set(path).frame() for path in normal_files]
+    attacks = [stream_feature_set(path).frame() for path in attack_files]
+    print(f"[SWEEP] {sum(map(len, normal))} normal / {sum(map(len, attacks))} attack frames "
+          f"loaded in {time.perf_counter() - start:.1f}s")
+
+    windows = sorted({p["window_size"] for p in points})
+    models = sorted({(p["window_size"], p["n_estimators"]) for p in points})
+    groups = {}
+    for p in points:
+        key = (p["window_size"], p["n_estimators"], p["contamination"])
+        thresholds, persistences = groups.setdefault(key, (set(), set()))
+        thresholds.add(p["threshold"])
+        persistences.add(p["persistence"])
+
+    print(f"[SWEEP] {len(points)} configurations -> {len(windows)} feature sets, "
+          f"{len(models)} model fits, {len(groups)} scoring groups")
+
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp, ProcessPoolExecutor(jobs) as pool:
+        t = time.perf_counter()
+        futures = {w: pool.submit(build_features, normal, attacks, w, tmp) for w in windows}
+        features = {w: f.result() for w, f in futures.items()}
+        print(f"[SWEEP] features: {time.perf_counter() - t:.1f}s")
+
+        t = time.perf_counter()
+        futures = {
+            (w, n): pool.submit(
+                fit_scores, features[w], n, FEATURE_GROUP_COLUMNS if w == 1 else None, tmp, f"w{w}-n{n}"
+            )
+            for w, n in models
+        }
+        scores = {key: f.result() for key, f in futures.items()}
+        print(f"[SWEEP] models: {time.perf_counter() - t:.1f}s")
+
+        t = time.perf_counter()
+        futures = [
+            pool.submit(
+                evaluate, features[w], scores[(w, n)],
+                {"window_size": w, "n_estimators": n}, c, sorted(thresholds), sorted(persistences)
+            )
+            for (w, n, c), (thresholds, persistences) in groups.items()
+        ]
+        rows = [row for f in futures for row in f.result()]
+        print(f"[SWEEP] detection: {time.perf_counter() - t:.1f}s")
+
+    # A random search shares model fits with unsampled grid points; keep only the sampled ones
+    wanted = {tuple(p[name] for name in PARAMETERS) for p in points}
+    results = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    results = results[[tuple(r) in wanted for r in results[PARAMETERS].itertuples(index=False)]]
+
+    results = results.sort_values(
+        ["f1", "ttd_mean_s", "false_alarms"], ascending=[False, True, True], na_position="last"
+    ).reset_index(drop=True)
+    results.index = pd.RangeIndex(1, len(results) + 1, name="rank")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid/random search over detector parameters")
+    parser.add_argument("--normal", nargs="+", default=NORMAL_FILES,
+                        help="normal-behaviour telemetry (CSVs or segment directories)")
+    parser.add_argument("--attack", nargs="+", default=ATTACK_FILES,
+                        help="attack recordings, each evaluated after the held-out normal data")
+    for name, values in SWEEP_GRID.items():
+        parser.add_argument("--" + name.replace("_", "-"), nargs="+", default=values,
+                            type=float if isinstance(values[0], float) else int)
+    parser.add_argument("--random", type=int, default=None, metavar="N",
+                        help="evaluate N random grid points instead of the full grid")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--out", default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    grid = {name: getattr(args, name) for name in PARAMETERS}
+    points = configurations(grid, args.random, args.seed)
+
+    start = time.perf_counter()
+    results = sweep(args.normal, args.attack, points, args.jobs)
+    print(f"[SWEEP] {len(results)} configurations in {time.perf_counter() - start:.1f}s")
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    results.to_csv(args.out)
+    print(f"[SWEEP] Ranked results written to {args.out}\n")
+    print(results.head(SHOW_TOP).to_string())
+
+    if len(results):
+        best = results.iloc[0]
+        print(
+            f"\n[SWEEP] Best: N_ESTIMATORS={best['n_estimators']}, CONTAMINATION={best['contamination']}, "
+            f"ANOMALY_THRESHOLD={best['threshold']}, PERSISTENCE_SECONDS={best['persistence']} "
+            f"(window_size={best['window_size']})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import argparse
+import platform
+import time
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+from config.stream_config import CSV_STREAM_DIR
+from ml.baseline import normal_mask
+from ml.live_detection import (
+    ANOMALY_THRESHOLD,
+    CONTAMINATION,
+    EVENT_DB,
+    FEATURE_GROUP_COLUMNS,
+    FEATURES,
+    N_ESTIMATORS,
+    SIGNAL_FEATURES,
+    extract_features,
+)
+from ml.fast_autoencoder import AUTOENCODER_FILE, compile_autoencoder, fit_autoencoder, save_autoencoder
+from ml.fast_forest import COMPILED_FILE, save_compiled
+from ml.model_artifact import ARTIFACT_FILE, ARTIFACT_VERSION, Detector, GroupedForest, save_artifact
+from ml.stream_features import StreamFeatures
+from ml.stream_reader import stream_frame
+from receiver.segment_store import epoch_seconds, read_segments, segment_directory
+
+
+def fit_detector(X, sources=None):
+    """Fit scaler + one IsolationForest per feature group on normal-behaviour rows."""
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    forests = []
+    for columns in FEATURE_GROUP_COLUMNS:
+        forest = IsolationForest(
+            n_estimators=N_ESTIMATORS,
+            contamination=CONTAMINATION,
+            random_state=42
+        )
+        forests.append(forest.fit(X_scaled[:, columns]))
+    model = GroupedForest(forests, FEATURE_GROUP_COLUMNS)
+
+    # Persistence is in seconds (PERSISTENCE_SECONDS) and not stored here
+    thresholds = {
+        "anomaly_threshold": ANOMALY_THRESHOLD,
+    }
+
+    metadata = {
+        "artifact_version": ARTIFACT_VERSION,
+        "trained_at": time.time(),
+        "n_samples": int(len(X)),
+        "sources": list(sources or []),
+        "n_estimators": N_ESTIMATORS,
+        "contamination": CONTAMINATION,
+        "sklearn_version": sklearn.__version__,
+        "numpy_version": np.__version__,
+        "python_version": platform.python_version(),
+    }
+
+    return Detector(scaler, model, thresholds, FEATURES, metadata)
+
+
+def fit_live_autoencoder(detector, X):
+    """Autoencoder on the detector's features and scaling, exported for NumPy scoring."""
+    model = fit_autoencoder(detector.scaler.transform(X))
+    return compile_autoencoder(
+        model, detector.scaler, X, detector.features, dict(detector.metadata)
+    )
+
+
+def load_training_data(paths, event_db=None, start=None, end=None):
+    """
+    Telemetry CSVs or segmented stores (only the segments overlapping
+    [start, end) are read).
+    """
+    frames = []
+    for path in paths:
+        directory = segment_directory(path)
+        if directory is not None:
+            raw = read_segments(directory, start, end)
+        else:
+            raw = pd.read_csv(path, on_bad_lines="skip")
+
+        # Simulator CSVs carry ISO timestamps, live logs epoch seconds
+        raw["timestamp"] = epoch_seconds(raw["timestamp"])
+
+        df = stream_frame(raw, ["timestamp"] + SIGNAL_FEATURES).drop_duplicates()
+
+        # Timing features per recording, in arrival order
+        frames.append(StreamFeatures().transform(df))
+
+    df = pd.concat(frames, ignore_index=True)
+
+    if event_db is not None:
+        # Keep only frames recorded while the detector reported NORMAL
+        df = df[normal_mask(df["timestamp"], event_db)]
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the live CPS detector artifact")
+    parser.add_argument("csv", nargs="*", default=[CSV_STREAM_DIR],
+                        help="recorded normal-behaviour telemetry CSVs or segment directories")
+    parser.add_argument("--out", default=ARTIFACT_FILE)
+    parser.add_argument("--compiled-out", default=COMPILED_FILE,
+                        help="NumPy-only scorer export used by the live detector")
+    parser.add_argument("--ae-out", default=AUTOENCODER_FILE,
+                        help="exported autoencoder weights (float32 forward pass)")
+    parser.add_argument("--normal-only", action="store_true",
+                        help=f"drop frames from ATTACK/RECOVERY periods in {EVENT_DB}")
+    parser.add_argument("--start", type=float, default=None,
+                        help="epoch seconds; segment directories are read from here on")
+    parser.add_argument("--end", type=float, default=None)
+    args = parser.parse_args()
+
+    print("[TRAIN] Loading training data")
+    df = load_training_data(args.csv, EVENT_DB if args.normal_only else None, args.start, args.end)
+    print(f"[TRAIN] {len(df)} samples from {len(args.csv)} file(s)")
+
+    detector = fit_detector(extract_features(df), sources=args.csv)
+    save_artifact(detector, args.out)
+    save_compiled(detector, args.compiled_out)
+    save_autoencoder(fit_live_autoencoder(detector, extract_features(df)), args.ae_out)
+
+    print(f"[TRAIN] Detector artifact written to {args.out}")
+    print(f"[TRAIN] Compiled scorer written to {args.compiled_out}")
+    print(f"[TRAIN] Autoencoder weights written to {args.ae_out}")
+
+
+if __name__ == "__main__":
+    main()
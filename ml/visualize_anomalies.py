@@ -1,18 +1,15 @@
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
 
-# Load data
-df = pd.read_csv("data/processed/features.csv")
+from ml.feature_store import window_feature_set
 
-X = df.drop(columns=["label"])
-y = df["label"]
+# Load data (feature store: built once per raw input, memory-mapped)
+features = window_feature_set()
+y = features.labels
 
-# Scale
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
+# Scale (stored with the features)
+X_scaled = features.scaled
 
 # Isolation Forest
 iso = IsolationForest(contamination=0.3, random_state=42)
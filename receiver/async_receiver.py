@@ -0,0 +1,203 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import can
+
+from config.can_config import CAN_INTERFACE, CAN_CHANNEL
+from config.stream_config import LOG_FORMAT, BINARY_STREAM_FILE
+from cps.can.decoder import CANDecoder
+from cps.metrics import FRAMES_DROPPED, FRAMES_IN, REGISTRY, start_metrics
+from receiver.can_receiver import OUTPUT_DIR, open_output
+from receiver.data_logger import FrameLogWriter
+
+# =====================================================
+# PARAMETERS
+# =====================================================
+QUEUE_SIZE = 10000      # frames buffered between socket and disk
+WRITE_BATCH = 512       # max frames per persistence call
+STATS_INTERVAL = 5      # seconds between queue/drop reports
+
+
+class ReceiverStats:
+    def __init__(self):
+        self.received = 0
+        self.written = 0
+        self.dropped = 0
+        self.peak_depth = 0
+        self.batches = 0
+
+
+# =====================================================
+# PERSISTENCE SINKS (run on the writer thread)
+# =====================================================
+class CSVSink:
+    def __init__(self, decoder, directory=OUTPUT_DIR):
+        self.decoder = decoder
+        self._writer, self._compactor = open_output(decoder, directory)
+        self._undecodable = REGISTRY.counter(*FRAMES_DROPPED, reason="undecodable")
+        self._decode = REGISTRY.stage("decode")
+        self._persist = REGISTRY.stage("persist")
+
+    def write(self, batch):
+        # Decode CPS sensor data (table-driven) for the whole batch
+        start = time.perf_counter()
+        rows = []
+        for timestamp, arbitration_id, data in batch:
+            row = self.decoder.decode(arbitration_id, data)
+            if row is not None:
+                rows.append([timestamp] + row + [arbitration_id])
+        decoded = time.perf_counter()
+        self._decode.observe(decoded - start)
+        self._undecodable.inc(len(batch) - len(rows))
+
+        if rows:
+            self._writer.write_rows(rows)
+            self._writer.flush()
+            self._persist.observe(time.perf_counter() - decoded)
+
+    def close(self):
+        self._writer.close()
+        self._compactor.stop()
+
+
+class BinarySink:
+    def __init__(self, path=BINARY_STREAM_FILE):
+        self._writer = FrameLogWriter(path)
+        self._persist = REGISTRY.stage("persist")
+
+    def write(self, batch):
+        start = time.perf_counter()
+        for timestamp, arbitration_id, data in batch:
+            self._writer.append(timestamp, arbitration_id, data)
+        self._writer.flush()
+        self._persist.observe(time.perf_counter() - start)
+
+    def close(self):
+        self._writer.close()
+
+
+# =====================================================
+# PIPELINE
+# =====================================================
+async def drain_bus(reader, queue, stats):
+    """Move frames off the socket as fast as they arrive; never waits on disk."""
+    frames_in = REGISTRY.counter(*FRAMES_IN)
+    queue_full = REGISTRY.counter(*FRAMES_DROPPED, reason="queue_full")
+
+    async for msg in reader:
+        stats.received += 1
+        frames_in.inc()
+        try:
+            # Bus receive time (kernel timestamp on socketcan), not the
+            # time this loop got to the frame
+            queue.put_nowait((msg.timestamp, msg.arbitration_id, bytes(msg.data)))
+        except asyncio.QueueFull:
+            stats.dropped += 1
+            queue_full.inc()
+            continue
+
+        depth = queue.qsize()
+        if depth > stats.peak_depth:
+            stats.peak_depth = depth
+
+
+async def persist(queue, sink, stats, executor):
+    """Write queued frames in batches on a worker thread."""
+    loop = asyncio.get_running_loop()
+
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < WRITE_BATCH and not queue.empty():
+            batch.append(queue.get_nowait())
+
+        # Shielded: if this task is cancelled on shutdown, the batch already
+        # taken off the queue is still written (run() waits for the executor)
+        await asyncio.shield(loop.run_in_executor(executor, write_batch, sink, batch, stats))
+        for _ in batch:
+            queue.task_done()
+
+
+def write_batch(sink, batch, stats):
+    sink.write(batch)
+    stats.written += len(batch)
+    stats.batches += 1
+
+
+async def report(queue, stats):
+    while True:
+        await asyncio.sleep(STATS_INTERVAL)
+        print(
+            f"[RECEIVER] Received: {stats.received} | Written: {stats.written} | "
+            f"Dropped: {stats.dropped} | Queue: {queue.qsize()}/{queue.maxsize} "
+            f"(peak {stats.peak_depth}) | Batches: {stats.batches}"
+        )
+        stats.peak_depth = queue.qsize()
+
+
+async def run(bus, sink, stats=None):
+    stats = stats or ReceiverStats()
+    loop = asyncio.get_running_loop()
+
+    reader = can.AsyncBufferedReader()
+    notifier = can.Notifier(bus, [reader], loop=loop)
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="can-writer")
+
+    tasks = [
+        asyncio.create_task(drain_bus(reader, queue, stats)),
+        asyncio.create_task(persist(queue, sink, stats, executor)),
+        asyncio.create_task(report(queue, stats)),
+    ]
+
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        notifier.stop()
+        for task in tasks:
+            task.cancel()
+
+        # Let an in-flight batch finish, then flush what is still queued
+        executor.shutdown(wait=True)
+
+        remaining = []
+        while not queue.empty():
+            remaining.append(queue.get_nowait())
+        if remaining:
+            sink.write(remaining)
+            stats.written += len(remaining)
+
+
+def main():
+    decoder = CANDecoder()
+
+    bus = can.interface.Bus(
+        channel=CAN_CHANNEL,
+        interface=CAN_INTERFACE,
+        can_filters=decoder.can_filters()
+    )
+    sink = BinarySink() if LOG_FORMAT == "binary" else CSVSink(decoder)
+    stats = ReceiverStats()
+
+    print(f"[RECEIVER] Async receiver listening on CAN bus ({LOG_FORMAT} log)...")
+    metrics = start_metrics("receiver")
+
+    try:
+        asyncio.run(run(bus, sink, stats))
+
+    except KeyboardInterrupt:
+        print("\n[RECEIVER] Receiver stopped by user")
+
+    finally:
+        sink.close()
+        bus.shutdown()
+        metrics.stop()
+        print(
+            f"[RECEIVER] Received: {stats.received} | Written: {stats.written} | "
+            f"Dropped: {stats.dropped}"
+        )
+        print("[RECEIVER] CAN bus closed cleanly")
+
+
+if __name__ == "__main__":
+    main()
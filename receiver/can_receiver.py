@@ -1,50 +1,109 @@
 import can
-import csv
 import time
-import os
 from config.can_config import CAN_INTERFACE, CAN_CHANNEL
+from config.stream_config import LOG_FORMAT, CSV_STREAM_DIR, BINARY_STREAM_FILE
+from cps.can.decoder import CANDecoder
+from cps.metrics import FRAMES_DROPPED, FRAMES_IN, REGISTRY, start_metrics
+from receiver.data_logger import FrameLogWriter, FLUSH_INTERVAL
+from receiver.segment_store import Compactor, SegmentWriter
 
-OUTPUT_FILE = "data/live/can_stream.csv"
+OUTPUT_DIR = CSV_STREAM_DIR
 
 
-def ensure_output():
-    os.makedirs("data/live", exist_ok=True)
-    if not os.path.exists(OUTPUT_FILE):
-        with open(OUTPUT_FILE, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(["timestamp", "speed", "brake", "steering"])
+def csv_header(decoder):
+    return ["timestamp"] + decoder.signal_names + ["arbitration_id"]
+
+
+def open_output(decoder, directory=OUTPUT_DIR):
+    """Segmented CSV log plus the process that compacts and expires its sealed segments."""
+    compactor = Compactor(directory, tag="[RECEIVER]").start()
+    return SegmentWriter(directory, csv_header(decoder), compactor=compactor), compactor
+
+
+def receive_binary(bus, decoder):
+    """Raw frames into the buffered binary log, flushed in batches."""
+    writer = FrameLogWriter(BINARY_STREAM_FILE)
+    frames_in = REGISTRY.counter(*FRAMES_IN)
+    persist = REGISTRY.stage("persist")
+
+    try:
+        while True:
+            # Time out so buffered frames still get flushed on a quiet bus
+            msg = bus.recv(timeout=FLUSH_INTERVAL)
+            if msg is None:
+                writer.flush_if_due()
+                continue
+
+            frames_in.inc()
+            start = time.perf_counter()
+            # Kernel receive time on socketcan, not when this loop got the frame
+            writer.append(msg.timestamp, msg.arbitration_id, msg.data)
+            persist.observe(time.perf_counter() - start)
+
+    finally:
+        writer.close()
+
+
+def receive_csv(bus, decoder):
+    writer, compactor = open_output(decoder)
+    frames_in = REGISTRY.counter(*FRAMES_IN)
+    undecodable = REGISTRY.counter(*FRAMES_DROPPED, reason="undecodable")
+    decode = REGISTRY.stage("decode")
+    persist = REGISTRY.stage("persist")
+
+    try:
+        while True:
+            # Time out so buffered rows still get flushed on a quiet bus
+            msg = bus.recv(timeout=writer.flush_interval)
+            if msg is None:
+                writer.flush()
+                continue
+
+            timestamp = msg.timestamp
+            frames_in.inc()
+
+            # Decode CPS sensor data (table-driven, see CAN_SIGNALS)
+            start = time.perf_counter()
+            row = decoder.decode(msg.arbitration_id, msg.data)
+            decoded = time.perf_counter()
+            decode.observe(decoded - start)
+            if row is None:
+                undecodable.inc()
+                continue
+
+            writer.write_row([timestamp] + row + [msg.arbitration_id])
+            persist.observe(time.perf_counter() - decoded)
+
+    finally:
+        writer.close()
+        compactor.stop()
 
 
 def main():
-    ensure_output()
+    decoder = CANDecoder()
 
+    # Kernel-level filters: frames with other ids never reach Python
     bus = can.interface.Bus(
         channel=CAN_CHANNEL,
-        interface=CAN_INTERFACE
+        interface=CAN_INTERFACE,
+        can_filters=decoder.can_filters()
     )
 
-    print("[RECEIVER] Listening on CAN bus...")
+    print(f"[RECEIVER] Listening on CAN bus ({LOG_FORMAT} log)...")
+    metrics = start_metrics("receiver")
 
     try:
-        with open(OUTPUT_FILE, "a", newline="") as f:
-            writer = csv.writer(f)
-
-            for msg in bus:
-                timestamp = time.time()
-
-                # Decode CPS sensor data
-                speed = msg.data[0]
-                brake = msg.data[1]
-                steering = msg.data[2]
-
-                writer.writerow([timestamp, speed, brake, steering])
-                f.flush()
+        if LOG_FORMAT == "binary":
+            receive_binary(bus, decoder)
+        else:
+            receive_csv(bus, decoder)
 
     except KeyboardInterrupt:
         print("\n[RECEIVER] Receiver stopped by user")
 
     finally:
         bus.shutdown()
+        metrics.stop()
         print("[RECEIVER] CAN bus closed cleanly")
 
 
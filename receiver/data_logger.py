@@ -0,0 +1,160 @@
+import os
+import struct
+import time
+
+import numpy as np
+
+# =====================================================
+# BINARY FRAME LOG FORMAT
+# =====================================================
+# 16-byte file header followed by fixed-width 24-byte records:
+#   timestamp (f8) | arbitration_id (u4) | dlc (u1) | data (8 x u1) | pad (3)
+MAGIC = b"CPSFRM01"
+FRAME_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("arbitration_id", "<u4"),
+    ("dlc", "u1"),
+    ("data", "u1", (8,)),
+    ("_pad", "u1", (3,)),
+])
+# Same layout packed from Python on the write path
+RECORD_STRUCT = struct.Struct("<dIB8s3x")
+assert RECORD_STRUCT.size == FRAME_DTYPE.itemsize
+
+HEADER = MAGIC + np.array([FRAME_DTYPE.itemsize, 0], dtype="<u4").tobytes()
+HEADER_SIZE = len(HEADER)
+
+BATCH_SIZE = 512        # records buffered before a write
+FLUSH_INTERVAL = 0.5    # max seconds a record may sit in the buffer
+
+
+class FrameLogWriter:
+    """
+    Append-only binary CAN frame log.
+    Records are buffered and written in batches, at the latest every
+    `flush_interval` seconds.
+    """
+
+    def __init__(self, path, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+
+        self.batch_size = batch_size
+        self._buffer = bytearray(batch_size * RECORD_STRUCT.size)
+        self._count = 0
+        self._last_flush = time.monotonic()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._f = self._open()
+
+    def _open(self):
+        path = self.path
+
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER_SIZE:
+            with open(path, "rb") as f:
+                if f.read(HEADER_SIZE) != HEADER:
+                    raise ValueError(f"{path} is not a CPS frame log")
+
+            # Drop a partial record left behind by a crash
+            size = os.path.getsize(path)
+            whole = HEADER_SIZE + (size - HEADER_SIZE) // FRAME_DTYPE.itemsize * FRAME_DTYPE.itemsize
+            f = open(path, "r+b")
+            f.truncate(whole)
+            f.seek(whole)
+            return f
+
+        f = open(path, "wb")
+        f.write(HEADER)
+        f.flush()
+        return f
+
+    def append(self, timestamp, arbitration_id, data):
+        RECORD_STRUCT.pack_into(
+            self._buffer,
+            self._count * RECORD_STRUCT.size,
+            timestamp,
+            arbitration_id,
+            len(data),
+            bytes(data)
+        )
+        self._count += 1
+
+        if self._count == self.batch_size:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        if self._count and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self._count:
+            with memoryview(self._buffer) as view:
+                self._f.write(view[:self._count * RECORD_STRUCT.size])
+            self._f.flush()
+            self._count = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self._f.close()
+
+
+class FrameLogReader:
+    """
+    Memory-mapped reader for a binary frame log.
+    Returned record arrays are views into the mapping (no copy, no parsing).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._records = np.zeros(0, dtype=FRAME_DTYPE)
+        self._size = 0
+
+    def _refresh(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return self._records
+
+        if size == self._size:
+            return self._records
+
+        if size < self._size:
+            # Log was recreated
+            self._records = np.zeros(0, dtype=FRAME_DTYPE)
+
+        count = (size - HEADER_SIZE) // FRAME_DTYPE.itemsize
+        self._size = size
+        if count <= 0:
+            return self._records
+
+        with open(self.path, "rb") as f:
+            if f.read(HEADER_SIZE) != HEADER:
+                raise ValueError(f"{self.path} is not a CPS frame log")
+
+        self._records = np.memmap(
+            self.path,
+            dtype=FRAME_DTYPE,
+            mode="r",
+            offset=HEADER_SIZE,
+            shape=(count,)
+        )
+        return self._records
+
+    def __len__(self):
+        return len(self._refresh())
+
+    def recent(self, n):
+        """The last n records."""
+        records = self._refresh()
+        return records[max(0, len(records) - n):]
+
+    def since(self, index):
+        """Records from `index` onwards and the index to pass next time."""
+        records = self._refresh()
+        if index > len(records):
+            # Log was recreated, start over
+            index = 0
+        return records[index:], len(records)
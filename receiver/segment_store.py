@@ -0,0 +1,464 @@
+import argparse
+import csv
+import io
+import math
+import multiprocessing
+import os
+import re
+import signal
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# =====================================================
+# SEGMENTED TELEMETRY STORE
+# =====================================================
+# <directory>/current.csv                       segment being appended to
+# <directory>/seg-<start>-<end>.csv             sealed, waiting for compaction
+# <directory>/seg-<start>-<end>.parquet|.npz    compacted (columnar, compressed)
+#
+# <start>/<end> are epoch milliseconds bounding every row in the segment, so
+# readers pick the segments of a time range from the file names alone.
+ACTIVE_SEGMENT = "current.csv"
+SEGMENT_PATTERN = re.compile(r"^seg-(\d+)-(\d+)\.(csv|parquet|npz)$")
+
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024    # seal the active segment at this size
+SEGMENT_MAX_AGE = 600                   # ... or this many seconds after its first row
+FLUSH_ROWS = 512                        # rows buffered before a write reaches the file
+FLUSH_INTERVAL = 0.1                    # max seconds a row may sit in the buffer
+COMPACT_INTERVAL = 30                   # seconds between compactor passes
+
+RETENTION_SECONDS = 7 * 24 * 3600       # None keeps segments forever
+RETENTION_BYTES = 2 * 1024 ** 3         # None: no size cap
+
+# Compacted formats, best first
+COMPACTED_FORMATS = ("parquet", "npz")
+
+Segment = namedtuple("Segment", ["path", "start", "end", "format", "size"])
+
+
+def segment_name(start, end, fmt="csv"):
+    return f"seg-{int(math.floor(start * 1000)):015d}-{int(math.ceil(end * 1000)):015d}.{fmt}"
+
+
+def segment_directory(path):
+    """The store directory for a store or its active segment path, else None."""
+    if os.path.isdir(path):
+        return path
+    if os.path.basename(path) == ACTIVE_SEGMENT:
+        return os.path.dirname(path)
+    return None
+
+
+def epoch_seconds(values):
+    """Epoch-second floats from numeric or ISO (UTC) timestamps."""
+    numeric = pd.to_numeric(values, errors="coerce")
+    if numeric.notna().any() or len(values) == 0:
+        return numeric.astype(float)
+    return (pd.to_datetime(values, errors="coerce") - pd.Timestamp(0)).dt.total_seconds()
+
+
+# =====================================================
+# WRITER
+# =====================================================
+class SegmentWriter:
+    """
+    Append-only CSV telemetry, split into segments.
+
+    Rows go to current.csv. Once it exceeds max_bytes or max_age it is
+    sealed (renamed to its seg-<start>-<end>.csv name) and a new one is
+    started; tailers following current.csv see this as a rotation.
+    Segment bounds are wall-clock times, so rows appended to current.csv
+    by other processes (attack scripts) fall inside them too.
+
+    Rows are buffered and flushed every `flush_rows` rows or, on the next
+    write, once `flush_interval` has passed; the segment size is counted
+    here, so a write costs no syscall until then.
+    """
+
+    def __init__(self, directory, header, max_bytes=SEGMENT_MAX_BYTES,
+                 max_age=SEGMENT_MAX_AGE, compactor=None,
+                 flush_rows=FLUSH_ROWS, flush_interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.header = list(header)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compactor = compactor
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.path = os.path.join(directory, ACTIVE_SEGMENT)
+
+        # Rows are formatted here, then written to the file in one call
+        self._text = io.StringIO()
+        self._writer = csv.writer(self._text)
+
+        os.makedirs(directory, exist_ok=True)
+        self._open()
+
+    def _open(self):
+        resume = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+        self._f = open(self.path, "a", newline="")
+        self.start = None
+        self._size = os.path.getsize(self.path)
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+        if resume:
+            # Left behind by a crash: keep appending, it started at its first row
+            self.start = _first_row_time(self.path)
+        else:
+            self._append([self.header])
+            self._f.flush()
+
+    def _append(self, rows):
+        self._text.seek(0)
+        self._text.truncate()
+        self._writer.writerows(rows)
+        text = self._text.getvalue()
+        self._f.write(text)
+        self._size += len(text)     # numeric rows: one byte per character
+
+    def write_rows(self, rows):
+        now = time.monotonic()
+        if self.start is None:
+            self.start = time.time()
+
+        self._append(rows)
+        self._pending += len(rows)
+
+        if self._pending >= self.flush_rows or now - self._last_flush >= self.flush_interval:
+            self.flush()
+
+        if self._size >= self.max_bytes or time.time() - self.start >= self.max_age:
+            self.rotate()
+
+    def write_row(self, row):
+        self.write_rows([row])
+
+    def flush(self):
+        self._f.flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def seal(self):
+        """Close the active segment under its final name. Returns the path, or None if empty."""
+        self._f.close()
+        if self.start is None:
+            return None
+
+        end = time.time()
+        sealed = os.path.join(self.directory, segment_name(self.start, end))
+        while os.path.exists(sealed):
+            end += 0.001
+            sealed = os.path.join(self.directory, segment_name(self.start, end))
+
+        os.replace(self.path, sealed)
+        if self.compactor is not None:
+            self.compactor.wake()
+        return sealed
+
+    def rotate(self):
+        self.seal()
+        self._open()
+
+    def close(self):
+        self.seal()
+
+
+def _first_row_time(path):
+    with open(path) as f:
+        f.readline()
+        first = f.readline().split(",", 1)[0]
+    start = epoch_seconds(pd.Series([first])).iloc[0]
+    return float(start) if pd.notna(start) else os.path.getmtime(path)
+
+
+# =====================================================
+# SEGMENT LISTING / READING
+# =====================================================
+def list_segments(directory):
+    """Sealed segments ordered by start; a compacted copy wins over its CSV."""
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+
+    by_stem = {}
+    for name in names:
+        match = SEGMENT_PATTERN.match(name)
+        if match is None:
+            continue
+        start, end, fmt = int(match.group(1)) / 1000, int(match.group(2)) / 1000, match.group(3)
+        stem = name.rsplit(".", 1)[0]
+
+        current = by_stem.get(stem)
+        if current is not None and current.format != "csv":
+            continue
+
+        path = os.path.join(directory, name)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            continue
+        by_stem[stem] = Segment(path, start, end, fmt, size)
+
+    return sorted(by_stem.values(), key=lambda s: s.start)
+
+
+def _read_columnar(path, columns=None):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns)
+    with np.load(path, allow_pickle=False) as data:
+        names = columns if columns is not None else data.files
+        return pd.DataFrame({name: data[name] for name in names if name in data.files})
+
+
+def _read_csv(path, columns=None):
+    df = pd.read_csv(path, on_bad_lines="skip")
+    if columns is not None:
+        df = df[[name for name in columns if name in df.columns]]
+    df["timestamp"] = epoch_seconds(df["timestamp"])
+    return df
+
+
+def load_segment(segment, columns=None):
+    """Rows of one segment (timestamps as epoch seconds). Empty if it has expired."""
+    stem = segment.path.rsplit(".", 1)[0]
+    candidates = [segment.path] + [f"{stem}.{fmt}" for fmt in COMPACTED_FORMATS]
+
+    for path in candidates:
+        try:
+            if path.endswith(".csv"):
+                return _read_csv(path, columns)
+            return _read_columnar(path, columns)
+        except FileNotFoundError:
+            # Compacted or expired since it was listed
+            continue
+
+    return pd.DataFrame(columns=columns or [])
+
+
+def read_segments(directory, start=None, end=None, columns=None):
+    """
+    Rows with start <= timestamp < end. Only segments whose name range
+    overlaps [start, end) are opened.
+    """
+    if columns is not None and "timestamp" not in columns:
+        columns = ["timestamp"] + list(columns)
+
+    # Active segment first: if it is sealed meanwhile it shows up in the
+    # listing below and the overlap is dropped as duplicates
+    active = os.path.join(directory, ACTIVE_SEGMENT)
+    frames = []
+    try:
+        frames.append(_read_csv(active, columns))
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        pass
+
+    sealed = [
+        segment for segment in list_segments(directory)
+        if (start is None or segment.end >= start) and (end is None or segment.start < end)
+    ]
+    frames = [load_segment(segment, columns) for segment in sealed] + frames
+    frames = [df for df in frames if not df.empty]
+
+    if not frames:
+        return pd.DataFrame(columns=columns or [])
+
+    df = pd.concat(frames, ignore_index=True).drop_duplicates()
+    keep = np.ones(len(df), dtype=bool)
+    if start is not None:
+        keep &= (df["timestamp"] >= start).to_numpy()
+    if end is not None:
+        keep &= (df["timestamp"] < end).to_numpy()
+    return df[keep].reset_index(drop=True)
+
+
+# =====================================================
+# COMPACTION / RETENTION
+# =====================================================
+def _write_columnar(df, path):
+    """Parquet (zstd) if an engine is installed, else a compressed .npz. Returns the path."""
+    tmp_path = path + ".tmp"
+    if path.endswith(".parquet"):
+        try:
+            df.to_parquet(tmp_path, index=False, compression="zstd")
+            os.replace(tmp_path, path)
+            return path
+        except ImportError:
+            path = path[:-len(".parquet")] + ".npz"
+            tmp_path = path + ".tmp"
+
+    columns = {}
+    for name in df.columns:
+        values = df[name].to_numpy()
+        columns[name] = values.astype(str) if values.dtype == object else values
+
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, **columns)
+    os.replace(tmp_path, path)
+    return path
+
+
+def compact_segment(segment):
+    """Sealed CSV segment -> columnar file with the same name range. Returns the new path."""
+    df = load_segment(segment)
+    for name in df.columns:
+        if name != "timestamp":
+            numeric = pd.to_numeric(df[name], errors="coerce")
+            if numeric.notna().sum() == df[name].notna().sum():
+                df[name] = numeric
+
+    stem = segment.path.rsplit(".", 1)[0]
+    path = _write_columnar(df, f"{stem}.{COMPACTED_FORMATS[0]}")
+
+    # Readers that listed the CSV fall back to the compacted copy
+    try:
+        os.remove(segment.path)
+    except FileNotFoundError:
+        pass
+    return path
+
+
+def apply_retention(directory, max_age=RETENTION_SECONDS, max_bytes=RETENTION_BYTES, now=None):
+    """Delete the oldest sealed segments past max_age or beyond max_bytes in total."""
+    now = time.time() if now is None else now
+    segments = list_segments(directory)
+    total = sum(segment.size for segment in segments)
+
+    removed = []
+    for segment in segments:
+        expired = max_age is not None and segment.end < now - max_age
+        over = max_bytes is not None and total > max_bytes
+        if not (expired or over):
+            break
+        try:
+            os.remove(segment.path)
+        except FileNotFoundError:
+            pass
+        total -= segment.size
+        removed.append(segment)
+    return removed
+
+
+class Compactor:
+    """
+    Compacts sealed segments and applies retention in a child process, so
+    parsing and compressing never hold the writer's GIL.
+    """
+
+    def __init__(self, directory, interval=COMPACT_INTERVAL,
+                 max_age=RETENTION_SECONDS, max_bytes=RETENTION_BYTES, tag="[SEGMENTS]"):
+        self.directory = directory
+        self.interval = interval
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.tag = tag
+
+        self._wake = multiprocessing.Event()
+        self._stop = multiprocessing.Event()
+        self._process = None
+
+    def __getstate__(self):
+        # The child gets everything but its own handle (spawn start method)
+        state = dict(self.__dict__)
+        state["_process"] = None
+        return state
+
+    def start(self):
+        self._process = multiprocessing.Process(
+            target=self._run, name="segment-compactor", daemon=True
+        )
+        self._process.start()
+        return self
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        """Stop after the current pass; what is left is compacted on the next start."""
+        self._stop.set()
+        self._wake.set()
+        if self._process is not None and self._process.is_alive():
+            self._process.join()
+
+    def run_once(self):
+        compacted = 0
+        for segment in list_segments(self.directory):
+            if segment.format != "csv":
+                continue
+            try:
+                compact_segment(segment)
+                compacted += 1
+            except Exception as e:
+                print(f"{self.tag} Compaction of {segment.path} failed: {e}")
+
+        removed = apply_retention(self.directory, self.max_age, self.max_bytes)
+        return compacted, len(removed)
+
+    def _run(self):
+        # Ctrl-C reaches the whole process group; the parent stops us
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        # The first pass also picks up segments sealed while nothing was running
+        while not self._stop.is_set():
+            self.run_once()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+
+# =====================================================
+# CLI
+# =====================================================
+def import_csv(path, directory):
+    """Move a legacy single-file telemetry CSV into the store as a sealed segment."""
+    df = pd.read_csv(path, on_bad_lines="skip", usecols=["timestamp"])
+    timestamps = epoch_seconds(df["timestamp"]).dropna()
+    if timestamps.empty:
+        return None
+
+    os.makedirs(directory, exist_ok=True)
+    sealed = os.path.join(directory, segment_name(timestamps.min(), timestamps.max()))
+    os.replace(path, sealed)
+    return sealed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Segmented telemetry store maintenance")
+    parser.add_argument("directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("ls", help="list segments and their time ranges")
+
+    compact = sub.add_parser("compact", help="compact sealed segments and apply retention")
+    compact.add_argument("--retain-days", type=float, default=RETENTION_SECONDS / 86400)
+    compact.add_argument("--max-gb", type=float, default=RETENTION_BYTES / 1024 ** 3)
+
+    imp = sub.add_parser("import", help="move legacy telemetry CSVs in as sealed segments")
+    imp.add_argument("csv", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "ls":
+        for segment in list_segments(args.directory):
+            print(
+                f"{os.path.basename(segment.path)}  {pd.to_datetime(segment.start, unit='s')} -> "
+                f"{pd.to_datetime(segment.end, unit='s')}  {segment.size / 1024:.0f} KiB"
+            )
+    elif args.command == "compact":
+        compactor = Compactor(
+            args.directory,
+            max_age=args.retain_days * 86400,
+            max_bytes=int(args.max_gb * 1024 ** 3)
+        )
+        compacted, removed = compactor.run_once()
+        print(f"[SEGMENTS] Compacted: {compacted} | Expired: {removed}")
+    else:
+        for path in args.csv:
+            print(f"[SEGMENTS] {path} -> {import_csv(path, args.directory)}")
+
+
+if __name__ == "__main__":
+    main()
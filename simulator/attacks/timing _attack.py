@@ -1,4 +1,4 @@
-kimport can
+import can
 import time
 from config.can_config import CAN_INTERFACE, CAN_CHANNEL, CAN_ID
 
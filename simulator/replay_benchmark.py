@@ -0,0 +1,362 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from cps.can.decoder import CANDecoder
+from ml.live_detection import (
+    BASELINE_SAMPLES,
+    SIGNAL_FEATURES,
+    AnomalyStateMachine,
+    LiveDetector,
+    extract_features,
+    score_frames,
+)
+from ml.stream_features import StreamFeatures
+from ml.stream_reader import CSVTailer
+from receiver.can_receiver import csv_header
+from receiver.data_logger import FrameLogReader
+from receiver.segment_store import epoch_seconds
+
+# =====================================================
+# PARAMETERS
+# =====================================================
+RESULTS_FILE = "benchmarks/results.jsonl"
+FAST_BATCH = 1000       # frames per step when replaying as fast as possible
+PACED_PERIOD = 0.05     # seconds between steps when replaying in (scaled) real time
+
+STAGES = ["decode", "persist", "load", "features", "score"]
+
+
+# =====================================================
+# LOG READERS -> (timestamps, arbitration ids, payloads[n, 8])
+# =====================================================
+CANDUMP_LINE = re.compile(r"\((\d+\.\d+)\)\s+\S+\s+([0-9A-Fa-f]+)#([0-9A-Fa-f]*)")
+ASC_LINE = re.compile(
+    r"^\s*(\d+\.\d+)\s+\d+\s+([0-9A-Fa-f]+)x?\s+(?:Rx|Tx)\s+d\s+(\d+)((?:\s+[0-9A-Fa-f]{2})*)"
+)
+
+
+def _frames(timestamps, ids, payloads):
+    data = np.zeros((len(payloads), 8), dtype=np.uint8)
+    for i, payload in enumerate(payloads):
+        data[i, :len(payload)] = np.frombuffer(payload[:8], dtype=np.uint8)
+    return (
+        np.asarray(timestamps, dtype=np.float64),
+        np.asarray(ids, dtype=np.uint32),
+        data,
+    )
+
+
+def read_candump(path):
+    timestamps, ids, payloads = [], [], []
+    with open(path) as f:
+        for line in f:
+            match = CANDUMP_LINE.search(line)
+            if match:
+                timestamps.append(float(match.group(1)))
+                ids.append(int(match.group(2), 16))
+                payloads.append(bytes.fromhex(match.group(3)))
+    return _frames(timestamps, ids, payloads)
+
+
+def read_asc(path):
+    timestamps, ids, payloads = [], [], []
+    with open(path) as f:
+        for line in f:
+            match = ASC_LINE.match(line)
+            if match:
+                timestamps.append(float(match.group(1)))
+                ids.append(int(match.group(2), 16))
+                payloads.append(bytes.fromhex(match.group(4).replace(" ", "")))
+    return _frames(timestamps, ids, payloads)
+
+
+def read_frame_log(path):
+    records = FrameLogReader(path).recent(2 ** 62)
+    return (
+        np.array(records["timestamp"]),
+        np.array(records["arbitration_id"]),
+        np.array(records["data"]),
+    )
+
+
+def read_input(path, fmt=None):
+    """Raw frames from a candump/ASC/binary log, or decoded rows from our CSV."""
+    fmt = fmt or {
+        ".log": "candump",
+        ".asc": "asc",
+        ".bin": "binary",
+        ".csv": "csv",
+    }.get(os.path.splitext(path)[1].lower(), "candump")
+
+    if fmt == "csv":
+        # Older logs carry ISO timestamps; everything below works in epoch seconds
+        rows = pd.read_csv(path, on_bad_lines="skip")
+        rows["timestamp"] = epoch_seconds(rows["timestamp"])
+        return fmt, rows.dropna(subset=["timestamp"]).reset_index(drop=True)
+    reader = {"candump": read_candump, "asc": read_asc, "binary": read_frame_log}[fmt]
+    return fmt, reader(path)
+
+
+# =====================================================
+# PIPELINE
+# =====================================================
+class StageTimer:
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+        self.frames = {stage: 0 for stage in STAGES}
+
+    def record(self, stage, seconds, n):
+        self.samples[stage].append(seconds)
+        self.frames[stage] += n
+
+    def summary(self):
+        out = {}
+        for stage, samples in self.samples.items():
+            if not samples:
+                continue
+            ms = np.array(samples) * 1000
+            out[stage] = {
+                "batches": len(samples),
+                "p50_ms": round(float(np.percentile(ms, 50)), 4),
+                "p95_ms": round(float(np.percentile(ms, 95)), 4),
+                "p99_ms": round(float(np.percentile(ms, 99)), 4),
+                "us_per_frame": round(float(ms.sum() * 1000 / max(1, self.frames[stage])), 3),
+            }
+        return out
+
+
+def repeat_frames(fmt, source, times):
+    """Tile a short log end to end, shifting timestamps so they keep increasing."""
+    if times <= 1:
+        return source
+
+    if fmt == "csv":
+        span = source["timestamp"].iloc[-1] - source["timestamp"].iloc[0] + 1e-3
+        copies = [source.assign(timestamp=source["timestamp"] + k * span) for k in range(times)]
+        return pd.concat(copies, ignore_index=True)
+
+    timestamps, ids, payloads = source
+    span = timestamps[-1] - timestamps[0] + 1e-3
+    shifts = np.repeat(np.arange(times) * span, len(timestamps))
+    return (
+        np.tile(timestamps, times) + shifts,
+        np.tile(ids, times),
+        np.tile(payloads, (times, 1)),
+    )
+
+
+def load_detector(fmt, source, decoder):
+    """Saved detector if available, else one fitted on the first replayed frames."""
+    detector = LiveDetector(verbose=False).load_detector()
+    if detector is not None:
+        return detector
+
+    from ml.fast_forest import compile_detector
+    from ml.train_model import fit_detector
+
+    if fmt == "csv":
+        warmup = source.dropna(subset=SIGNAL_FEATURES).iloc[:BASELINE_SAMPLES]
+    else:
+        timestamps, ids, payloads = source
+        warmup = pd.DataFrame(decoder.decode_records(
+            timestamps[:BASELINE_SAMPLES], ids[:BASELINE_SAMPLES], payloads[:BASELINE_SAMPLES]
+        )).dropna(subset=SIGNAL_FEATURES)
+
+    print(f"[BENCH] No saved detector, fitting on the first {len(warmup)} frames")
+    warmup = StreamFeatures().transform(warmup)
+    return compile_detector(fit_detector(extract_features(warmup)))
+
+
+def replay(source, fmt, speed, detector, decoder, workdir):
+    timer = StageTimer()
+    log_path = os.path.join(workdir, "can_stream.csv")
+
+    if fmt == "csv":
+        rows = source.dropna(subset=SIGNAL_FEATURES)
+        timestamps = rows["timestamp"].to_numpy(dtype=float)
+        csv_rows = rows.reindex(columns=csv_header(decoder)).to_numpy(dtype=object)
+        n = len(rows)
+    else:
+        timestamps, ids, payloads = source
+        n = len(timestamps)
+
+    # Header first so the tailer sees the same layout as the live log
+    with open(log_path, "w", newline="") as f:
+        csv.writer(f).writerow(csv_header(decoder))
+    log = open(log_path, "a", newline="")
+    writer = csv.writer(log)
+    tailer = CSVTailer(log_path)
+
+    machine = AnomalyStateMachine(detector.thresholds["anomaly_threshold"])
+    timing = StreamFeatures()
+    end_to_end = []
+
+    start_wall = time.perf_counter()
+    start_ts = timestamps[0] if n else 0.0
+    i = 0
+
+    while i < n:
+        # Release the frames that are due at this replay speed
+        if speed > 0:
+            due_ts = start_ts + (time.perf_counter() - start_wall) * speed
+            j = int(np.searchsorted(timestamps, due_ts, side="right"))
+            if j <= i:
+                time.sleep(PACED_PERIOD)
+                continue
+        else:
+            j = min(n, i + FAST_BATCH)
+        released = time.perf_counter()
+
+        # Decode (same per-frame path as the receiver)
+        t0 = time.perf_counter()
+        if fmt == "csv":
+            # Already decoded telemetry: this stage is just row conversion
+            out_rows = csv_rows[i:j].tolist()
+        else:
+            out_rows = []
+            for k in range(i, j):
+                row = decoder.decode(int(ids[k]), payloads[k])
+                if row is not None:
+                    out_rows.append([timestamps[k]] + row + [int(ids[k])])
+        t1 = time.perf_counter()
+        timer.record("decode", t1 - t0, j - i)
+
+        # Persist
+        writer.writerows(out_rows)
+        log.flush()
+        t2 = time.perf_counter()
+        timer.record("persist", t2 - t1, len(out_rows))
+
+        # Load (incremental tail, as the live detector does)
+        frames = tailer.poll()
+        t3 = time.perf_counter()
+        timer.record("load", t3 - t2, len(frames))
+
+        # Per-id timing features
+        frames = timing.transform(frames)
+        t4 = time.perf_counter()
+        timer.record("features", t4 - t3, len(frames))
+
+        # Score + state machine
+        if not frames.empty:
+            score_frames(detector, machine, frames)
+        t5 = time.perf_counter()
+        timer.record("score", t5 - t4, len(frames))
+
+        end_to_end.append(t5 - released)
+        i = j
+
+    elapsed = time.perf_counter() - start_wall
+    log.close()
+    return n, elapsed, timer, end_to_end
+
+
+# =====================================================
+# RESULTS
+# =====================================================
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def previous_result(path, key):
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path) as f:
+        for line in f:
+            result = json.loads(line)
+            if (result["input"], result.get("repeat", 1), result["speed"]) == key:
+                last = result
+    return last
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a CAN log through decode -> log -> detect")
+    parser.add_argument("log", help="candump .log, Vector .asc, binary .bin or telemetry .csv")
+    parser.add_argument("--format", choices=["candump", "asc", "binary", "csv"])
+    parser.add_argument("--speed", type=float, default=0,
+                        help="replay speed multiplier (1 = real time, 0 = as fast as possible)")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="replay the log this many times back to back")
+    parser.add_argument("--results", default=RESULTS_FILE)
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    fmt, source = read_input(args.log, args.format)
+    source = repeat_frames(fmt, source, args.repeat)
+    speed_label = f"{args.speed:g}x" if args.speed > 0 else "max"
+
+    # Model loading/fitting is setup, not part of the measured pipeline
+    decoder = CANDecoder()
+    detector = load_detector(fmt, source, decoder)
+
+    print(f"[BENCH] Replaying {args.log} ({fmt}, x{args.repeat}) at {speed_label}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        n, elapsed, timer, end_to_end = replay(source, fmt, args.speed, detector, decoder, workdir)
+
+    e2e_ms = np.array(end_to_end) * 1000 if end_to_end else np.zeros(1)
+    result = {
+        "time": time.time(),
+        "revision": git_revision(),
+        "input": os.path.abspath(args.log),
+        "format": fmt,
+        "repeat": args.repeat,
+        "speed": speed_label,
+        "frames": int(n),
+        "elapsed_s": round(elapsed, 4),
+        "frames_per_s": round(n / elapsed, 1) if elapsed else None,
+        "stages": timer.summary(),
+        "end_to_end_ms": {
+            "p50": round(float(np.percentile(e2e_ms, 50)), 4),
+            "p95": round(float(np.percentile(e2e_ms, 95)), 4),
+            "p99": round(float(np.percentile(e2e_ms, 99)), 4),
+        },
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+    print(f"[BENCH] {n} frames in {elapsed:.3f}s -> {result['frames_per_s']} frames/s")
+    for stage, stats in result["stages"].items():
+        print(
+            f"[BENCH]   {stage:<8} p50 {stats['p50_ms']:.3f} ms | p95 {stats['p95_ms']:.3f} ms | "
+            f"p99 {stats['p99_ms']:.3f} ms | {stats['us_per_frame']:.2f} us/frame"
+        )
+    print(f"[BENCH]   end-to-end p99 {result['end_to_end_ms']['p99']:.3f} ms | peak RSS {result['peak_rss_mb']} MB")
+
+    previous = previous_result(args.results, (result["input"], args.repeat, result["speed"]))
+    if previous and previous.get("frames_per_s"):
+        change = (result["frames_per_s"] / previous["frames_per_s"] - 1) * 100
+        print(f"[BENCH] vs {previous.get('revision')}: {previous['frames_per_s']} frames/s ({change:+.1f}%)")
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(args.results) or ".", exist_ok=True)
+        with open(args.results, "a") as f:
+            f.write(json.dumps(result) + "\n")
+        print(f"[BENCH] Result appended to {args.results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,31 @@
+import argparse
 import time
-import csv
 import os
 import random
 
+import numpy as np
+import pandas as pd
+
+from cps.metrics import FRAMES_IN, REGISTRY, start_metrics
 from cps.sensors.sensor_emulator import read_sensors
-from cps.can.can_sender import CANTransmitter
+from receiver.segment_store import Compactor, SegmentWriter
 
-CSV_PATH = "data/raw/vehicle_simulation.csv"
+# Segmented store: rows go to <dir>/current.csv, sealed segments are compacted
+CSV_DIR = "data/raw/vehicle_simulation"
+CSV_FIELDS = ["timestamp", "speed", "brake", "steering"]
 SLEEP_TIME = 0.1
 
+# =====================================================
+# BATCH MODE (headless dataset generation)
+# =====================================================
+BATCH_PATH = "data/raw/vehicle_batch.parquet"
+BRAKE_PERIOD = 30           # steps between brake toggles (as in run_simulation)
+ATTACK_STEPS = 100          # length of one labeled attack window
+TIMING_ATTACK_DELAY = 2.5   # frame gap during a timing attack (normal SLEEP_TIME)
+
+# Same payloads as the attack scripts
+ATTACK_TYPES = ["spoofing", "replay", "drift", "timing"]
+
 
 class Vehicle:
     """Vehicle physical dynamics (no sensor logic here)"""
@@ -34,59 +51,233 @@ class Vehicle:
         }
 
 
-def ensure_csv():
-    os.makedirs("data/raw", exist_ok=True)
-    if not os.path.exists(CSV_PATH):
-        with open(CSV_PATH, "w", newline="") as f:
-            writer = csv.DictWriter(
-                f, fieldnames=["timestamp", "speed", "brake", "steering"]
-            )
-            writer.writeheader()
-
-
 def run_simulation():
+    # Deferred so batch mode runs without a CAN stack
+    from cps.can.can_sender import CANTransmitter
+
     print("[CPS] Vehicle simulator started (sensor emulation + CAN)")
 
     vehicle = Vehicle()
     can_tx = CANTransmitter()
 
-    ensure_csv()
+    compactor = Compactor(CSV_DIR, tag="[CPS]").start()
+    writer = SegmentWriter(CSV_DIR, CSV_FIELDS, compactor=compactor)
 
-    try:
-        with open(CSV_PATH, "a", newline="") as f:
-            writer = csv.DictWriter(
-                f, fieldnames=["timestamp", "speed", "brake", "steering"]
-            )
+    metrics = start_metrics("simulator")
+    frames_in = REGISTRY.counter(*FRAMES_IN)
+    sense_time = REGISTRY.stage("sense")
+    persist_time = REGISTRY.stage("persist")
+    send_time = REGISTRY.stage("send")
 
-            step = 0
-            while True:
-                if step % 30 == 0:
-                    vehicle.brake = not vehicle.brake
+    try:
+        step = 0
+        while True:
+            if step % 30 == 0:
+                vehicle.brake = not vehicle.brake
 
-                vehicle.update_state()
+            start = time.perf_counter()
+            vehicle.update_state()
 
-                vehicle_state = vehicle.get_state()
-                data = read_sensors(vehicle_state)
+            vehicle_state = vehicle.get_state()
+            data = read_sensors(vehicle_state)
+            sensed = time.perf_counter()
+            frames_in.inc()
 
-                writer.writerow(data)
-                f.flush()
+            writer.write_row([data[field] for field in CSV_FIELDS])
+            persisted = time.perf_counter()
 
-                can_tx.send(
-                    data["speed"],
-                    data["brake"],
-                    data["steering"]
-                )
+            can_tx.send(
+                data["speed"],
+                data["brake"],
+                data["steering"]
+            )
+            sense_time.observe(sensed - start)
+            persist_time.observe(persisted - sensed)
+            send_time.observe(time.perf_counter() - persisted)
 
-                time.sleep(SLEEP_TIME)
-                step += 1
+            time.sleep(SLEEP_TIME)
+            step += 1
 
     except KeyboardInterrupt:
         print("\n[CPS] Simulator stopped by user")
 
     finally:
+        writer.close()
+        compactor.stop()
         can_tx.close()
+        metrics.stop()
         print("[CPS] CAN bus closed cleanly")
 
 
+def simulate_dynamics(n_vehicles, n_steps, rng):
+    """
+    Vehicle.update_state() for n_vehicles x n_steps at once.
+    Brake toggles on before step 0 and every BRAKE_PERIOD steps after.
+    """
+    steps = np.arange(n_steps)
+    brake = (steps // BRAKE_PERIOD) % 2 == 0
+
+    accel = rng.uniform(0.5, 1.5, size=(n_vehicles, n_steps))
+    speed = np.empty((n_vehicles, n_steps))
+    current = np.zeros(n_vehicles)
+
+    # Within one brake period the update is closed-form, so only the
+    # period boundaries are sequential
+    for start in range(0, n_steps, BRAKE_PERIOD):
+        stop = min(start + BRAKE_PERIOD, n_steps)
+        if brake[start]:
+            decel = 3.0 * np.arange(1, stop - start + 1)
+            speed[:, start:stop] = np.maximum(0.0, current[:, None] - decel)
+        else:
+            speed[:, start:stop] = current[:, None] + np.cumsum(accel[:, start:stop], axis=1)
+        current = speed[:, stop - 1]
+
+    steering = np.cumsum(rng.uniform(-0.3, 0.3, size=(n_vehicles, n_steps)), axis=1)
+
+    return speed, np.broadcast_to(brake, (n_vehicles, n_steps)), steering
+
+
+def inject_attacks(speed, brake, steering, dt, rng, attack_rate, attack_steps):
+    """
+    Overwrite one window per attacked vehicle with the payload pattern of
+    an attack script. Returns (label, attack type) per row.
+    """
+    n_vehicles, n_steps = speed.shape
+    label = np.zeros((n_vehicles, n_steps), dtype=np.int8)
+    attack = np.full((n_vehicles, n_steps), "", dtype="<U8")
+
+    attack_steps = min(attack_steps, n_steps)
+    attacked = np.flatnonzero(rng.random(n_vehicles) < attack_rate)
+
+    for v in attacked:
+        kind = ATTACK_TYPES[rng.integers(len(ATTACK_TYPES))]
+        start = int(rng.integers(0, n_steps - attack_steps + 1))
+        window = slice(start, start + attack_steps)
+        k = np.arange(1, attack_steps + 1)
+
+        if kind == "spoofing":      # attacks/attack_spoofing.py
+            speed[v, window] = rng.uniform(200, 260, attack_steps)
+            brake[v, window] = rng.integers(0, 2, attack_steps)
+            steering[v, window] = rng.uniform(80, 140, attack_steps)
+        elif kind == "replay":      # simulator/attacks/replay_attack.py
+            speed[v, window] = 220
+            brake[v, window] = 1
+            steering[v, window] = 70
+        elif kind == "drift":       # simulator/attacks/spoofing_attack.py
+            speed[v, window] = np.minimum(30 + 10 * k, 255)
+            brake[v, window] = 0
+            steering[v, window] = (5 * k) % 90
+        else:                       # simulator/attacks/timing _attack.py
+            speed[v, window] = 40
+            brake[v, window] = 0
+            steering[v, window] = 0
+            dt[v, window] = TIMING_ATTACK_DELAY
+
+        label[v, window] = 1
+        attack[v, window] = kind
+
+    return label, attack
+
+
+def simulate_batch(
+    n_vehicles,
+    n_steps,
+    seed=None,
+    attack_rate=0.0,
+    attack_steps=ATTACK_STEPS,
+    start_time=None
+):
+    """
+    Headless run_simulation(): n_vehicles x n_steps samples with the same
+    dynamics, sensor noise and brake toggling, synthetic timestamps
+    SLEEP_TIME apart, and optional labeled attack windows.
+    Returns a DataFrame ordered by vehicle, then step.
+    """
+    rng = np.random.default_rng(seed)
+
+    speed, brake, steering = simulate_dynamics(n_vehicles, n_steps, rng)
+    brake = brake.astype(np.int8)
+    dt = np.full((n_vehicles, n_steps), SLEEP_TIME)
+
+    label, attack = inject_attacks(speed, brake, steering, dt, rng, attack_rate, attack_steps)
+
+    # read_sensors() noise model
+    speed = np.round(speed + rng.uniform(-0.5, 0.5, speed.shape), 2)
+    steering = np.round(steering + rng.uniform(-0.3, 0.3, steering.shape), 2)
+
+    start = pd.Timestamp.now("UTC").tz_localize(None) if start_time is None else pd.Timestamp(start_time)
+    offsets = np.cumsum(dt, axis=1) - dt[:, :1]
+    timestamps = start.to_datetime64() + (offsets * 1e9).astype("timedelta64[ns]")
+
+    return pd.DataFrame({
+        "vehicle_id": np.repeat(np.arange(n_vehicles, dtype=np.int32), n_steps),
+        "step": np.tile(np.arange(n_steps, dtype=np.int32), n_vehicles),
+        "timestamp": timestamps.ravel(),
+        "speed": speed.ravel(),
+        "brake": brake.ravel(),
+        "steering": steering.ravel(),
+        "label": label.ravel(),
+        "attack": attack.ravel(),
+    })
+
+
+def write_batch(df, path=BATCH_PATH):
+    """Parquet if an engine is installed, else an .npz of the columns."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    if path.endswith(".parquet"):
+        try:
+            df.to_parquet(path, index=False)
+            return path
+        except ImportError:
+            path = path[:-len(".parquet")] + ".npz"
+            print("[CPS] No parquet engine installed, writing .npz instead")
+
+    columns = {name: df[name].to_numpy() for name in df.columns}
+    columns["attack"] = columns["attack"].astype(str)
+    np.savez(path, **columns)
+    return path
+
+
+def read_batch(path):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    with np.load(path, allow_pickle=False) as data:
+        return pd.DataFrame({name: data[name] for name in data.files})
+
+
+def run_batch(args):
+    started = time.perf_counter()
+    df = simulate_batch(
+        args.vehicles,
+        args.steps,
+        seed=args.seed,
+        attack_rate=args.attack_rate,
+        attack_steps=args.attack_steps
+    )
+    path = write_batch(df, args.out)
+
+    print(
+        f"[CPS] {len(df)} rows ({args.vehicles} vehicles x {args.steps} steps, "
+        f"{int(df['label'].sum())} attack rows) -> {path} "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+
+
 if __name__ == "__main__":
-    run_simulation()
+    parser = argparse.ArgumentParser(description="CPS vehicle simulator")
+    parser.add_argument("--batch", action="store_true",
+                        help="generate a dataset headlessly instead of streaming to CAN")
+    parser.add_argument("--vehicles", type=int, default=100)
+    parser.add_argument("--steps", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--attack-rate", type=float, default=0.0,
+                        help="fraction of vehicles with one labeled attack window")
+    parser.add_argument("--attack-steps", type=int, default=ATTACK_STEPS)
+    parser.add_argument("--out", default=BATCH_PATH)
+    args = parser.parse_args()
+
+    if args.batch:
+        run_batch(args)
+    else:
+        run_simulation()
@@ -0,0 +1,34 @@
+from cps.can.decoder import CANDecoder
+from ml.stream_reader import BinaryTailer
+from receiver.data_logger import FrameLogWriter
+
+SPEED_ID = 0x100
+STEERING_ID = 0x200
+
+SIGNALS = {
+    SPEED_ID: [{"name": "speed", "start": 0, "length": 1, "scale": 1.0, "offset": 0.0, "signed": False}],
+    STEERING_ID: [{"name": "steering", "start": 0, "length": 1, "scale": 1.0, "offset": 0.0, "signed": True}],
+}
+
+
+def test_signals_hold_across_polls(tmp_path):
+    path = str(tmp_path / "can_stream.bin")
+    writer = FrameLogWriter(path)
+    tailer = BinaryTailer(path, decoder=CANDecoder(SIGNALS))
+
+    # Speed before any steering frame: incomplete, dropped
+    for t, arbitration_id, value in [(1.0, SPEED_ID, 10), (1.1, STEERING_ID, 5), (1.2, SPEED_ID, 11)]:
+        writer.append(t, arbitration_id, bytes([value]))
+    writer.flush()
+    first = tailer.poll()
+    assert first["timestamp"].tolist() == [1.1, 1.2]
+    assert first["steering"].tolist() == [5, 5]
+
+    # Next poll starts with speed only: steering holds its last value
+    for t, arbitration_id, value in [(1.3, SPEED_ID, 12), (1.4, STEERING_ID, 6)]:
+        writer.append(t, arbitration_id, bytes([value]))
+    writer.close()
+    second = tailer.poll()
+    assert second["speed"].tolist() == [12, 12]
+    assert second["steering"].tolist() == [5, 6]
+    assert not second.isna().any().any()
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from ml.fast_forest import compile_detector
+from ml.live_detection import SIGNAL_FEATURES, AnomalyStateMachine, extract_features
+from ml.stream_features import StreamFeatures
+from ml.train_model import fit_detector
+from simulator.vehicle_simulator import SLEEP_TIME, simulate_batch
+
+SPOOF_PERIOD = 0.15         # attacks/attack_spoofing.py sleep between rows
+SECONDS = 20
+
+
+def telemetry(seed, steps, start):
+    df = simulate_batch(1, steps, seed=seed)
+    df["timestamp"] = start + np.arange(steps) * SLEEP_TIME
+    return df[["timestamp"] + SIGNAL_FEATURES]
+
+
+def spoofed_rows(start, seconds, rng):
+    """Rows attacks/attack_spoofing.py appends next to the live stream."""
+    n = int(seconds / SPOOF_PERIOD)
+    return pd.DataFrame({
+        "timestamp": start + np.arange(n) * SPOOF_PERIOD,
+        "speed": rng.uniform(200, 260, n),
+        "brake": rng.choice([0, 1], n),
+        "steering": rng.uniform(80, 140, n),
+    })
+
+
+def states(detector, timing, frames):
+    machine = AnomalyStateMachine(detector.thresholds["anomaly_threshold"])
+    scores = detector.decision_function(extract_features(timing.transform(frames)))
+    return [machine.update(score, t) for score, t in zip(scores, frames["timestamp"])]
+
+
+def test_spoofing_attack_raises_attack():
+    rng = np.random.default_rng(0)
+    timing = StreamFeatures()
+
+    train = timing.transform(telemetry(1, 3000, 1.7e9))
+    detector = compile_detector(fit_detector(extract_features(train)))
+
+    start = train["timestamp"].iloc[-1] + SLEEP_TIME
+    normal = telemetry(2, int(SECONDS / SLEEP_TIME), start)
+    assert "ATTACK" not in states(detector, timing, normal)
+
+    start += SECONDS
+    live = telemetry(3, int(SECONDS / SLEEP_TIME), start)
+    attacked = pd.concat([live, spoofed_rows(start, SECONDS, rng)]).sort_values("timestamp", kind="stable")
+    assert "ATTACK" in states(detector, timing, attacked)
@@ -0,0 +1,25 @@
+from ml.live_detection import PERSISTENCE_SECONDS, AnomalyStateMachine
+
+
+def first_attack(period, n):
+    """Timestamp of the ATTACK transition for n anomalous scores `period` seconds apart."""
+    machine = AnomalyStateMachine(threshold=0.0)
+    for i in range(n):
+        if machine.update(-1.0, i * period) == "ATTACK":
+            return i * period
+    return None
+
+
+def test_persistence_is_measured_in_seconds():
+    # A slow timing attack and a flood alarm after the same anomalous time
+    assert first_attack(2.5, 10) == 5.0
+    assert abs(first_attack(0.001, 10000) - PERSISTENCE_SECONDS) < 0.01
+    assert first_attack(0.001, 100) is None
+
+
+def test_recovery_after_as_much_normal_time():
+    machine = AnomalyStateMachine(threshold=0.0)
+    states = [machine.update(-1.0, t / 10) for t in range(41)]
+    assert "ATTACK" in states
+    states = [machine.update(1.0, 4.0 + t / 10) for t in range(1, 45)]
+    assert states.count("RECOVERY") == 1 and states[-1] is None and machine.state == "NORMAL"